@@ -0,0 +1,442 @@
+"""
+SWG Mail Tracker - Application controller, started by main.py
+"""
+import sys
+import logging
+import threading
+from typing import Optional
+
+import customtkinter as ctk
+from src.core.config_manager import ConfigManager
+from src.core.api_client import SWGTrackerAPI
+from src.core.engine import MailEngine
+from src.core.engine_process import EngineProcess
+from src.core.notifier import NotificationAggregator
+from src.core.upload_queue import character_for
+from src.gui.main_window import MainWindow
+from src.gui.system_tray import SystemTray
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.FileHandler('swg_mail_tracker.log'),
+        logging.StreamHandler()
+    ]
+)
+
+logger = logging.getLogger(__name__)
+
+
+class SWGMailTrackerApp:
+    """Main application controller"""
+
+    SESSION_END_DRAIN_TIMEOUT = 3  # seconds, Windows kills the process soon after logoff
+
+    def __init__(self):
+        """Initialize application"""
+        self.config_manager = ConfigManager()
+        self.is_monitoring = False
+        self.main_window = None
+        self.system_tray = None
+        self.is_running = True
+        self.is_shutting_down = False
+
+        # Keep reading, hashing and uploading out of the GUI interpreter if asked
+        config = self.config_manager.snapshot
+        engine_class = EngineProcess if config.engine_in_subprocess else MailEngine
+        self.engine = engine_class(config, on_event=self._on_engine_event)
+        self.notifier = NotificationAggregator(self._show_notification)
+
+        logger.info("SWG Mail Tracker started")
+
+    def start(self):
+        """Start the application"""
+        self.engine.open()
+        self.notifier.start()
+
+        # Create main window
+        self.main_window = MainWindow(
+            config_manager=self.config_manager,
+            on_start_monitoring=self.start_monitoring,
+            on_stop_monitoring=self.stop_monitoring,
+            on_test_connection=self.test_connection,
+            on_close=self.quit_application,
+            on_session_end=self.end_session,
+            on_reconfigure=self.reconfigure_monitoring,
+            history_store=self.engine.history_store,
+            stats_store=self.engine.stats_store,
+            dead_letter_store=self.engine.dead_letter_store,
+            on_retry_dead_letters=self.retry_dead_letters,
+            on_toggle_profiling=self.toggle_profiling,
+            on_start_replay=self.start_replay,
+            on_stop_replay=self.engine.stop_replay,
+            on_export=self.engine.export_bundles,
+            on_import=self.import_bundles
+        )
+
+        # Profiling may already be running from SWG_TRACKER_PROFILE
+        self.main_window.get_settings_tab().set_profiling_state(self.engine.is_profiling)
+
+        # Set up system tray
+        self.setup_system_tray()
+
+        # Pick up edits made to config.json outside the app
+        self.config_manager.start_watching(
+            lambda: self.main_window.after(0, self._on_config_file_changed)
+        )
+
+        # Auto-start monitoring if enabled
+        if self.config_manager.snapshot.auto_start_monitoring:
+            self.main_window.after(1000, self._auto_start)
+
+        # Start main loop
+        self.main_window.mainloop()
+
+    def setup_system_tray(self):
+        """Set up system tray icon"""
+        # Only enable system tray on Windows
+        if sys.platform != 'win32':
+            logger.info("System tray disabled on non-Windows platform")
+            return
+
+        try:
+            self.system_tray = SystemTray(
+                on_show=self.show_window,
+                on_hide=self.hide_window,
+                on_start=lambda: self.start_monitoring(),
+                on_stop=lambda: self.stop_monitoring(),
+                on_exit=self.quit_application
+            )
+
+            self.system_tray.setup()
+
+            # Run system tray in separate thread
+            tray_thread = threading.Thread(
+                target=self.system_tray.run,
+                daemon=True
+            )
+            tray_thread.start()
+
+            logger.info("System tray initialized")
+
+        except Exception as e:
+            logger.error(f"Failed to initialize system tray: {e}")
+
+    def start_monitoring(self) -> tuple[bool, str]:
+        """
+        Start file monitoring
+
+        Returns:
+            Tuple of (success: bool, message: str)
+        """
+        if self.is_monitoring:
+            return False, "Monitoring is already active"
+
+        # Validate configuration
+        is_valid, errors = self.config_manager.validate()
+        if not is_valid:
+            return False, "Invalid configuration: " + ", ".join(errors)
+
+        # The engine keeps the snapshot it was last given, which may predate saved settings
+        self.engine.reconfigure(self.config_manager.snapshot)
+        success, message = self.engine.start()
+        if success:
+            self.is_monitoring = True
+
+            # Update system tray
+            if self.system_tray:
+                self.system_tray.update_monitoring_status(True)
+
+        return success, message
+
+    def stop_monitoring(self) -> tuple[bool, str]:
+        """
+        Stop file monitoring
+
+        Returns:
+            Tuple of (success: bool, message: str)
+        """
+        success, message = self.engine.stop()
+        if success:
+            self.is_monitoring = False
+
+            # Update system tray
+            if self.system_tray:
+                self.system_tray.update_monitoring_status(False)
+
+        return success, message
+
+    def reconfigure_monitoring(self) -> tuple[bool, str]:
+        """
+        Apply configuration changes to the engine, running or not
+
+        Returns:
+            Tuple of (success: bool, message: str)
+        """
+        return self.engine.reconfigure(self.config_manager.snapshot)
+
+    def retry_dead_letters(self) -> tuple[bool, str]:
+        """
+        Send every dead-lettered file back through the upload queue
+
+        Returns:
+            Tuple of (success: bool, message: str)
+        """
+        if self.is_shutting_down:
+            return False, "Shutting down"
+        return self.engine.retry_dead_letters()
+
+    def start_replay(
+        self,
+        label: str,
+        since: Optional[float],
+        until: Optional[float],
+        status: Optional[str],
+        rate: float
+    ) -> tuple[bool, str]:
+        """
+        Re-upload mail selected by character, date range or history status
+
+        Returns:
+            Tuple of (success: bool, message: str)
+        """
+        if self.is_shutting_down:
+            return False, "Shutting down"
+        return self.engine.start_replay(label, since, until, status, rate)
+
+    def import_bundles(self, paths: list, rate: float) -> tuple[bool, str]:
+        """
+        Upload the mail in export bundles
+
+        Returns:
+            Tuple of (success: bool, message: str)
+        """
+        if self.is_shutting_down:
+            return False, "Shutting down"
+        return self.engine.import_bundles(paths, rate)
+
+    def toggle_profiling(self) -> tuple[bool, str]:
+        """
+        Start or stop profiling the upload engine
+
+        Returns:
+            Tuple of (success: bool, message: str)
+        """
+        if self.engine.is_profiling:
+            return self.engine.stop_profiling()
+        return self.engine.start_profiling()
+
+    def _on_engine_event(self, kind: str, *args):
+        """
+        Handle an event from the engine (called from a background thread)
+
+        Args:
+            kind: Event kind
+            args: Event arguments
+        """
+        if kind == 'result':
+            result, = args
+            if self.system_tray:
+                self.system_tray.update_status(uploaded=result.success, failed=result.status in ("failed", "error"))
+            if self.config_manager.snapshot.show_notifications:
+                character = character_for(result.file_path, result.label)
+                if result.success:
+                    self.notifier.add_upload(character)
+                elif result.status in ("failed", "error"):
+                    self.notifier.add_failure(character, result.message)
+            return
+        elif kind == 'connectivity':
+            online, parked = args
+            if self.system_tray:
+                self.system_tray.update_status(online=online, pending=parked)
+        elif kind == 'queue':
+            if self.system_tray:
+                self.system_tray.update_status(pending=args[0])
+            return
+
+        if self.main_window:
+            self.main_window.after(0, lambda: self._apply_engine_event(kind, args))
+
+    def _apply_engine_event(self, kind: str, args: tuple):
+        """Show an engine event in the window (runs on the UI thread)"""
+        monitor_tab = self.main_window.get_monitor_tab()
+
+        if kind == 'log':
+            monitor_tab.log_message(*args)
+        elif kind == 'stat':
+            monitor_tab.update_stats(*args)
+        elif kind == 'connectivity':
+            online, parked = args
+            monitor_tab.set_connection_state(online, parked)
+            if online:
+                monitor_tab.log_message(f"Connection restored, uploading {parked} parked files", "success")
+            else:
+                monitor_tab.log_message("Server unreachable, parking uploads until it is back", "warning")
+        elif kind == 'starting':
+            done, total, display_name = args
+            if not monitor_tab.is_monitoring:
+                monitor_tab.show_status_message(f"Starting watcher {done}/{total}: {display_name}", "info")
+        elif kind == 'rate':
+            monitor_tab.set_upload_rate(*args)
+        elif kind == 'replay':
+            if self.main_window.history_tab:
+                self.main_window.history_tab.set_replay_progress(*args)
+        elif kind == 'profiling':
+            is_profiling, report_dir = args
+            self.main_window.get_settings_tab().set_profiling_state(is_profiling)
+            if not is_profiling:
+                monitor_tab.log_message(f"Profiling reports written to {report_dir}", "info")
+        elif kind == 'monitoring':
+            is_monitoring, = args
+            if not is_monitoring and self.is_monitoring and not self.is_shutting_down:
+                # Engine stopped on its own
+                self.is_monitoring = False
+                self.main_window.update_monitoring_status(False)
+                monitor_tab.set_monitoring_status(False)
+                if self.system_tray:
+                    self.system_tray.update_monitoring_status(False)
+
+    def test_connection(self) -> tuple[bool, str]:
+        """
+        Test API connection
+
+        Returns:
+            Tuple of (success: bool, message: str)
+        """
+        try:
+            # Validate configuration
+            user_key = self.config_manager.get('scanner_user_key')
+
+            if not user_key:
+                return False, "API Key is required"
+
+            # Create API client and test
+            api_client = SWGTrackerAPI(user_key)
+            success, message = api_client.test_connection()
+            api_client.close()
+
+            logger.info(f"Connection test: {message}")
+            return success, message
+
+        except Exception as e:
+            error_msg = f"Connection test failed: {str(e)}"
+            logger.error(error_msg, exc_info=True)
+            return False, error_msg
+
+    def show_window(self):
+        """Show main window"""
+        if self.main_window:
+            self.main_window.show_window()
+
+    def hide_window(self):
+        """Hide main window"""
+        if self.main_window:
+            self.main_window.hide_window()
+
+    def quit_application(self):
+        """
+        Quit the application after draining uploads
+
+        Stops accepting new mail, waits up to shutdown_drain_timeout
+        seconds for queued and in-flight uploads, persists whatever is
+        left for the next start, then exits.
+        """
+        self._begin_shutdown(self.config_manager.snapshot.shutdown_drain_timeout)
+
+    def end_session(self):
+        """Quit quickly when Windows is logging off or shutting down"""
+        self._begin_shutdown(self.SESSION_END_DRAIN_TIMEOUT)
+
+    def _begin_shutdown(self, timeout: float):
+        """
+        Start the shutdown sequence on a background thread
+
+        Args:
+            timeout: Maximum seconds to wait for uploads to finish
+        """
+        if self.is_shutting_down:
+            return
+        self.is_shutting_down = True
+
+        logger.info("Shutting down application")
+
+        self.config_manager.stop_watching()
+
+        threading.Thread(
+            target=self._drain_and_exit,
+            args=(timeout,),
+            name="ShutdownDrain",
+            daemon=True
+        ).start()
+
+    def _drain_and_exit(self, timeout: float):
+        """Drain uploads, persist the rest and exit (runs off the UI thread)"""
+        def on_progress(remaining: int, seconds_left: float):
+            message = f"Shutting down: {remaining} upload{'' if remaining == 1 else 's'} remaining ({seconds_left:.0f}s)"
+            if self.system_tray:
+                self.system_tray.set_tooltip(message)
+            if self.main_window:
+                self.main_window.after(0, lambda: self.main_window.get_monitor_tab().show_status_message(message))
+
+        self.engine.shutdown(timeout, on_progress)
+        self.notifier.stop()
+
+        if self.main_window:
+            self.main_window.after(0, self._exit)
+        else:
+            self._exit()
+
+    def _exit(self):
+        """Release resources and exit the process"""
+        # Stop system tray
+        if self.system_tray:
+            self.system_tray.stop()
+
+        # Destroy window
+        if self.main_window:
+            self.main_window.quit()
+            self.main_window.destroy()
+
+        self.is_running = False
+        sys.exit(0)
+
+    def _auto_start(self):
+        """Auto-start monitoring on launch"""
+        logger.info("Auto-starting monitoring")
+        self.main_window.begin_start(auto=True)
+
+    def _on_config_file_changed(self):
+        """Reload settings after config.json was edited externally"""
+        monitor_tab = self.main_window.get_monitor_tab()
+        monitor_tab.log_message("Configuration file changed, reloading", "info")
+
+        self.main_window.get_settings_tab().reload_settings()
+        self.main_window.begin_reconfigure()
+
+    def _show_notification(self, title: str, message: str):
+        """
+        Show desktop notification (runs on the notification dispatch thread)
+
+        Args:
+            title: Notification title
+            message: Notification message
+        """
+        logger.info(f"Notification: {title} - {message}")
+        if self.system_tray:
+            self.system_tray.notify(title, message)
+
+
+def main():
+    """Main entry point"""
+    try:
+        app = SWGMailTrackerApp()
+        app.start()
+    except KeyboardInterrupt:
+        logger.info("Application interrupted by user")
+        sys.exit(0)
+    except Exception as e:
+        logger.error(f"Fatal error: {e}", exc_info=True)
+        sys.exit(1)
+
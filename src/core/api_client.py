@@ -2,27 +2,153 @@
 API Client for swgtracker.com communication
 """
 import json
+import time
+import socket
 import logging
 import requests
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
 from typing import Optional, Dict, Any
+from .metrics import Metrics
+from .timeouts import AdaptiveTimeouts
 
 logger = logging.getLogger(__name__)
 
 
+class UploadResult:
+    """Outcome of a single upload"""
+
+    __slots__ = ('success', 'message', 'status_code', 'response_text', 'network_error')
+
+    def __init__(
+        self,
+        success: bool,
+        message: str,
+        status_code: Optional[int] = None,
+        response_text: str = "",
+        network_error: bool = False
+    ):
+        """
+        Initialize upload result
+
+        Args:
+            success: Whether the server accepted the upload
+            message: Human readable summary
+            status_code: HTTP status code, None if no response was received
+            response_text: Body returned by the server
+            network_error: True if the server could not be reached
+        """
+        self.success = success
+        self.message = message
+        self.status_code = status_code
+        self.response_text = response_text
+        self.network_error = network_error
+
+    @property
+    def permanent(self) -> bool:
+        """True if retrying the same content cannot succeed (4xx except 408/429)"""
+        return (
+            self.status_code is not None
+            and 400 <= self.status_code < 500
+            and self.status_code not in (408, 429)
+        )
+
+
 class SWGTrackerAPI:
     """Handle all API communication with swgtracker.com"""
 
     API_URL = "https://swgtracker.com/import_mailcontent.php"
-    TIMEOUT = 10  # seconds
+    TIMEOUT = 10  # seconds, used by test_connection; uploads use adaptive timeouts
+    PROBE_TIMEOUT = 5  # seconds
+    POOL_SIZE = 4
+    IDLE_TIMEOUT = 60  # seconds after which pooled connections are assumed closed
 
-    def __init__(self, user_key: str):
+    def __init__(self, user_key: str, metrics: Optional[Metrics] = None, api_url: Optional[str] = None):
         """
         Initialize API client
 
         Args:
             user_key: Scanner API key
+            metrics: Optional Metrics instance to report into
+            api_url: Endpoint to use instead of API_URL, e.g. a local test server
         """
         self.user_key = user_key
+        self.api_url = api_url or self.API_URL
+        self.metrics = metrics or Metrics()
+        self.timeouts = AdaptiveTimeouts(self.metrics)
+        self.last_request_at: Optional[float] = None  # monotonic time
+
+        # Pooled session so uploads and health probes reuse connections
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.POOL_SIZE)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def close(self) -> None:
+        """Close pooled connections"""
+        self.session.close()
+
+    def idle_seconds(self) -> float:
+        """Get seconds since the last request finished (inf if none yet)"""
+        if self.last_request_at is None:
+            return float('inf')
+        return time.monotonic() - self.last_request_at
+
+    def is_warm(self) -> bool:
+        """Check whether a pooled connection is likely still open"""
+        return self.idle_seconds() < self.IDLE_TIMEOUT
+
+    def warm_up(self) -> bool:
+        """
+        Pre-resolve the API host and open a pooled connection
+
+        Pays DNS, TCP connect and the TLS handshake up front so the first
+        upload does not.
+
+        Returns:
+            True if the server answered, False otherwise
+        """
+        url = urlparse(self.api_url)
+        start = time.monotonic()
+        try:
+            socket.getaddrinfo(url.hostname, url.port or (443 if url.scheme == 'https' else 80))
+            resolved = time.monotonic()
+
+            self.session.head(self.api_url, timeout=self.PROBE_TIMEOUT)
+            connected = time.monotonic()
+            self.last_request_at = connected
+
+            self.metrics.observe('warmup.dns_ms', (resolved - start) * 1000)
+            self.metrics.observe('warmup.connect_ms', (connected - resolved) * 1000)
+            logger.info(f"Connection warmed up in {(connected - start) * 1000:.0f} ms")
+            return True
+
+        except (OSError, requests.exceptions.RequestException) as e:
+            self.metrics.increment('warmup.failures')
+            logger.debug(f"Warm-up failed: {e}")
+            return False
+
+    def probe(self) -> bool:
+        """
+        Check that the API endpoint is reachable
+
+        Any HTTP response counts as reachable; only network failures and
+        timeouts count as down.
+
+        Returns:
+            True if the server answered, False otherwise
+        """
+        try:
+            start = time.monotonic()
+            self.session.head(self.api_url, timeout=self.PROBE_TIMEOUT)
+            self.last_request_at = time.monotonic()
+
+            # A keep-alive HEAD costs about one round trip, like a TCP connect
+            self.timeouts.record_connect(self.api_url, self.last_request_at - start)
+            return True
+        except requests.exceptions.RequestException as e:
+            logger.debug(f"Health probe failed: {e}")
+            return False
 
     def send_mail_content(self, mail_content: str) -> tuple[bool, str]:
         """
@@ -34,51 +160,98 @@ class SWGTrackerAPI:
         Returns:
             Tuple of (success: bool, message: str)
         """
-        try:
-            data = {
-                'incomingData': mail_content,
-                'scannerUserKey': self.user_key
-            }
+        result = self.upload(mail_content)
+        return result.success, result.message
+
+    def envelope(self, mail_content: str) -> str:
+        """
+        Build the JSON body upload posts for mail content
+
+        Args:
+            mail_content: Raw content of the mail file
+
+        Returns:
+            JSON request body
+        """
+        return json.dumps({
+            'incomingData': mail_content,
+            'scannerUserKey': self.user_key
+        })
+
+    def upload(self, mail_content: str, json_content: Optional[str] = None) -> UploadResult:
+        """
+        Send mail file content and keep the server response
+
+        Args:
+            mail_content: Raw content of the mail file
+            json_content: Body from envelope(), built here if not given
 
+        Returns:
+            UploadResult describing the outcome
+        """
+        response = None
+        warm = self.is_warm()
+        start = time.monotonic()
+        try:
             headers = {
                 'Content-type': 'application/json',
                 'Accept': 'text/plain'
             }
 
-            json_content = json.dumps(data)
+            if json_content is None:
+                json_content = self.envelope(mail_content)
 
-            logger.debug(f"Sending mail content to {self.API_URL}")
-            response = requests.post(
-                self.API_URL,
+            logger.debug(f"Sending mail content to {self.api_url}")
+            response = self.session.post(
+                self.api_url,
                 data=json_content,
                 headers=headers,
-                timeout=self.TIMEOUT
+                timeout=self.timeouts.timeouts_for(self.api_url, len(json_content))
             )
 
+            self._record_latency(start, warm)
+            self.timeouts.record_read(self.api_url, response.elapsed.total_seconds(), len(json_content))
             response.raise_for_status()
 
             logger.info(f"Mail content sent successfully. Status: {response.status_code}")
-            return True, f"Successfully uploaded (Status: {response.status_code})"
+            return UploadResult(
+                True,
+                f"Successfully uploaded (Status: {response.status_code})",
+                response.status_code,
+                response.text
+            )
 
-        except requests.exceptions.Timeout:
-            error_msg = "Request timed out"
+        except requests.exceptions.Timeout as e:
+            phase = 'connect' if isinstance(e, requests.exceptions.ConnectTimeout) else 'read'
+            self.metrics.increment(f'timeout.{phase}_expired')
+            error_msg = f"Request timed out ({phase})"
             logger.error(error_msg)
-            return False, error_msg
+            return UploadResult(False, error_msg, network_error=True)
 
         except requests.exceptions.ConnectionError:
             error_msg = "Connection error - check your internet connection"
             logger.error(error_msg)
-            return False, error_msg
+            return UploadResult(False, error_msg, network_error=True)
 
         except requests.exceptions.HTTPError as e:
             error_msg = f"HTTP error: {e.response.status_code}"
             logger.error(error_msg)
-            return False, error_msg
+            return UploadResult(False, error_msg, e.response.status_code, e.response.text)
 
         except Exception as e:
             error_msg = f"Unexpected error: {str(e)}"
             logger.error(error_msg, exc_info=True)
-            return False, error_msg
+            status_code = response.status_code if response is not None else None
+            return UploadResult(False, error_msg, status_code)
+
+    def _record_latency(self, start: float, warm: bool) -> None:
+        """Record request latency split by whether the connection was warm"""
+        finished = time.monotonic()
+        self.last_request_at = finished
+        self.metrics.observe(
+            'upload.warm_ms' if warm else 'upload.cold_ms',
+            (finished - start) * 1000
+        )
 
     def test_connection(self) -> tuple[bool, str]:
         """
@@ -99,8 +272,8 @@ class SWGTrackerAPI:
                 'Accept': 'text/plain'
             }
 
-            response = requests.post(
-                self.API_URL,
+            response = self.session.post(
+                self.api_url,
                 data=json.dumps(test_data),
                 headers=headers,
                 timeout=self.TIMEOUT
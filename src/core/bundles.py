@@ -0,0 +1,185 @@
+"""
+Compressed JSONL bundles of upload envelopes for offline transfer
+"""
+import os
+import gzip
+import json
+import time
+import shutil
+import logging
+from typing import Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+BUNDLE_SUFFIX = ".jsonl.gz"
+IMPORT_LABEL = "import"  # label of staged mail in the history and stats
+STAGING_MAX_AGE = 30 * 24 * 3600  # seconds an import's staging folder is kept
+
+
+class BundleWriter:
+    """
+    Write upload envelopes into size-bounded gzip JSONL files
+
+    Each line is exactly the JSON body SWGTrackerAPI.upload posts. A new
+    bundle is started once the compressed size reaches max_bytes.
+    """
+
+    MAX_BUNDLE_BYTES = 8 * 1024 * 1024  # compressed bytes per bundle
+
+    def __init__(self, output_dir: str, prefix: str = "swg-mail", max_bytes: Optional[int] = None):
+        """
+        Initialize bundle writer
+
+        Args:
+            output_dir: Directory the bundles are written to
+            prefix: File name prefix, followed by a timestamp and a sequence number
+            max_bytes: Compressed size at which a bundle is closed, defaults to MAX_BUNDLE_BYTES
+        """
+        self.output_dir = output_dir
+        self.prefix = f"{prefix}-{time.strftime('%Y%m%d-%H%M%S')}"
+        self.max_bytes = max_bytes or self.MAX_BUNDLE_BYTES
+        self.paths: List[str] = []
+        self.count = 0
+        self._raw = None
+        self._gzip = None
+
+    def write(self, mail_content: str, user_key: str) -> None:
+        """
+        Add one envelope
+
+        Args:
+            mail_content: Raw content of the mail file
+            user_key: API key the envelope is addressed with
+        """
+        if self._gzip is None or self._raw.tell() >= self.max_bytes:
+            self._open_next()
+
+        line = json.dumps({'incomingData': mail_content, 'scannerUserKey': user_key})
+        self._gzip.write(line.encode('utf-8') + b"\n")
+        self.count += 1
+
+    def _open_next(self) -> None:
+        """Close the current bundle and start the next one"""
+        self._close_current()
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, f"{self.prefix}-{len(self.paths) + 1:03d}{BUNDLE_SUFFIX}")
+        self._raw = open(path, 'wb')
+        self._gzip = gzip.GzipFile(fileobj=self._raw, mode='wb')
+        self.paths.append(path)
+
+    def _close_current(self) -> None:
+        """Finish the open bundle, if any"""
+        if self._gzip is not None:
+            self._gzip.close()
+            self._raw.flush()
+            os.fsync(self._raw.fileno())
+            self._raw.close()
+            self._gzip = self._raw = None
+
+    def close(self) -> List[str]:
+        """
+        Finish writing
+
+        Returns:
+            Paths of the bundles written
+        """
+        self._close_current()
+        return self.paths
+
+
+def read_bundle(path: str) -> Iterator[Dict[str, str]]:
+    """
+    Stream the envelopes of one bundle
+
+    Lines that are not upload envelopes are logged and skipped.
+
+    Args:
+        path: Bundle file
+
+    Yields:
+        Envelope dictionaries with incomingData and scannerUserKey
+    """
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                envelope = json.loads(line)
+            except ValueError:
+                logger.warning(f"Skipping malformed line {number} in {path}")
+                continue
+            if not isinstance(envelope, dict) or not isinstance(envelope.get('incomingData'), str):
+                logger.warning(f"Skipping line {number} in {path}, not an upload envelope")
+                continue
+            yield envelope
+
+
+def stage_bundles(
+    paths: List[str],
+    staging_dir: str,
+    user_key: str = "",
+    max_age: float = STAGING_MAX_AGE
+) -> List[tuple[str, str]]:
+    """
+    Unpack bundles into mail files the upload pipeline can replay
+
+    Each import gets its own folder under staging_dir. Folders of earlier
+    imports are kept for max_age, so their dead letters can be retried and
+    their history replayed, then removed by a later import.
+
+    Args:
+        paths: Bundle files to unpack
+        staging_dir: Directory receiving one folder per import
+        user_key: Current API key, used to warn about bundles for another key
+        max_age: Seconds an earlier import's folder is kept
+
+    Returns:
+        List of (file_path, label) pairs in bundle order
+    """
+    _prune_staging(staging_dir, max_age)
+
+    run_dir = os.path.join(staging_dir, time.strftime("%Y%m%d-%H%M%S"))
+    suffix = 1
+    while os.path.exists(run_dir):
+        suffix += 1
+        run_dir = os.path.join(staging_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{suffix}")
+
+    files = []
+    for path in paths:
+        name = os.path.basename(path)
+        if name.endswith(BUNDLE_SUFFIX):
+            name = name[:-len(BUNDLE_SUFFIX)]
+        bundle_dir = os.path.join(run_dir, name)
+        os.makedirs(bundle_dir, exist_ok=True)
+
+        other_keys = 0
+        try:
+            for index, envelope in enumerate(read_bundle(path), 1):
+                if user_key and envelope.get('scannerUserKey') not in ("", user_key):
+                    other_keys += 1
+                file_path = os.path.join(bundle_dir, f"{index:06d}.mail")
+                with open(file_path, 'wb') as f:
+                    f.write(envelope['incomingData'].encode('utf-8'))
+                files.append((file_path, IMPORT_LABEL))
+        except (OSError, EOFError) as e:
+            logger.error(f"Error reading bundle {path}: {e}")
+
+        if other_keys:
+            logger.warning(f"{other_keys} envelopes in {path} were exported for another API key, uploading with the current key")
+
+    logger.info(f"Staged {len(files)} mails from {len(paths)} bundles in {run_dir}")
+    return files
+
+
+def _prune_staging(staging_dir: str, max_age: float) -> None:
+    """Remove import folders last changed more than max_age seconds ago"""
+    cutoff = time.time() - max_age
+    try:
+        with os.scandir(staging_dir) as entries:
+            old = [entry.path for entry in entries if entry.is_dir() and entry.stat().st_mtime < cutoff]
+    except OSError:
+        return  # nothing staged yet
+
+    for path in old:
+        shutil.rmtree(path, ignore_errors=True)
+        logger.info(f"Removed staged import {path}")
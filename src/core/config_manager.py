@@ -3,23 +3,180 @@ Configuration manager for the application
 """
 import json
 import os
+import shutil
 import logging
+import time
+import threading
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Callable
+from watchdog.observers import Observer
+from watchdog.events import FileSystemEventHandler, FileSystemEvent
+from .rate_limit import parse_hours
 
 logger = logging.getLogger(__name__)
 
 
+class ConfigFileHandler(FileSystemEventHandler):
+    """Forward file system events that touch the configuration file"""
+
+    def __init__(self, config_file: Path, callback: Callable[[], None]):
+        """
+        Initialize config file handler
+
+        Args:
+            config_file: Configuration file to watch
+            callback: Function to call when the file may have changed
+        """
+        super().__init__()
+        self.config_file = os.path.normcase(os.path.abspath(config_file))
+        self.callback = callback
+
+    def on_any_event(self, event: FileSystemEvent) -> None:
+        """
+        Handle any event in the configuration directory
+
+        Args:
+            event: File system event
+        """
+        if event.is_directory:
+            return
+
+        paths = [event.src_path, getattr(event, 'dest_path', '')]
+        if any(p and os.path.normcase(os.path.abspath(p)) == self.config_file for p in paths):
+            self.callback()
+
+
+class ConfigSnapshot:
+    """Immutable, typed view of the configuration for lock-free reads"""
+
+    __slots__ = (
+        'mail_paths',
+        'scanner_user_key',
+        'start_with_windows',
+        'minimize_to_tray',
+        'show_notifications',
+        'auto_start_monitoring',
+        'shutdown_drain_timeout',
+        'engine_in_subprocess',
+        'archive_uploaded',
+        'local_database',
+        'webhook_url',
+        'upload_limit_mode',
+        'upload_limit_kbps',
+        'upload_limit_hours',
+    )
+
+    mail_paths: tuple[tuple[str, str], ...]  # (path, label) pairs
+    scanner_user_key: str
+    start_with_windows: bool
+    minimize_to_tray: bool
+    show_notifications: bool
+    auto_start_monitoring: bool
+    shutdown_drain_timeout: float
+    engine_in_subprocess: bool
+    archive_uploaded: bool
+    local_database: bool
+    webhook_url: str
+    upload_limit_mode: str  # off, always, game_running or hours
+    upload_limit_kbps: float
+    upload_limit_hours: str
+
+    def __init__(self, config: Dict[str, Any]):
+        """
+        Initialize snapshot
+
+        Values of the wrong type, e.g. from a hand-edited file, fall back
+        to their defaults instead of raising.
+
+        Args:
+            config: Configuration dictionary to copy values from
+        """
+        mail_paths = config.get("mail_paths")
+        init = object.__setattr__
+        init(self, 'mail_paths', tuple(
+            (self._str(entry.get("path"), ""), self._str(entry.get("label"), ""))
+            for entry in (mail_paths if isinstance(mail_paths, list) else [])
+            if isinstance(entry, dict)
+        ))
+        init(self, 'scanner_user_key', self._str(config.get("scanner_user_key"), ""))
+        init(self, 'start_with_windows', self._bool(config.get("start_with_windows"), False))
+        init(self, 'minimize_to_tray', self._bool(config.get("minimize_to_tray"), True))
+        init(self, 'show_notifications', self._bool(config.get("show_notifications"), True))
+        init(self, 'auto_start_monitoring', self._bool(config.get("auto_start_monitoring"), False))
+        init(self, 'shutdown_drain_timeout', self._float(config.get("shutdown_drain_timeout"), 15))
+        init(self, 'engine_in_subprocess', self._bool(config.get("engine_in_subprocess"), False))
+        init(self, 'archive_uploaded', self._bool(config.get("archive_uploaded"), False))
+        init(self, 'local_database', self._bool(config.get("local_database"), False))
+        init(self, 'webhook_url', self._str(config.get("webhook_url"), "").strip())
+        init(self, 'upload_limit_mode', self._str(config.get("upload_limit_mode"), "") or "off")
+        init(self, 'upload_limit_kbps', self._float(config.get("upload_limit_kbps"), 64))
+        init(self, 'upload_limit_hours', self._str(config.get("upload_limit_hours"), ""))
+
+    @staticmethod
+    def _float(value: Any, default: float) -> float:
+        """Convert a hand-editable number, falling back to the default"""
+        if isinstance(value, bool):
+            return default
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return default
+
+    @staticmethod
+    def _bool(value: Any, default: bool) -> bool:
+        """Accept a hand-edited true/false or 0/1, falling back to the default"""
+        if isinstance(value, (bool, int)):
+            return bool(value)
+        return default
+
+    @staticmethod
+    def _str(value: Any, default: str) -> str:
+        """Accept a hand-edited string or number, falling back to the default"""
+        if isinstance(value, str):
+            return value
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return str(value)
+        return default
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the snapshot back to a configuration dictionary
+
+        Returns:
+            Dictionary accepted by ConfigSnapshot()
+        """
+        config = {name: getattr(self, name) for name in self.__slots__}
+        config['mail_paths'] = [{"path": path, "label": label} for path, label in self.mail_paths]
+        return config
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("ConfigSnapshot is immutable")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError("ConfigSnapshot is immutable")
+
+
 class ConfigManager:
     """Manage application configuration"""
 
+    RELOAD_DELAY = 0.5  # seconds to let editors finish writing
+    PATH_CACHE_TTL = 30  # seconds a mail path check is reused
+
     DEFAULT_CONFIG = {
         "mail_paths": [],  # List of {"path": str, "label": str}
         "scanner_user_key": "",
         "start_with_windows": False,
         "minimize_to_tray": True,
         "show_notifications": True,
-        "auto_start_monitoring": False
+        "auto_start_monitoring": False,
+        "shutdown_drain_timeout": 15,  # seconds to finish uploads on exit
+        "engine_in_subprocess": False,  # run watchers and uploads in a child process
+        "archive_uploaded": False,  # move uploaded mail into per-character zip archives
+        "local_database": False,  # also store every mail in mail.db
+        "webhook_url": "",  # also POST every mail as JSON to this URL
+        "upload_limit_mode": "off",  # when the upload cap applies: off, always, game_running, hours
+        "upload_limit_kbps": 64,  # upload cap in KB/s, 0 holds uploads while it applies
+        "upload_limit_hours": "18-23"  # local hours the cap applies in the hours mode
     }
 
     def __init__(self, config_file: str = "config.json"):
@@ -31,61 +188,194 @@ class ConfigManager:
         """
         self.config_file = Path(config_file)
         self.config: Dict[str, Any] = {}
+        self.snapshot = ConfigSnapshot(self.DEFAULT_CONFIG)
+        self._lock = threading.RLock()
+        self.observer: Optional[Observer] = None
+        self._on_external_change: Optional[Callable[[], None]] = None
+        self._reload_timer: Optional[threading.Timer] = None
+        self._file_signature = None
+        self._path_cache: Dict[str, tuple[bool, float]] = {}  # path -> (exists, checked at)
         self.load()
 
     def load(self) -> bool:
         """
         Load configuration from file
 
+        If the file cannot be parsed, the last good configuration is kept
+        (or the defaults on first load).
+
         Returns:
             True if successful, False otherwise
         """
-        try:
-            if self.config_file.exists():
-                with open(self.config_file, 'r') as f:
-                    loaded_config = json.load(f)
+        with self._lock:
+            try:
+                if self.config_file.exists():
+                    with open(self.config_file, 'r') as f:
+                        loaded_config = json.load(f)
+
+                    if not isinstance(loaded_config, dict):
+                        raise ValueError("the file does not hold a JSON object")
+
+                    # Merge with defaults to ensure all keys exist
+                    config = {**self.DEFAULT_CONFIG, **loaded_config}
+
+                    # Migrate old mail_path to new mail_paths format
+                    self._migrate_mail_path(config)
+
+                    # Build the snapshot first, so a failure keeps the dict and snapshot in step
+                    snapshot = ConfigSnapshot(config)
+                    self.config = config
+                    self.snapshot = snapshot
+                    self._file_signature = self._read_signature()
+
+                    logger.info(f"Configuration loaded from {self.config_file}")
+                    return True
+                else:
+                    logger.info("No config file found, using defaults")
+                    self._reset_if_empty()
+                    return False
+
+            except json.JSONDecodeError as e:
+                logger.error(f"Invalid JSON in config file: {e}")
+                self._reset_if_empty()
+                return False
+
+            except Exception as e:
+                logger.error(f"Error loading config: {e}")
+                self._reset_if_empty()
+                return False
 
-                # Merge with defaults to ensure all keys exist
-                self.config = {**self.DEFAULT_CONFIG, **loaded_config}
+    def save(self) -> bool:
+        """
+        Save current configuration to file
 
-                # Migrate old mail_path to new mail_paths format
-                self._migrate_mail_path()
+        The file is written to a temporary file in the same directory,
+        flushed to disk and renamed over the old one, so a crash leaves
+        either the old or the new configuration intact. The old file's
+        permissions are kept.
 
-                logger.info(f"Configuration loaded from {self.config_file}")
+        Returns:
+            True if successful, False otherwise
+        """
+        with self._lock:
+            tmp_path = None
+            try:
+                tmp_path = self.config_file.with_name(self.config_file.name + '.tmp')
+                with open(tmp_path, 'w') as f:
+                    json.dump(self.config, f, indent=4)
+                    f.flush()
+                    os.fsync(f.fileno())
+
+                if self.config_file.exists():
+                    shutil.copymode(self.config_file, tmp_path)
+                os.replace(tmp_path, self.config_file)
+                tmp_path = None
+
+                # Remember what we wrote so the file watch ignores our own save
+                self._file_signature = self._read_signature()
+
+                # Saved settings may point at folders created since the last check
+                self._path_cache.clear()
+
+                logger.info(f"Configuration saved to {self.config_file}")
                 return True
-            else:
-                logger.info("No config file found, using defaults")
-                self.config = self.DEFAULT_CONFIG.copy()
+
+            except Exception as e:
+                logger.error(f"Error saving config: {e}")
                 return False
 
-        except json.JSONDecodeError as e:
-            logger.error(f"Invalid JSON in config file: {e}")
-            self.config = self.DEFAULT_CONFIG.copy()
-            return False
+            finally:
+                if tmp_path:
+                    try:
+                        os.remove(tmp_path)
+                    except OSError:
+                        pass
 
-        except Exception as e:
-            logger.error(f"Error loading config: {e}")
+    def _reset_if_empty(self) -> None:
+        """Fall back to defaults unless a configuration is already loaded"""
+        if not self.config:
             self.config = self.DEFAULT_CONFIG.copy()
-            return False
+            self._update_snapshot()
 
-    def save(self) -> bool:
+    def _update_snapshot(self) -> None:
+        """Publish a new immutable snapshot of the current configuration"""
+        self.snapshot = ConfigSnapshot(self.config)
+
+    def start_watching(self, on_change: Callable[[], None]) -> bool:
         """
-        Save current configuration to file
+        Reload the configuration when the file is edited externally
+
+        Args:
+            on_change: Called from a background thread after a reload
 
         Returns:
-            True if successful, False otherwise
+            True if watching started, False otherwise
         """
-        try:
-            with open(self.config_file, 'w') as f:
-                json.dump(self.config, f, indent=4)
+        if self.observer is not None:
+            return True
 
-            logger.info(f"Configuration saved to {self.config_file}")
+        try:
+            self._on_external_change = on_change
+            watch_dir = self.config_file.resolve().parent
+
+            self.observer = Observer()
+            self.observer.schedule(
+                ConfigFileHandler(self.config_file, self._schedule_reload),
+                str(watch_dir),
+                recursive=False
+            )
+            self.observer.daemon = True
+            self.observer.start()
+
+            logger.info(f"Watching {self.config_file} for external changes")
             return True
 
         except Exception as e:
-            logger.error(f"Error saving config: {e}")
+            logger.error(f"Failed to watch config file: {e}")
+            self.observer = None
             return False
 
+    def stop_watching(self) -> None:
+        """Stop watching the configuration file"""
+        if self._reload_timer:
+            self._reload_timer.cancel()
+            self._reload_timer = None
+
+        if self.observer:
+            try:
+                self.observer.stop()
+                self.observer.join(timeout=5)
+            except Exception as e:
+                logger.error(f"Error stopping config watcher: {e}")
+            self.observer = None
+
+    def _schedule_reload(self) -> None:
+        """Debounce bursts of events into a single reload"""
+        if self._reload_timer:
+            self._reload_timer.cancel()
+
+        self._reload_timer = threading.Timer(self.RELOAD_DELAY, self._reload_if_changed)
+        self._reload_timer.daemon = True
+        self._reload_timer.start()
+
+    def _reload_if_changed(self) -> None:
+        """Reload the file if it differs from what was last loaded or saved"""
+        signature = self._read_signature()
+        if signature is None or signature == self._file_signature:
+            return
+
+        logger.info("Configuration file changed externally, reloading")
+        if self.load() and self._on_external_change:
+            self._on_external_change()
+
+    def _read_signature(self) -> Optional[tuple]:
+        """Get (mtime, size) of the configuration file, None if missing"""
+        try:
+            stat = os.stat(self.config_file)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
     def get(self, key: str, default: Any = None) -> Any:
         """
         Get configuration value
@@ -97,7 +387,8 @@ class ConfigManager:
         Returns:
             Configuration value or default
         """
-        return self.config.get(key, default)
+        with self._lock:
+            return self.config.get(key, default)
 
     def set(self, key: str, value: Any) -> None:
         """
@@ -107,7 +398,20 @@ class ConfigManager:
             key: Configuration key
             value: Value to set
         """
-        self.config[key] = value
+        with self._lock:
+            self.config[key] = value
+            self._update_snapshot()
+
+    def update(self, values: Dict[str, Any]) -> None:
+        """
+        Set several configuration values, publishing one snapshot
+
+        Args:
+            values: Dictionary of configuration keys to values
+        """
+        with self._lock:
+            self.config.update(values)
+            self._update_snapshot()
 
     def get_all(self) -> Dict[str, Any]:
         """
@@ -116,38 +420,88 @@ class ConfigManager:
         Returns:
             Dictionary of all configuration
         """
-        return self.config.copy()
+        with self._lock:
+            return self.config.copy()
 
-    def validate(self) -> tuple[bool, list[str]]:
+    def path_exists(self, path: str) -> bool:
+        """
+        Check whether a mail path exists, reusing checks from the last PATH_CACHE_TTL seconds
+
+        A path on a disconnected network drive can take seconds to check,
+        and validation runs on every start and reconfigure.
+
+        Args:
+            path: Directory to check
+
+        Returns:
+            True if the path exists
+        """
+        now = time.monotonic()
+        with self._lock:
+            cached = self._path_cache.get(path)
+        if cached is not None and now - cached[1] < self.PATH_CACHE_TTL:
+            return cached[0]
+
+        exists = os.path.exists(path)
+
+        with self._lock:
+            now = time.monotonic()
+            self._path_cache = {
+                p: entry for p, entry in self._path_cache.items()
+                if now - entry[1] < self.PATH_CACHE_TTL
+            }
+            self._path_cache[path] = (exists, now)
+        return exists
+
+    def validate(self, on_progress: Optional[Callable[[int, int, str], None]] = None) -> tuple[bool, list[str]]:
         """
         Validate current configuration
 
+        Args:
+            on_progress: Optional callback with (index, total, path) before each mail path is checked
+
         Returns:
             Tuple of (is_valid: bool, errors: list[str])
         """
         errors = []
 
-        # Check mail paths - at least one valid path required
-        mail_paths = self.get("mail_paths", [])
+        # Check mail paths - at least one valid path required; the snapshot
+        # holds the paths as the engine will use them
+        snapshot = self.snapshot
+        mail_paths = snapshot.mail_paths
         if not mail_paths:
             errors.append("At least one mail directory is required")
         else:
             valid_paths = 0
-            for i, mail_entry in enumerate(mail_paths):
-                if isinstance(mail_entry, dict):
-                    path = mail_entry.get("path", "")
-                    if path and os.path.exists(path):
-                        valid_paths += 1
-                    elif path:
-                        errors.append(f"Mail path {i+1} does not exist: {path}")
+            for i, (path, _) in enumerate(mail_paths):
+                if path and on_progress:
+                    on_progress(i + 1, len(mail_paths), path)
+                if path and self.path_exists(path):
+                    valid_paths += 1
+                elif path:
+                    errors.append(f"Mail path {i+1} does not exist: {path}")
 
             if valid_paths == 0:
                 errors.append("At least one valid mail directory is required")
 
         # Check API key
-        if not self.get("scanner_user_key"):
+        if not snapshot.scanner_user_key:
             errors.append("API Key is required")
 
+        # Check the upload cap
+        try:
+            if float(self.get("upload_limit_kbps") or 0) < 0:
+                errors.append("Upload limit cannot be negative")
+        except (TypeError, ValueError):
+            errors.append("Upload limit must be a number of KB/s")
+        if self.get("upload_limit_mode") == "hours" and parse_hours(str(self.get("upload_limit_hours") or "")) is None:
+            errors.append("Upload limit hours must look like 18-23")
+
+        # Check the optional webhook
+        webhook_url = str(self.get("webhook_url") or "").strip()
+        if webhook_url and not webhook_url.lower().startswith(("http://", "https://")):
+            errors.append(f"Webhook URL must start with http:// or https://: {webhook_url}")
+
         is_valid = len(errors) == 0
         return is_valid, errors
 
@@ -183,16 +537,19 @@ class ConfigManager:
 
         return False
 
-    def _migrate_mail_path(self) -> None:
+    def _migrate_mail_path(self, config: Dict[str, Any]) -> None:
         """
         Migrate old mail_path (string) to new mail_paths (list) format
+
+        Args:
+            config: Configuration dictionary to migrate in place
         """
         # Check if old mail_path exists and mail_paths is empty
-        if "mail_path" in self.config and not self.config.get("mail_paths"):
-            old_path = self.config.get("mail_path", "")
+        if "mail_path" in config and not config.get("mail_paths"):
+            old_path = config.get("mail_path", "")
             if old_path:
-                self.config["mail_paths"] = [{"path": old_path, "label": ""}]
+                config["mail_paths"] = [{"path": old_path, "label": ""}]
                 logger.info(f"Migrated old mail_path to mail_paths format")
 
             # Remove old mail_path key
-            del self.config["mail_path"]
+            del config["mail_path"]
@@ -0,0 +1,107 @@
+"""
+Background connectivity probing and online/offline tracking
+"""
+import logging
+import threading
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectivityMonitor:
+    """Probe the API in the background and track whether it is reachable"""
+
+    # Probes reuse the pooled session, so while online they double as
+    # keep-alives for the upload connection
+    PROBE_INTERVAL = 20  # seconds between probes while online
+    OFFLINE_PROBE_INTERVAL = 5  # seconds between probes while offline
+    FAILURE_THRESHOLD = 3  # consecutive failures before going offline
+
+    def __init__(self, api_client, on_state_change: Callable[[bool], None]):
+        """
+        Initialize connectivity monitor
+
+        Args:
+            api_client: SWGTrackerAPI whose pooled session is used for probes
+            on_state_change: Called with the new online state (from a background thread)
+        """
+        self.api_client = api_client
+        self.on_state_change = on_state_change
+        self.is_online = True
+        self.consecutive_failures = 0
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start probing in the background"""
+        if self._thread is not None:
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._probe_loop,
+            name="ConnectivityProbe",
+            daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop probing"""
+        self._stop_event.set()
+        self._wake_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.api_client.PROBE_TIMEOUT + 1)
+            self._thread = None
+
+    def report_success(self) -> None:
+        """Record a successful request made outside the prober"""
+        self._update(True)
+
+    def report_failure(self) -> None:
+        """Record a network failure made outside the prober"""
+        self._update(False)
+
+    def _update(self, reachable: bool) -> None:
+        """Apply a probe or request outcome and notify on state changes"""
+        with self._lock:
+            if reachable:
+                self.consecutive_failures = 0
+                changed = not self.is_online
+                self.is_online = True
+            else:
+                self.consecutive_failures += 1
+                changed = self.is_online and self.consecutive_failures >= self.FAILURE_THRESHOLD
+                if changed:
+                    self.is_online = False
+
+        if changed:
+            if reachable:
+                logger.info("Connectivity restored")
+            else:
+                logger.warning(f"Offline after {self.consecutive_failures} consecutive failures")
+                # Start probing at the offline rate right away
+                self._wake_event.set()
+
+            try:
+                self.on_state_change(reachable)
+            except Exception as e:
+                logger.error(f"Error in connectivity callback: {e}", exc_info=True)
+
+    def _probe_loop(self) -> None:
+        """Probe periodically, faster while offline"""
+        while not self._stop_event.is_set():
+            interval = self.PROBE_INTERVAL if self.is_online else self.OFFLINE_PROBE_INTERVAL
+            self._wake_event.wait(interval)
+            self._wake_event.clear()
+
+            if self._stop_event.is_set():
+                break
+
+            # While online a cheap probe keeps the pooled connection alive,
+            # so it never goes idle; after an outage resolve and connect anew
+            if self.is_online:
+                self._update(self.api_client.probe())
+            else:
+                self._update(self.api_client.warm_up())
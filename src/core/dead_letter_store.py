@@ -0,0 +1,161 @@
+"""
+Dead-letter store for mail that failed for non-transient reasons
+"""
+import time
+import sqlite3
+import logging
+import threading
+from typing import Optional, Dict, Any, List
+
+logger = logging.getLogger(__name__)
+
+
+class DeadLetterStore:
+    """Keep permanently failing uploads with their failure details for inspection and retry"""
+
+    COLUMNS = (
+        "file_path", "label", "sha256", "failed_at", "attempts",
+        "reason", "status_code", "response"
+    )
+
+    def __init__(self, db_file: str = "dead_letters.db"):
+        """
+        Initialize dead-letter store
+
+        Args:
+            db_file: Path to the SQLite database file
+        """
+        self.db_file = db_file
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the database on first use (caller holds the lock)"""
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_file, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS dead_letters (
+                    id INTEGER PRIMARY KEY,
+                    file_path TEXT NOT NULL,
+                    label TEXT,
+                    sha256 TEXT,
+                    failed_at REAL,
+                    attempts INTEGER,
+                    reason TEXT,
+                    status_code INTEGER,
+                    response TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_dead_letters_failed ON dead_letters(failed_at);
+            """)
+        return self._conn
+
+    def add(
+        self,
+        file_path: str,
+        label: str = "",
+        sha256: str = "",
+        attempts: int = 1,
+        reason: str = "",
+        status_code: Optional[int] = None,
+        response: str = ""
+    ) -> bool:
+        """
+        Store a failed upload
+
+        Args:
+            file_path: Path of the mail file
+            label: Mail path label (character name)
+            sha256: Hex digest of the file content
+            attempts: Number of upload attempts made
+            reason: Why the upload was given up
+            status_code: HTTP status code, if a response was received
+            response: Response body returned by the server
+
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            with self._lock:
+                conn = self._connection()
+                with conn:
+                    conn.execute(
+                        f"INSERT INTO dead_letters ({', '.join(self.COLUMNS)}) "
+                        f"VALUES ({', '.join('?' * len(self.COLUMNS))})",
+                        (file_path, label, sha256, time.time(), attempts,
+                         reason, status_code, response)
+                    )
+            logger.warning(f"Dead-lettered {file_path}: {reason}")
+            return True
+
+        except Exception as e:
+            logger.error(f"Error storing dead letter: {e}")
+            return False
+
+    def entries(self, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+        """
+        Get stored failures, newest first
+
+        Args:
+            limit: Page size
+            offset: Number of rows to skip
+
+        Returns:
+            List of row dictionaries
+        """
+        try:
+            with self._lock:
+                rows = self._connection().execute(
+                    f"SELECT id, {', '.join(self.COLUMNS)} FROM dead_letters "
+                    f"ORDER BY id DESC LIMIT ? OFFSET ?",
+                    (limit, offset)
+                ).fetchall()
+            return [dict(row) for row in rows]
+
+        except Exception as e:
+            logger.error(f"Error reading dead letters: {e}")
+            return []
+
+    def count(self) -> int:
+        """Get the number of stored failures"""
+        try:
+            with self._lock:
+                return self._connection().execute("SELECT COUNT(*) FROM dead_letters").fetchone()[0]
+        except Exception as e:
+            logger.error(f"Error counting dead letters: {e}")
+            return 0
+
+    def take_all(self) -> List[Dict[str, Any]]:
+        """
+        Remove and return every stored failure, oldest first
+
+        Returns:
+            List of row dictionaries
+        """
+        try:
+            with self._lock:
+                conn = self._connection()
+                with conn:
+                    # Take the write lock before reading, so a failure added by
+                    # the other process in between is not deleted unseen
+                    conn.execute("BEGIN IMMEDIATE")
+                    rows = conn.execute(
+                        f"SELECT id, {', '.join(self.COLUMNS)} FROM dead_letters ORDER BY id"
+                    ).fetchall()
+                    conn.execute("DELETE FROM dead_letters")
+            return [dict(row) for row in rows]
+
+        except Exception as e:
+            logger.error(f"Error taking dead letters: {e}")
+            return []
+
+    def clear(self) -> None:
+        """Discard every stored failure"""
+        self.take_all()
+
+    def close(self) -> None:
+        """Close the database"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
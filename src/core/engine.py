@@ -0,0 +1,1289 @@
+"""
+Mail watching and upload pipeline, independent of the GUI
+"""
+import os
+import time
+import hashlib
+import logging
+import threading
+from collections import deque
+from typing import Callable, Dict, List, Optional, Iterator, Any
+from .config_manager import ConfigSnapshot
+from .file_watcher import MailFileWatcher
+from .api_client import SWGTrackerAPI
+from .history_store import HistoryStore, parse_mail_headers
+from .stats_store import StatsStore
+from .upload_queue import UploadQueue, UploadJob, PendingStore, character_for
+from .connectivity import ConnectivityMonitor
+from .dead_letter_store import DeadLetterStore
+from .mail_archive import MailArchive
+from .replay import ReplayRequest, ReplayRunner, select_files
+from .bundles import BundleWriter, stage_bundles
+from .sinks import SinkFanout, MailRecord, LocalDatabaseSink, WebhookSink
+from .rate_limit import ByteRateLimiter, UploadSchedule
+from .reconcile import DirectorySnapshot
+from .identity_index import IdentityIndex, file_identity, identity_of
+from .profiler import Profiler, profiling_requested
+
+logger = logging.getLogger(__name__)
+
+
+class EngineResult:
+    """Final outcome of one mail file"""
+
+    __slots__ = ('file_path', 'label', 'status', 'message', 'size', 'sha256', 'latency', 'finished_at')
+
+    def __init__(
+        self,
+        file_path: str,
+        label: str,
+        status: str,
+        message: str,
+        size: int = 0,
+        sha256: str = "",
+        latency: Optional[float] = None
+    ):
+        """
+        Initialize result
+
+        Args:
+            file_path: Path to the mail file
+            label: Label of the mail path the file was found in
+            status: 'uploaded', 'skipped', 'failed' (dead-lettered) or 'error'
+            message: Server message or error description
+            size: File size in bytes
+            sha256: Hex digest of the file content
+            latency: Upload request time in seconds, None if not sent
+        """
+        self.file_path = file_path
+        self.label = label
+        self.status = status
+        self.message = message
+        self.size = size
+        self.sha256 = sha256
+        self.latency = latency
+        self.finished_at = time.time()
+
+    @property
+    def success(self) -> bool:
+        """Whether the file was uploaded"""
+        return self.status == "uploaded"
+
+    def __repr__(self) -> str:
+        return f"EngineResult({self.status!r}, {self.file_path!r}, {self.message!r})"
+
+
+class MailEngine:
+    """
+    Watch mail directories and upload new mail
+
+    Usable without the GUI; each instance has its own pooled API client,
+    upload workers and stores, and every public method is thread-safe.
+
+    Example:
+        engine = MailEngine(ConfigManager().snapshot, data_dir="engine-data")
+        engine.open()
+        engine.start()
+        engine.submit_file("mail/123.mail", "Bob")
+        for result in engine.results(timeout=30):
+            print(result.status, result.file_path)
+        engine.shutdown(timeout=15)
+
+    Progress is reported through on_event(kind, *args) from background
+    threads. Events:
+        ('log', message, level)
+        ('stat', stat_type)  # files_processed, files_uploaded or errors
+        ('result', EngineResult)
+        ('connectivity', online, parked)
+        ('queue', pending)  # queued and in-flight uploads after each change
+        ('starting', done, total, display_name)  # per watcher while start() runs
+        ('replay', done, total, running)
+        ('rate', bytes_per_second, limit, reason)  # limit None when uncapped
+        ('monitoring', is_monitoring)
+        ('profiling', is_profiling, report_dir)
+    """
+
+    MAX_UPLOAD_ATTEMPTS = 3  # for transient server errors before dead-lettering
+    RETRY_DELAY = 5  # seconds before retrying a transient server error, doubled per attempt
+    NETWORK_RETRY_DELAY = 2  # seconds before retrying after a network error, until the prober takes over
+    SETTLE_DELAY = 0.1  # seconds to let the game finish writing a new file
+    STATS_SAVE_INTERVAL = 60  # seconds
+    RESULTS_BUFFER = 1000  # unread results kept for results(), oldest dropped first
+    SINK_DRAIN_TIMEOUT = 5  # seconds the additional sinks get to finish on shutdown
+    RATE_INTERVAL = 5  # seconds between bandwidth schedule checks and rate reports
+    HEALTH_INTERVAL = 30  # seconds between watcher health checks and reconciliation passes
+    RECOVERY_INTERVAL = 5  # seconds until the next pass after missed files were found
+    DETECTED_TTL = 600  # seconds a detection is remembered for reconciliation
+    PROFILED_HANDLERS = ('on_created', 'on_moved')  # watcher callbacks timed while profiling
+
+    def __init__(
+        self,
+        config: ConfigSnapshot,
+        on_event: Optional[Callable[..., None]] = None,
+        data_dir: str = ".",
+        api_url: Optional[str] = None
+    ):
+        """
+        Initialize engine
+
+        Args:
+            config: Configuration snapshot to run with
+            on_event: Optional callback receiving (kind, *args) events
+            data_dir: Directory for history, statistics, pending and
+                dead-letter files; give each instance its own
+            api_url: Endpoint to upload to instead of swgtracker.com
+        """
+        self.config = config
+        self.on_event = on_event
+        self.data_dir = data_dir
+        self.api_url = api_url
+        self.file_watchers: Dict[str, MailFileWatcher] = {}  # Keyed by normalized path
+        self.watch_labels: Dict[str, str] = {}
+        self.is_monitoring = False
+        self.is_shutting_down = False
+        self.api_client = None
+        self.connectivity = None
+        os.makedirs(data_dir, exist_ok=True)
+        self.history_store = HistoryStore(os.path.join(data_dir, "history.db"))
+        self.stats_store = StatsStore(os.path.join(data_dir, "stats.json"))
+        self.dead_letter_store = DeadLetterStore(os.path.join(data_dir, "dead_letters.db"))
+        self.upload_queue = UploadQueue(
+            self._process_mail_file,
+            on_change=lambda pending: self._emit('queue', pending)
+        )
+        self.pending_store = PendingStore(os.path.join(data_dir, "pending_uploads.json"))
+        self._resumed: Optional[List[UploadJob]] = None  # loaded by open(), submitted by start()
+        self.mail_archive = MailArchive(os.path.join(data_dir, "archive"))
+        self.sinks = SinkFanout()
+        self.identity_index = IdentityIndex(os.path.join(data_dir, "identities.db"))
+        self.rate_limiter = ByteRateLimiter()
+        self.schedule = self._build_schedule(config)
+        self._rate_thread: Optional[threading.Thread] = None
+        self._schedule_changed = threading.Event()
+        self._snapshots: Dict[str, DirectorySnapshot] = {}  # watch key -> contents at the last pass
+        self._watch_health: Dict[str, Dict[str, int]] = {}  # watch key -> restarts, recovered
+        self._detected: Dict[str, float] = {}  # normalized path -> monotonic time reported by a watcher
+        self._recovered: Dict[str, float] = {}  # normalized path -> monotonic time queued by reconciliation
+        self._moved_away: Dict[str, float] = {}  # normalized path -> monotonic time it was renamed
+        self._seen_lock = threading.Lock()  # guards _detected, _recovered and _moved_away, never held for I/O
+        self._lost_watchers: Dict[str, tuple[str, str]] = {}  # watch key -> (path, label) of dead watchers
+        self._health_thread: Optional[threading.Thread] = None
+        self.replay = ReplayRunner(
+            self._submit_replay_job,
+            os.path.join(data_dir, "replay.json"),
+            on_progress=lambda done, total, running: self._emit('replay', done, total, running)
+        )
+        self._lock = threading.RLock()
+        self._stop_event = threading.Event()
+        self._stats_thread: Optional[threading.Thread] = None
+        self._results: deque = deque(maxlen=self.RESULTS_BUFFER)
+        self._results_cond = threading.Condition()
+        self.profiler: Optional[Profiler] = None
+
+    def open(self) -> None:
+        """Start the stores and upload workers"""
+        with self._lock:
+            if self._stats_thread is not None:
+                return
+
+            self.history_store.start()
+            self.upload_queue.start()
+
+            # Keep the last run's deferred uploads until monitoring starts
+            self._resumed = self.pending_store.load()
+            self.mail_archive.start()
+            self._configure_sinks()
+
+            self._stats_thread = threading.Thread(
+                target=self._stats_loop,
+                name="StatsSaver",
+                daemon=True
+            )
+            self._stats_thread.start()
+
+            self._rate_thread = threading.Thread(
+                target=self._rate_loop,
+                name="UploadSchedule",
+                daemon=True
+            )
+            self._rate_thread.start()
+
+            self._health_thread = threading.Thread(
+                target=self._health_loop,
+                name="WatcherHealth",
+                daemon=True
+            )
+            self._health_thread.start()
+
+        # SWG_TRACKER_PROFILE=1 profiles from launch
+        if profiling_requested():
+            self.start_profiling()
+
+        # Continue a replay interrupted by the last exit
+        self.replay.resume()
+
+    def _emit(self, kind: str, *args) -> None:
+        """Send an event to the listener"""
+        if self.on_event is None:
+            return
+
+        try:
+            self.on_event(kind, *args)
+        except Exception as e:
+            logger.error(f"Error in engine event callback: {e}", exc_info=True)
+
+    def start(self) -> tuple[bool, str]:
+        """
+        Start file monitoring
+
+        Returns:
+            Tuple of (success: bool, message: str)
+        """
+        with self._lock:
+            if self.is_monitoring:
+                return False, "Monitoring is already active"
+            if self.is_shutting_down:
+                return False, "Shutting down"
+
+            try:
+                user_key = self.config.scanner_user_key
+                if not user_key:
+                    return False, "API Key is required"
+
+                # Create the pooled API client once and keep probing it
+                self._ensure_client()
+                self.api_client.user_key = user_key
+
+                # Pay DNS, connect and TLS now rather than on the first mail
+                threading.Thread(
+                    target=self.api_client.warm_up,
+                    name="ConnectionWarmUp",
+                    daemon=True
+                ).start()
+
+                # Create file watchers for each valid path
+                started_paths = []
+                failed_paths = []
+
+                watch_paths = self._configured_watch_paths()
+                for done, (key, (path, label)) in enumerate(watch_paths.items(), 1):
+                    success, display_name = self._start_watcher(key, path, label)
+                    self._emit('starting', done, len(watch_paths), display_name)
+                    if success:
+                        started_paths.append(display_name)
+                    else:
+                        failed_paths.append(display_name)
+
+                # Check if at least one watcher started
+                if not self.file_watchers:
+                    return False, "Failed to start monitoring any directories"
+
+                self.is_monitoring = True
+
+                # Resume uploads left over from the last shutdown, once;
+                # shutdown() persists them again if they do not finish
+                pending, self._resumed = self._resumed or [], []
+                for job in pending:
+                    self.upload_queue.submit(job)
+                if pending:
+                    self.pending_store.save([])
+                    logger.info(f"Resumed {len(pending)} pending uploads")
+
+                self._emit('monitoring', True)
+
+                # Build success message
+                message = f"Monitoring {len(started_paths)} director{'y' if len(started_paths) == 1 else 'ies'}"
+                if failed_paths:
+                    message += f" ({len(failed_paths)} failed)"
+
+                return True, message
+
+            except Exception as e:
+                error_msg = f"Failed to start monitoring: {str(e)}"
+                logger.error(error_msg, exc_info=True)
+                return False, error_msg
+
+    def stop(self) -> tuple[bool, str]:
+        """
+        Stop file monitoring
+
+        Queued uploads keep running; only new detections stop.
+
+        Returns:
+            Tuple of (success: bool, message: str)
+        """
+        with self._lock:
+            try:
+                if not self.is_monitoring:
+                    return False, "Monitoring is not active"
+
+                # Stop all watchers
+                stopped_count = 0
+                for key in list(self.file_watchers):
+                    if self._stop_watcher(key):
+                        stopped_count += 1
+
+                self.is_monitoring = False
+                self._lost_watchers.clear()
+                self._snapshots.clear()
+                self._watch_health.clear()
+                self._emit('monitoring', False)
+
+                logger.info("Monitoring stopped")
+
+                message = f"Stopped monitoring {stopped_count} director{'y' if stopped_count == 1 else 'ies'}"
+                return True, message
+
+            except Exception as e:
+                error_msg = f"Failed to stop monitoring: {str(e)}"
+                logger.error(error_msg, exc_info=True)
+                return False, error_msg
+
+    def reconfigure(self, config: ConfigSnapshot) -> tuple[bool, str]:
+        """
+        Apply a new configuration to running watchers
+
+        Only watchers for added or removed paths are started or stopped;
+        untouched paths keep their observer and never stop watching. Label
+        and API key changes are applied in place.
+
+        Args:
+            config: New configuration snapshot
+
+        Returns:
+            Tuple of (success: bool, message: str)
+        """
+        with self._lock:
+            self.config = config
+            self._configure_sinks()
+            self.schedule = self._build_schedule(config)
+            self._schedule_changed.set()
+
+            # Switch keys on the existing client to keep its pooled connections
+            if self.api_client and config.scanner_user_key != self.api_client.user_key:
+                self.api_client.user_key = config.scanner_user_key
+                logger.info("API key changed")
+
+            if not self.is_monitoring:
+                return True, "Settings will apply when monitoring starts"
+
+            try:
+                desired = self._configured_watch_paths()
+                removed = [key for key in self.file_watchers if key not in desired]
+                added = [key for key in desired if key not in self.file_watchers]
+
+                for key in removed:
+                    self._stop_watcher(key)
+
+                failed = 0
+                for key in added:
+                    self._lost_watchers.pop(key, None)
+                    path, label = desired[key]
+                    success, _ = self._start_watcher(key, path, label)
+                    if not success:
+                        failed += 1
+
+                # Labels are looked up per file, so a rename needs no restart
+                for key, (path, label) in desired.items():
+                    if key in self.file_watchers:
+                        self.watch_labels[key] = label
+
+                message = (
+                    f"Monitoring {len(self.file_watchers)} director{'y' if len(self.file_watchers) == 1 else 'ies'}"
+                    f" ({len(added) - failed} added, {len(removed)} removed"
+                )
+                message += f", {failed} failed)" if failed else ")"
+                logger.info(f"Reconfigured: {message}")
+                return failed == 0, message
+
+            except Exception as e:
+                error_msg = f"Failed to apply settings: {str(e)}"
+                logger.error(error_msg, exc_info=True)
+                return False, error_msg
+
+    def _configure_sinks(self) -> None:
+        """Add or remove the local database and webhook sinks to match the configuration"""
+        if self.config.local_database:
+            if self.sinks.get(LocalDatabaseSink.name) is None:
+                self.sinks.add(LocalDatabaseSink(os.path.join(self.data_dir, "mail.db")))
+        else:
+            self.sinks.remove(LocalDatabaseSink.name)
+
+        webhook = self.sinks.get(WebhookSink.name)
+        if self.config.webhook_url:
+            if webhook is None or webhook.url != self.config.webhook_url:
+                self.sinks.add(WebhookSink(self.config.webhook_url))
+        else:
+            self.sinks.remove(WebhookSink.name)
+
+    @staticmethod
+    def _build_schedule(config: ConfigSnapshot) -> UploadSchedule:
+        """Create the bandwidth schedule for a configuration"""
+        return UploadSchedule(config.upload_limit_mode, config.upload_limit_kbps, config.upload_limit_hours)
+
+    def _apply_schedule(self) -> None:
+        """Set the limiter to the cap the schedule wants now and report the rate"""
+        limit, reason = self.schedule.limit()
+        if limit != self.rate_limiter.rate:
+            self.rate_limiter.set_rate(limit)
+            if limit is None:
+                logger.info(f"Upload cap lifted ({reason})" if reason else "Upload cap lifted")
+            elif limit == 0:
+                logger.info(f"Uploads held ({reason})")
+            else:
+                logger.info(f"Uploads capped at {limit / 1024:g} KB/s ({reason})")
+
+        self._emit('rate', self.rate_limiter.effective_rate(), limit, reason)
+
+    def _rate_loop(self) -> None:
+        """Apply the bandwidth schedule now, then periodically and after reconfigure()"""
+        while not self._stop_event.is_set():
+            try:
+                self._apply_schedule()
+            except Exception as e:
+                logger.error(f"Error applying upload schedule: {e}", exc_info=True)
+
+            # Game detection can take a moment, so it never runs on the caller's thread
+            self._schedule_changed.wait(self.RATE_INTERVAL)
+            self._schedule_changed.clear()
+
+    def _configured_watch_paths(self) -> Dict[str, tuple[str, str]]:
+        """
+        Get the configured mail paths that exist on disk
+
+        Returns:
+            Dictionary of watch key to (path, label)
+        """
+        paths = {}
+        for path, label in self.config.mail_paths:
+            if not path or not os.path.exists(path):
+                continue
+
+            paths.setdefault(self._watch_key(path), (path, label))
+        return paths
+
+    @staticmethod
+    def _watch_key(path: str) -> str:
+        """Normalize a path so the same directory always maps to one watcher"""
+        return os.path.normcase(os.path.abspath(path))
+
+    def _start_watcher(self, key: str, path: str, label: str) -> tuple[bool, str]:
+        """
+        Create and start a watcher for one mail path
+
+        Returns:
+            Tuple of (success: bool, display_name: str)
+        """
+        display_name = f"{label} ({path})" if label else path
+
+        watcher = MailFileWatcher(
+            watch_path=path,
+            callback=lambda file_path, key=key, label=label: self.on_new_mail_file(
+                file_path, self.watch_labels.get(key, label)
+            ),
+            on_moved=lambda src_path, dest_path, key=key, label=label: self.on_moved_mail_file(
+                src_path, dest_path, self.watch_labels.get(key, label)
+            )
+        )
+
+        success, msg = watcher.start()
+
+        if success:
+            self.file_watchers[key] = watcher
+            self.watch_labels[key] = label
+            self._watch_health.setdefault(key, {'restarts': 0, 'recovered': 0})
+
+            # A restarted watcher keeps its snapshot, so the next pass finds
+            # whatever arrived while it was down
+            if key not in self._snapshots:
+                snapshot = DirectorySnapshot(path)
+                snapshot.baseline()
+                self._snapshots[key] = snapshot
+            if self.profiler:
+                self._profile_watcher(watcher)
+            logger.info(f"Monitoring started: {display_name}")
+        else:
+            logger.error(f"Failed to start monitoring {display_name}: {msg}")
+
+        return success, display_name
+
+    def _stop_watcher(self, key: str) -> bool:
+        """
+        Stop and forget the watcher for one mail path
+
+        Returns:
+            True if the watcher stopped cleanly
+        """
+        watcher = self.file_watchers.pop(key)
+        self.watch_labels.pop(key, None)
+        self._snapshots.pop(key, None)
+        self._watch_health.pop(key, None)
+
+        success, msg = watcher.stop()
+        if not success:
+            logger.error(f"Failed to stop watcher: {msg}")
+        return success
+
+    def on_new_mail_file(self, file_path: str, label: str = ""):
+        """
+        Handle new mail file detected
+
+        Args:
+            file_path: Path to the new mail file
+            label: Label of the mail path the file was found in
+        """
+        if not self._note_detected(file_path):
+            return  # reconciliation already queued it
+
+        if not self.upload_queue.submit(UploadJob(file_path, label)):
+            logger.warning(f"Shutting down, not queueing {file_path}")
+
+    def on_moved_mail_file(self, src_path: str, dest_path: str, label: str = ""):
+        """
+        Handle a mail file renamed or moved within a watched folder
+
+        A file that was already uploaded only has its recorded path
+        updated. Anything else is queued once under its new name, and a
+        job still queued under the old name is dropped when it runs.
+
+        Args:
+            src_path: Previous path of the file
+            dest_path: New path of the file
+            label: Label of the mail path the file was moved to
+        """
+        with self._seen_lock:
+            self._moved_away[self._watch_key(src_path)] = time.monotonic()
+
+        if not self._note_detected(dest_path):
+            return
+
+        identity = identity_of(dest_path)
+        if self.identity_index.is_uploaded(identity):
+            self.identity_index.moved(identity, dest_path)
+            logger.info(f"{os.path.basename(src_path)} renamed to {os.path.basename(dest_path)}, already uploaded")
+            return
+
+        if not self.upload_queue.submit(UploadJob(dest_path, label)):
+            logger.warning(f"Shutting down, not queueing {dest_path}")
+
+    def _note_detected(self, file_path: str) -> bool:
+        """
+        Remember that a watcher reported a file, for reconciliation
+
+        Returns:
+            False if reconciliation already queued the file
+        """
+        key = self._watch_key(file_path)
+        with self._seen_lock:
+            self._moved_away.pop(key, None)
+            if self._recovered.pop(key, None) is not None:
+                return False
+            self._detected[key] = time.monotonic()
+        return True
+
+    def _health_loop(self) -> None:
+        """Check watchers and reconcile their directories periodically"""
+        interval = self.HEALTH_INTERVAL
+        while not self._stop_event.wait(interval):
+            try:
+                interval = self.RECOVERY_INTERVAL if self._check_watchers() else self.HEALTH_INTERVAL
+            except Exception as e:
+                logger.error(f"Error checking watchers: {e}", exc_info=True)
+                interval = self.HEALTH_INTERVAL
+
+    def _check_watchers(self) -> int:
+        """
+        Restart dead watchers and queue mail that no watcher reported
+
+        Events dropped by an overflowing change buffer are never reported,
+        so files the snapshot finds but no watcher delivered are the only
+        trace of an overflow.
+
+        Returns:
+            Number of missed files queued
+        """
+        with self._lock:
+            if not self.is_monitoring:
+                return 0
+
+            # Bring back watchers whose directory was unavailable at the last restart
+            if self._lost_watchers:
+                configured = self._configured_watch_paths()
+                for key, (path, label) in list(self._lost_watchers.items()):
+                    if key in self.file_watchers:
+                        continue
+                    if key not in configured:
+                        # Removed from the settings or still missing on disk
+                        continue
+                    success, display_name = self._start_watcher(key, path, label)
+                    if success:
+                        del self._lost_watchers[key]
+                        self._emit('log', f"Watching {display_name} again", "success")
+
+            watchers = list(self.file_watchers.items())
+
+        total = 0
+        for key, watcher in watchers:
+            if not watcher.is_healthy():
+                self._restart_watcher(key, watcher)
+
+            with self._lock:
+                snapshot = self._snapshots.get(key)
+                label = self.watch_labels.get(key, "")
+            if snapshot is None:
+                continue
+
+            missed = []
+            for file_path in snapshot.added():
+                path_key = self._watch_key(file_path)
+                with self._seen_lock:
+                    if self._detected.pop(path_key, None) is not None:
+                        continue
+                    self._recovered[path_key] = time.monotonic()
+                missed.append(file_path)
+
+            if not missed:
+                continue
+
+            for file_path in missed:
+                self.upload_queue.submit(UploadJob(file_path, label))
+
+            with self._lock:
+                health = self._watch_health.get(key)
+                if health is not None:
+                    health['recovered'] += len(missed)
+            total += len(missed)
+            logger.warning(f"Watcher missed {len(missed)} files in {watcher.watch_path}, queued them")
+            self._emit('log', f"Recovered {len(missed)} mail files the watcher missed in {watcher.watch_path}", "warning")
+
+        # Forget detections that no pass will look at again, e.g. files removed since
+        cutoff = time.monotonic() - self.DETECTED_TTL
+        with self._seen_lock:
+            for seen in (self._detected, self._recovered, self._moved_away):
+                for path_key in [k for k, at in seen.items() if at < cutoff]:
+                    del seen[path_key]
+
+        return total
+
+    def _restart_watcher(self, key: str, watcher: MailFileWatcher) -> None:
+        """Replace a watcher whose observer or emitter died"""
+        with self._lock:
+            if self.file_watchers.get(key) is not watcher or not self.is_monitoring:
+                return
+
+            label = self.watch_labels.get(key, "")
+            logger.warning(f"Watcher for {watcher.watch_path} stopped delivering events, restarting it")
+            self.file_watchers.pop(key)
+            watcher.stop()
+
+            success, display_name = self._start_watcher(key, watcher.watch_path, label)
+            if success:
+                self._watch_health[key]['restarts'] += 1
+            else:
+                self._lost_watchers[key] = (watcher.watch_path, label)
+
+        if success:
+            self._emit('log', f"Restarted the watcher for {display_name}", "warning")
+        else:
+            self._emit('log', f"Watcher for {display_name} stopped and could not be restarted", "error")
+
+    def submit_file(self, file_path: str, label: str = "") -> bool:
+        """
+        Queue a mail file for upload, whether or not it is being watched
+
+        Args:
+            file_path: Path to the mail file
+            label: Label (character name) to file it under
+
+        Returns:
+            True if queued, False if the engine is shutting down
+        """
+        if self.api_client is None:
+            with self._lock:
+                self._ensure_client()
+        return self.upload_queue.submit(UploadJob(file_path, label))
+
+    def start_replay(
+        self,
+        label: str = "",
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        status: Optional[str] = None,
+        rate: float = ReplayRequest.DEFAULT_RATE
+    ) -> tuple[bool, str]:
+        """
+        Re-upload mail selected by character, date range or history status
+
+        Files are taken from the history and, unless a status is given,
+        from the configured mail folders, and uploaded again at rate files
+        per minute behind live mail. Progress is checkpointed so the replay
+        continues after a restart.
+
+        Args:
+            label: Only files of this character, all if empty
+            since: Only files detected at or after this epoch time
+            until: Only files detected before this epoch time
+            status: Only files with a history record of this status
+            rate: Files per minute
+
+        Returns:
+            Tuple of (success: bool, message: str)
+        """
+        if self.is_shutting_down:
+            return False, "Shutting down"
+
+        return self.replay.start(ReplayRequest(label, since, until, status, rate), self._select_replay_files)
+
+    def import_bundles(self, paths: List[str], rate: float = ReplayRequest.DEFAULT_RATE) -> tuple[bool, str]:
+        """
+        Upload the mail in export bundles
+
+        The bundles are unpacked and replayed, so the import gets the
+        replay's rate limit, backfill priority and restart checkpoints.
+
+        Args:
+            paths: Bundle files written by export_bundles
+            rate: Files per minute
+
+        Returns:
+            Tuple of (success: bool, message: str)
+        """
+        if self.is_shutting_down:
+            return False, "Shutting down"
+        if not paths:
+            return False, "No bundles selected"
+
+        return self.replay.start(ReplayRequest(rate=rate, bundles=paths), self._select_replay_files)
+
+    def _select_replay_files(self, request: ReplayRequest) -> List[tuple[str, str]]:
+        """Get the files for a replay or bundle import (runs on the replay thread)"""
+        if request.bundles:
+            return stage_bundles(request.bundles, os.path.join(self.data_dir, "imports"), self.config.scanner_user_key)
+        return select_files(request, self.history_store, self.config.mail_paths)
+
+    def export_bundles(
+        self,
+        output_dir: str,
+        pending: bool = False,
+        label: str = "",
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        status: Optional[str] = None
+    ) -> tuple[bool, str]:
+        """
+        Write mail as compressed JSONL bundles of upload envelopes
+
+        Runs in the background and reports the outcome as a log event.
+        Exported mail stays queued and in the mail folders.
+
+        Args:
+            output_dir: Directory for the bundles
+            pending: Export the queued and in-flight uploads instead of a selection
+            label: Only files of this character, all if empty
+            since: Only files detected at or after this epoch time
+            until: Only files detected before this epoch time
+            status: Only files with a history record of this status
+
+        Returns:
+            Tuple of (success: bool, message: str)
+        """
+        if not self.config.scanner_user_key:
+            return False, "API Key is required"
+
+        if pending:
+            files = [(job.file_path, job.label) for job in self.upload_queue.pending()]
+            if not files:
+                return False, "No pending uploads to export"
+        else:
+            files = None  # selected on the export thread
+
+        request = ReplayRequest(label, since, until, status)
+        user_key = self.config.scanner_user_key
+
+        def export():
+            try:
+                selected = files if files is not None else select_files(
+                    request, self.history_store, self.config.mail_paths
+                )
+                writer = BundleWriter(output_dir)
+                for file_path, _ in selected:
+                    try:
+                        with open(file_path, 'rb') as f:
+                            raw = f.read()
+                    except FileNotFoundError:
+                        raw = self.mail_archive.read(file_path)
+                    if not raw:
+                        continue
+
+                    content = raw.decode('utf-8', errors='ignore')
+                    if content.strip():
+                        writer.write(content, user_key)
+
+                paths = writer.close()
+                self._emit(
+                    'log',
+                    f"Exported {writer.count} mails into {len(paths)} bundle{'' if len(paths) == 1 else 's'} in {output_dir}",
+                    "success"
+                )
+
+            except Exception as e:
+                logger.error(f"Export failed: {e}", exc_info=True)
+                self._emit('log', f"Export failed: {e}", "error")
+
+        threading.Thread(target=export, name="BundleExport", daemon=True).start()
+        return True, f"Exporting {'pending uploads' if pending else 'selected mail'} to {output_dir}"
+
+    def stop_replay(self) -> tuple[bool, str]:
+        """
+        Cancel the running replay
+
+        Returns:
+            Tuple of (success: bool, message: str)
+        """
+        if not self.replay.is_running:
+            return False, "No replay is running"
+
+        self.replay.stop()
+        return True, "Replay cancelled"
+
+    def _submit_replay_job(self, job: UploadJob) -> bool:
+        """Queue a replayed file, creating the client if monitoring never started"""
+        if self.api_client is None:
+            with self._lock:
+                self._ensure_client()
+        return self.upload_queue.submit(job)
+
+    def _ensure_client(self) -> None:
+        """Create the pooled API client and its prober once (caller holds the lock)"""
+        if self.api_client is None:
+            self.api_client = SWGTrackerAPI(self.config.scanner_user_key, api_url=self.api_url)
+            self.connectivity = ConnectivityMonitor(
+                self.api_client,
+                on_state_change=self._on_connectivity_changed
+            )
+            self.connectivity.start()
+
+    def _publish(self, result: EngineResult) -> None:
+        """Make a final outcome available to results() and on_event"""
+        with self._results_cond:
+            self._results.append(result)
+            self._results_cond.notify_all()
+        self.replay.finished(result.file_path)
+        self._emit('result', result)
+
+    def results(self, timeout: Optional[float] = None) -> Iterator[EngineResult]:
+        """
+        Iterate over upload outcomes as they happen
+
+        Results are buffered from the moment the engine is created, so
+        nothing is missed between submit_file() and iterating. Use one
+        consumer per engine; each result is yielded once.
+
+        Args:
+            timeout: Stop after this many seconds without a new result,
+                None to wait until the engine shuts down
+
+        Returns:
+            Iterator of EngineResult
+        """
+        while True:
+            with self._results_cond:
+                if not self._results and not self._stop_event.is_set():
+                    self._results_cond.wait(timeout)
+                if not self._results:
+                    return
+                result = self._results.popleft()
+            yield result
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get a snapshot of engine state and statistics
+
+        Returns:
+            Dictionary with monitoring/online state, queue depth, per-character
+            backlog, dead letter and archive counts, last hour and today totals,
+            client metrics, per-sink delivery status and watcher health
+        """
+        return {
+            'is_monitoring': self.is_monitoring,
+            'online': self.connectivity.is_online if self.connectivity else None,
+            'watching': len(self.file_watchers),
+            'pending': self.upload_queue.pending_count(),
+            'backlog': self.upload_queue.backlog(),
+            'dead_letters': self.dead_letter_store.count(),
+            'archived': self.mail_archive.count(),
+            'last_hour': self.stats_store.last_hour(),
+            'today': self.stats_store.today(),
+            'metrics': self.api_client.metrics.snapshot() if self.api_client else {},
+            'sinks': self.sinks.status(),
+            'watchers': self._watcher_status(),
+        }
+
+    def _watcher_status(self) -> Dict[str, Dict[str, Any]]:
+        """Get health, restarts and recovered files per watched path"""
+        with self._lock:
+            return {
+                watcher.watch_path: {
+                    'healthy': watcher.is_healthy(),
+                    'errors': watcher.event_handler.errors if watcher.event_handler else 0,
+                    **self._watch_health.get(key, {}),
+                }
+                for key, watcher in self.file_watchers.items()
+            }
+
+    def _process_mail_file(self, job: UploadJob):
+        """
+        Read and upload one queued mail file (runs on an upload worker)
+
+        Args:
+            job: Queued upload job
+        """
+        file_path = job.file_path
+        file_name = os.path.basename(file_path)
+        label = job.label
+        logger.info(f"Processing new mail file: {file_path}")
+
+        stats_key = label or os.path.dirname(file_path)
+        detected_at = job.detected_at
+        size = 0
+        sha256 = ""
+        sender = subject = ""
+
+        # Wait for the file to be fully written here rather than on the
+        # observer thread, so a burst is not detected one file at a time
+        settle = detected_at + self.SETTLE_DELAY - time.time()
+        if settle > 0:
+            time.sleep(settle)
+
+        # The same file under another name, or reported twice, costs nothing;
+        # replays set force to upload again on purpose
+        if not job.force and self.identity_index.is_uploaded(identity_of(file_path)):
+            logger.info(f"Skipping {file_path}, already uploaded")
+            self._publish(EngineResult(file_path, label, "skipped", "Already uploaded"))
+            return
+
+        with self._seen_lock:
+            renamed = self._moved_away.get(self._watch_key(file_path)) is not None
+        if renamed and not os.path.exists(file_path):
+            # Written under a temporary name; the job for the new name uploads it
+            logger.info(f"Skipping {file_path}, renamed before upload")
+            self._publish(EngineResult(file_path, label, "skipped", "Renamed before upload"))
+            return
+
+        identity = None
+        processed = False  # counted once per file, not per network retry
+
+        try:
+            # Read file content, falling back to the archive for re-uploads
+            try:
+                with open(file_path, 'rb') as f:
+                    raw = f.read()
+                    identity = file_identity(os.fstat(f.fileno()))
+            except FileNotFoundError:
+                raw = self.mail_archive.read(file_path)
+                if raw is None:
+                    raise
+
+            size = len(raw)
+            sha256 = hashlib.sha256(raw).hexdigest()
+            content = raw.decode('utf-8', errors='ignore')
+            sender, subject = parse_mail_headers(content)
+
+            if not content.strip():
+                self._count_processed(stats_key)
+                processed = True
+                logger.warning(f"Empty file: {file_path}")
+                self._emit('log', f"Skipped empty file: {file_name}", "warning")
+                self.history_store.record(
+                    file_path, label, size, sha256, subject, sender,
+                    detected_at, None, "skipped", "Empty file"
+                )
+                self._publish(EngineResult(file_path, label, "skipped", "Empty file", size, sha256))
+                return
+
+            # Other destinations get the parsed mail once, without waiting on the upload
+            if not job.dispatched:
+                job.dispatched = True
+                self.sinks.dispatch(MailRecord(
+                    file_path, label, character_for(file_path, label), content,
+                    size, sha256, sender, subject, detected_at
+                ))
+
+            # Wait here while the bandwidth cap applies, charging the bytes
+            # actually sent; the backlog stays queued
+            json_content = self.api_client.envelope(content)
+            if not self.rate_limiter.acquire(len(json_content)):
+                self.upload_queue.requeue(job)
+                return
+
+            # Send to API
+            self._emit('log', f"Uploading: {file_name}", "info")
+
+            request_start = time.monotonic()
+            result = self.api_client.upload(content, json_content)
+            latency = time.monotonic() - request_start
+            success, message = result.success, result.message
+
+            if result.network_error:
+                # Retry shortly; once the connectivity monitor goes offline it
+                # parks the queue until its prober reaches the server again
+                self.connectivity.report_failure()
+                self.upload_queue.requeue(job, delay=self.NETWORK_RETRY_DELAY)
+                self._emit('log', f"Network unavailable, will retry {file_name}", "warning")
+                return
+
+            self.connectivity.report_success()
+            if job.attempts == 0:
+                self._count_processed(stats_key)
+                processed = True
+
+            self.history_store.record(
+                file_path, label, size, sha256, subject, sender,
+                detected_at, time.time(), "uploaded" if success else "failed",
+                result.response_text or message
+            )
+
+            if success:
+                self._emit('stat', 'files_uploaded')
+                self.stats_store.record(stats_key, uploaded=1, size=size, latency=latency)
+                self._emit('log', f"✓ {file_name} - {message}", "success")
+                self._publish(EngineResult(file_path, label, "uploaded", message, size, sha256, latency))
+                self.identity_index.record(identity, file_path, sha256)
+
+                if self.config.archive_uploaded:
+                    self.mail_archive.add(file_path, character_for(file_path, label), sha256)
+
+            else:
+                self._emit('stat', 'errors')
+                self.stats_store.record(stats_key, errors=1, latency=latency)
+                job.attempts += 1
+
+                if result.permanent or job.attempts >= self.MAX_UPLOAD_ATTEMPTS:
+                    reason = message if result.permanent else f"{message} (gave up after {job.attempts} attempts)"
+                    self.dead_letter_store.add(
+                        file_path, label, sha256, job.attempts, reason,
+                        result.status_code, result.response_text
+                    )
+                    self._emit('log', f"✗ {file_name} - {reason}, moved to dead letters", "error")
+                    self._publish(EngineResult(file_path, label, "failed", reason, size, sha256, latency))
+                else:
+                    # Transient server error: retry behind live mail, once the server had time to recover
+                    job.backfill = True
+                    self.upload_queue.requeue(job, front=False, delay=self.RETRY_DELAY * 2 ** (job.attempts - 1))
+                    self._emit('log', f"✗ {file_name} - {message}, will retry", "warning")
+
+        except Exception as e:
+            error_msg = f"Error processing file: {str(e)}"
+            logger.error(error_msg, exc_info=True)
+            if not processed:
+                self._count_processed(stats_key)
+            self._emit('stat', 'errors')
+            self.stats_store.record(stats_key, errors=1)
+            self._emit('log', f"✗ {file_name} - {error_msg}", "error")
+            self.history_store.record(
+                file_path, label, size, sha256, subject, sender,
+                detected_at, None, "error", error_msg
+            )
+            self.dead_letter_store.add(file_path, label, sha256, job.attempts + 1, error_msg)
+            self._publish(EngineResult(file_path, label, "error", error_msg, size, sha256))
+
+    def _count_processed(self, stats_key: str) -> None:
+        """Update the processed stats for a file that reached an outcome"""
+        self._emit('stat', 'files_processed')
+        self.stats_store.record(stats_key, processed=1)
+
+    def retry_dead_letters(self) -> tuple[bool, str]:
+        """
+        Send every dead-lettered file back through the upload queue
+
+        Retries run in the backfill lane so they never delay live mail.
+
+        Returns:
+            Tuple of (success: bool, message: str)
+        """
+        with self._lock:
+            if self.api_client is None:
+                return False, "Start monitoring before retrying"
+            if self.is_shutting_down:
+                return False, "Shutting down"
+
+            entries = self.dead_letter_store.take_all()
+            rejected = 0
+            for entry in entries:
+                if self.upload_queue.submit(UploadJob(entry['file_path'], entry['label'] or "", backfill=True)):
+                    continue
+
+                # Keep what could not be queued rather than losing it
+                rejected += 1
+                self.dead_letter_store.add(
+                    entry['file_path'], entry['label'] or "", entry['sha256'] or "", entry['attempts'],
+                    entry['reason'], entry['status_code'], entry['response'] or ""
+                )
+
+        if rejected:
+            logger.warning(f"{rejected} dead-lettered uploads could not be queued and were kept")
+            return False, f"Upload queue is not accepting work, kept {rejected} dead letters"
+
+        logger.info(f"Retrying {len(entries)} dead-lettered uploads")
+        return True, f"Retrying {len(entries)} upload{'' if len(entries) == 1 else 's'}"
+
+    def _on_connectivity_changed(self, online: bool):
+        """
+        Park or resume uploads when connectivity changes
+
+        Args:
+            online: Whether the API is reachable
+        """
+        if online:
+            self.upload_queue.resume()
+        else:
+            self.upload_queue.pause()
+
+        self._emit('connectivity', online, self.upload_queue.pending_count())
+
+    def shutdown(self, timeout: float, on_progress: Optional[Callable[[int, float], None]] = None) -> int:
+        """
+        Stop monitoring, drain uploads and release resources
+
+        Stops accepting new mail, waits up to timeout seconds for queued
+        and in-flight uploads, and persists whatever is left for the
+        next start. Blocks until done.
+
+        Args:
+            timeout: Maximum seconds to wait for uploads to finish
+            on_progress: Optional callback with (remaining, seconds_left)
+
+        Returns:
+            Number of uploads deferred to the next start
+        """
+        with self._lock:
+            if self.is_shutting_down:
+                return 0
+            self.is_shutting_down = True
+
+            # Stop accepting new events
+            self.replay.stop(keep_checkpoint=True)
+            self.upload_queue.stop_accepting()
+            if self.connectivity:
+                self.connectivity.stop()
+            if self.is_monitoring:
+                self.stop()
+
+        # Held uploads cannot finish, so do not wait for them
+        if self.rate_limiter.is_holding:
+            timeout = 0
+
+        # Persist everything up front so a forced kill loses nothing;
+        # unfinished replay jobs are resumed from the replay checkpoint
+        self._save_pending(self.upload_queue.pending())
+
+        leftover = self.upload_queue.drain(timeout, on_progress)
+        self.rate_limiter.close()  # release workers still waiting for bandwidth
+        if self.api_client:
+            logger.info("Upload metrics:\n" + self.api_client.metrics.format_summary())
+            self.api_client.close()
+        self._save_pending(leftover)
+        self.replay.stop(keep_checkpoint=True)  # record replay files finished while draining
+        if leftover:
+            logger.warning(f"{len(leftover)} uploads deferred to next start")
+        else:
+            logger.info("All uploads finished before shutdown")
+
+        undelivered = self.sinks.close(self.SINK_DRAIN_TIMEOUT)
+        if undelivered:
+            logger.warning(f"{undelivered} mails not delivered to additional sinks")
+
+        if self.profiler:
+            self.stop_profiling()
+
+        # Flush pending history records and statistics
+        self._stop_event.set()
+        self._schedule_changed.set()
+        with self._results_cond:
+            self._results_cond.notify_all()
+        self.history_store.close()
+        self.stats_store.save()
+        self.dead_letter_store.close()
+        self.mail_archive.close()
+        self.identity_index.close()
+
+        return len(leftover)
+
+    def _save_pending(self, jobs: List[UploadJob]) -> None:
+        """Persist unfinished jobs and resumed jobs that were never submitted"""
+        if self._resumed is None:
+            return  # never opened, so the file still holds the last run's jobs
+
+        self.pending_store.save(
+            self._resumed + [job for job in jobs if not self.replay.is_tracking(job.file_path)]
+        )
+
+    @property
+    def is_profiling(self) -> bool:
+        """Whether profiling is running"""
+        return self.profiler is not None
+
+    def start_profiling(self) -> tuple[bool, str]:
+        """
+        Profile upload workers and watchers, trace memory and dump threads
+
+        Reports go to a timestamped directory under <data_dir>/profiles.
+
+        Returns:
+            Tuple of (success: bool, message: str)
+        """
+        with self._lock:
+            if self.profiler:
+                return False, "Profiling is already running"
+
+            try:
+                self.profiler = Profiler(os.path.join(self.data_dir, "profiles"))
+            except Exception as e:
+                error_msg = f"Failed to start profiling: {str(e)}"
+                logger.error(error_msg, exc_info=True)
+                return False, error_msg
+
+            self.upload_queue.process = self.profiler.wrap('upload_workers', self._process_mail_file)
+            for watcher in self.file_watchers.values():
+                self._profile_watcher(watcher)
+
+            report_dir = self.profiler.report_dir
+
+        self._emit('profiling', True, report_dir)
+        return True, f"Profiling to {report_dir}"
+
+    def stop_profiling(self) -> tuple[bool, str]:
+        """
+        Stop profiling and write the reports
+
+        Returns:
+            Tuple of (success: bool, message: str)
+        """
+        with self._lock:
+            if not self.profiler:
+                return False, "Profiling is not running"
+
+            # Swap the originals back so profiling costs nothing once stopped
+            self.upload_queue.process = self._process_mail_file
+            for watcher in self.file_watchers.values():
+                if watcher.event_handler:
+                    for name in self.PROFILED_HANDLERS:
+                        watcher.event_handler.__dict__.pop(name, None)
+
+            profiler, self.profiler = self.profiler, None
+
+        report_dir = profiler.stop()
+        self._emit('profiling', False, report_dir)
+        return True, f"Profiling reports written to {report_dir}"
+
+    def _profile_watcher(self, watcher: MailFileWatcher) -> None:
+        """Profile a watcher's event handling on its observer thread"""
+        handler = watcher.event_handler
+        if handler:
+            for name in self.PROFILED_HANDLERS:
+                setattr(handler, name, self.profiler.wrap('watchers', getattr(handler, name)))
+
+    def _stats_loop(self):
+        """Persist statistics periodically"""
+        while not self._stop_event.wait(self.STATS_SAVE_INTERVAL):
+            self.stats_store.save()
@@ -0,0 +1,381 @@
+"""
+Run the mail engine in a child process, away from the GUI interpreter
+"""
+import os
+import logging
+import threading
+import multiprocessing
+from itertools import count
+from typing import Callable, Dict, Optional, Any
+from .config_manager import ConfigSnapshot
+from .engine import MailEngine
+from .history_store import HistoryStore
+from .stats_store import METRICS
+from .dead_letter_store import DeadLetterStore
+
+logger = logging.getLogger(__name__)
+
+# Messages are small tuples sent over a multiprocessing Pipe:
+#   parent -> child: (request_id, command, args)
+#   child -> parent: ('reply', request_id, result) or ('event', kind, *args)
+
+ROLLUP_INTERVAL = 5  # seconds between statistics pushes from the child
+ORPHAN_DRAIN_TIMEOUT = 3  # seconds to drain when the GUI process disappears
+LOG_FILE = "swg_mail_tracker_engine.log"  # the GUI process keeps swg_mail_tracker.log
+
+
+def run_engine(conn, config: Dict[str, Any], data_dir: str = ".") -> None:
+    """
+    Child process entry point
+
+    Args:
+        conn: Child end of the command pipe
+        config: Configuration dictionary for the engine
+        data_dir: Directory for the engine's data files
+    """
+    if not logging.getLogger().handlers:
+        logging.basicConfig(
+            level=logging.INFO,
+            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+            handlers=[
+                logging.FileHandler(LOG_FILE),
+                logging.StreamHandler()
+            ]
+        )
+
+    send_lock = threading.Lock()
+    stopped = threading.Event()
+
+    def send(*message):
+        with send_lock:
+            try:
+                conn.send(message)
+            except (OSError, EOFError):
+                pass  # GUI process went away
+
+    engine = MailEngine(
+        ConfigSnapshot(config),
+        on_event=lambda kind, *args: send('event', kind, *args),
+        data_dir=data_dir
+    )
+    engine.open()
+
+    def push_rollups():
+        while not stopped.wait(ROLLUP_INTERVAL):
+            send('event', 'rollups', engine.stats_store.last_hour(), engine.stats_store.today())
+
+    threading.Thread(target=push_rollups, name="RollupPush", daemon=True).start()
+
+    commands = {
+        'start': engine.start,
+        'stop': engine.stop,
+        'reconfigure': lambda config: engine.reconfigure(ConfigSnapshot(config)),
+        'retry_dead_letters': engine.retry_dead_letters,
+        'submit_file': engine.submit_file,
+        'start_profiling': engine.start_profiling,
+        'stop_profiling': engine.stop_profiling,
+        'start_replay': engine.start_replay,
+        'stop_replay': engine.stop_replay,
+        'import_bundles': engine.import_bundles,
+        'export_bundles': engine.export_bundles,
+    }
+
+    logger.info("Upload engine process started")
+
+    # Commands run on this thread while uploads run on worker threads,
+    # so a hung upload never blocks start, stop or shutdown
+    while True:
+        try:
+            request_id, command, args = conn.recv()
+        except (OSError, EOFError):
+            logger.warning("GUI process disappeared, shutting down engine")
+            engine.shutdown(ORPHAN_DRAIN_TIMEOUT)
+            break
+
+        if command == 'shutdown':
+            leftover = engine.shutdown(
+                args[0],
+                on_progress=lambda remaining, seconds_left: send(
+                    'event', 'shutdown_progress', remaining, seconds_left
+                )
+            )
+            stopped.set()
+            send('reply', request_id, leftover)
+            break
+
+        try:
+            result = commands[command](*args)
+        except Exception as e:
+            logger.error(f"Engine command {command} failed: {e}", exc_info=True)
+            result = (False, f"Engine error: {e}")
+        send('reply', request_id, result)
+
+    stopped.set()
+    conn.close()
+    logger.info("Upload engine process stopped")
+
+
+class RemoteStats:
+    """Last hour and today totals pushed by the engine process"""
+
+    def __init__(self):
+        """Initialize with empty totals"""
+        empty = {name: 0.0 for name in METRICS}
+        empty['avg_latency'] = 0.0
+        self._last_hour = dict(empty)
+        self._today = dict(empty)
+
+    def update(self, last_hour: Dict[str, float], today: Dict[str, float]) -> None:
+        """Store totals received from the engine"""
+        self._last_hour = last_hour
+        self._today = today
+
+    def last_hour(self) -> Dict[str, float]:
+        """Get totals for the last 60 minutes"""
+        return self._last_hour
+
+    def today(self) -> Dict[str, float]:
+        """Get totals for the current local day"""
+        return self._today
+
+
+class EngineProcess:
+    """
+    Drop-in replacement for MailEngine that runs it in a child process
+
+    Commands block only until the child replies, never on uploads.
+    Events arrive on a reader thread and are passed to on_event like
+    MailEngine does. History and dead letters are read from the shared
+    database files; statistics come from periodic pushes.
+    """
+
+    COMMAND_TIMEOUT = 10  # seconds to wait for a command reply
+    START_TIMEOUT = 60  # start checks every mail path, which can be slow on network drives
+    EXIT_GRACE = 5  # extra seconds for the child to exit after draining
+
+    def __init__(
+        self,
+        config: ConfigSnapshot,
+        on_event: Optional[Callable[..., None]] = None,
+        data_dir: str = "."
+    ):
+        """
+        Initialize engine process proxy
+
+        Args:
+            config: Configuration snapshot to run with
+            on_event: Optional callback receiving (kind, *args) events
+            data_dir: Directory for the engine's data files
+        """
+        self.config = config
+        self.on_event = on_event
+        self.data_dir = data_dir
+        self.is_monitoring = False
+        self.is_profiling = False
+        self.is_shutting_down = False
+        self.history_store = HistoryStore(os.path.join(data_dir, "history.db"), read_only=True)
+        self.stats_store = RemoteStats()
+        self.dead_letter_store = DeadLetterStore(os.path.join(data_dir, "dead_letters.db"))
+        self._process = None
+        self._conn = None
+        self._send_lock = threading.Lock()
+        self._request_ids = count(1)
+        self._replies: Dict[int, list] = {}  # request id -> [Event, result]
+        self._replies_lock = threading.Lock()
+        self._reader: Optional[threading.Thread] = None
+
+    def open(self) -> None:
+        """Spawn the engine process"""
+        # Spawn rather than fork: the GUI process already runs threads
+        context = multiprocessing.get_context("spawn")
+        self._conn, child_conn = context.Pipe()
+        self._process = context.Process(
+            target=run_engine,
+            args=(child_conn, self.config.to_dict(), self.data_dir),
+            name="UploadEngine",
+            daemon=True
+        )
+        self._process.start()
+        child_conn.close()
+
+        self._reader = threading.Thread(
+            target=self._read_loop,
+            name="EngineReader",
+            daemon=True
+        )
+        self._reader.start()
+
+        logger.info(f"Upload engine running in process {self._process.pid}")
+
+    def _emit(self, kind: str, *args) -> None:
+        """Send an event to the listener"""
+        if self.on_event is None:
+            return
+
+        try:
+            self.on_event(kind, *args)
+        except Exception as e:
+            logger.error(f"Error in engine event callback: {e}", exc_info=True)
+
+    def _read_loop(self) -> None:
+        """Dispatch replies and events from the child"""
+        while True:
+            try:
+                message = self._conn.recv()
+            except (OSError, EOFError):
+                break
+
+            if message[0] == 'reply':
+                _, request_id, result = message
+                with self._replies_lock:
+                    waiter = self._replies.get(request_id)
+                if waiter:
+                    waiter[1] = result
+                    waiter[0].set()
+            else:
+                kind, args = message[1], message[2:]
+                if kind == 'rollups':
+                    self.stats_store.update(*args)
+                    continue
+                if kind == 'monitoring':
+                    self.is_monitoring = args[0]
+                elif kind == 'profiling':
+                    self.is_profiling = args[0]
+                self._emit(kind, *args)
+
+        # Wake anyone still waiting for a reply
+        with self._replies_lock:
+            for waiter in self._replies.values():
+                waiter[0].set()
+
+        if not self.is_shutting_down:
+            logger.error("Upload engine process exited unexpectedly")
+            self.is_monitoring = False
+            self._emit('monitoring', False)
+            self._emit('log', "Upload engine stopped unexpectedly, restart the application", "error")
+
+    def _call(self, command: str, *args, timeout: Optional[float] = None, default: Any = None) -> Any:
+        """
+        Send a command to the child and wait for its reply
+
+        Args:
+            command: Command name
+            args: Command arguments
+            timeout: Seconds to wait, defaults to COMMAND_TIMEOUT
+            default: Result returned when the child does not reply
+
+        Returns:
+            The command result
+        """
+        if self._process is None or not self._process.is_alive():
+            return default
+
+        request_id = next(self._request_ids)
+        waiter = [threading.Event(), default]
+        with self._replies_lock:
+            self._replies[request_id] = waiter
+
+        try:
+            with self._send_lock:
+                self._conn.send((request_id, command, args))
+            if not waiter[0].wait(self.COMMAND_TIMEOUT if timeout is None else timeout):
+                logger.error(f"Upload engine did not answer {command}")
+            return waiter[1]
+
+        except (OSError, EOFError) as e:
+            logger.error(f"Error sending {command} to upload engine: {e}")
+            return default
+
+        finally:
+            with self._replies_lock:
+                self._replies.pop(request_id, None)
+
+    def start(self) -> tuple[bool, str]:
+        """Start file monitoring in the child"""
+        return self._call('start', timeout=self.START_TIMEOUT, default=(False, "Upload engine is not responding"))
+
+    def stop(self) -> tuple[bool, str]:
+        """Stop file monitoring in the child"""
+        return self._call('stop', default=(False, "Upload engine is not responding"))
+
+    def reconfigure(self, config: ConfigSnapshot) -> tuple[bool, str]:
+        """Apply a new configuration in the child"""
+        self.config = config
+        return self._call('reconfigure', config.to_dict(), default=(False, "Upload engine is not responding"))
+
+    def retry_dead_letters(self) -> tuple[bool, str]:
+        """Retry every dead-lettered file in the child"""
+        return self._call('retry_dead_letters', default=(False, "Upload engine is not responding"))
+
+    def start_profiling(self) -> tuple[bool, str]:
+        """Start profiling in the child"""
+        return self._call('start_profiling', default=(False, "Upload engine is not responding"))
+
+    def stop_profiling(self) -> tuple[bool, str]:
+        """Stop profiling in the child and write its reports"""
+        return self._call('stop_profiling', default=(False, "Upload engine is not responding"))
+
+    def start_replay(self, *args) -> tuple[bool, str]:
+        """Start a replay in the child, see MailEngine.start_replay"""
+        return self._call('start_replay', *args, default=(False, "Upload engine is not responding"))
+
+    def stop_replay(self) -> tuple[bool, str]:
+        """Cancel the replay in the child"""
+        return self._call('stop_replay', default=(False, "Upload engine is not responding"))
+
+    def import_bundles(self, *args) -> tuple[bool, str]:
+        """Upload export bundles in the child, see MailEngine.import_bundles"""
+        return self._call('import_bundles', *args, default=(False, "Upload engine is not responding"))
+
+    def export_bundles(self, *args) -> tuple[bool, str]:
+        """Export bundles in the child, see MailEngine.export_bundles"""
+        return self._call('export_bundles', *args, default=(False, "Upload engine is not responding"))
+
+    def submit_file(self, file_path: str, label: str = "") -> bool:
+        """Queue a mail file for upload in the child"""
+        return self._call('submit_file', file_path, label, default=False)
+
+    def shutdown(self, timeout: float, on_progress: Optional[Callable[[int, float], None]] = None) -> int:
+        """
+        Drain the child, wait for it to exit and release resources
+
+        The child is terminated if it does not finish within the drain
+        timeout plus a grace period; its pending list was saved up front.
+
+        Args:
+            timeout: Maximum seconds to wait for uploads to finish
+            on_progress: Optional callback with (remaining, seconds_left)
+
+        Returns:
+            Number of uploads deferred to the next start
+        """
+        if self.is_shutting_down:
+            return 0
+        self.is_shutting_down = True
+
+        if on_progress:
+            listener = self.on_event
+
+            def on_event(kind, *args):
+                if kind == 'shutdown_progress':
+                    on_progress(*args)
+                elif listener:
+                    listener(kind, *args)
+
+            self.on_event = on_event
+
+        leftover = self._call('shutdown', timeout, timeout=timeout + self.EXIT_GRACE, default=0)
+
+        if self._process is not None:
+            self._process.join(self.EXIT_GRACE)
+            if self._process.is_alive():
+                logger.warning("Upload engine did not exit, terminating it")
+                self._process.terminate()
+                self._process.join(self.EXIT_GRACE)
+
+        if self._conn is not None:
+            self._conn.close()
+
+        self.history_store.close()
+        self.dead_letter_store.close()
+        return leftover
@@ -2,7 +2,6 @@
 File watcher for monitoring SWG mail directory
 """
 import os
-import time
 import logging
 from pathlib import Path
 from typing import Callable, Optional
@@ -15,16 +14,21 @@ logger = logging.getLogger(__name__)
 class MailFileHandler(FileSystemEventHandler):
     """Handle file system events for mail files"""
 
-    def __init__(self, callback: Callable[[str], None]):
+    def __init__(self, callback: Callable[[str], None], on_moved: Optional[Callable[[str, str], None]] = None):
         """
         Initialize file handler
 
         Args:
             callback: Function to call when new mail file is created
                      Takes file_path as argument
+            on_moved: Optional function called with (src_path, dest_path) when a
+                     file is renamed or moved inside the watched tree; without
+                     it the destination is treated as a new file
         """
         super().__init__()
         self.callback = callback
+        self.moved_callback = on_moved
+        self.errors = 0  # callback failures
 
     def on_created(self, event: FileSystemEvent) -> None:
         """
@@ -40,30 +44,57 @@ class MailFileHandler(FileSystemEventHandler):
         file_path = event.src_path
         logger.info(f"New file detected: {file_path}")
 
-        # Small delay to ensure file is fully written
-        time.sleep(0.1)
-
         # Call the callback with the file path
         try:
             self.callback(file_path)
         except Exception as e:
+            self.errors += 1
+            logger.error(f"Error in file callback: {e}", exc_info=True)
+
+    def on_moved(self, event: FileSystemEvent) -> None:
+        """
+        Handle file rename and move events
+
+        Args:
+            event: File system event
+        """
+        if event.is_directory:
+            return
+
+        logger.info(f"File moved: {event.src_path} -> {event.dest_path}")
+
+        try:
+            if self.moved_callback:
+                self.moved_callback(event.src_path, event.dest_path)
+            else:
+                self.callback(event.dest_path)
+        except Exception as e:
+            self.errors += 1
             logger.error(f"Error in file callback: {e}", exc_info=True)
 
 
 class MailFileWatcher:
     """Watch for new mail files in SWG directory"""
 
-    def __init__(self, watch_path: str, callback: Callable[[str], None]):
+    def __init__(
+        self,
+        watch_path: str,
+        callback: Callable[[str], None],
+        on_moved: Optional[Callable[[str, str], None]] = None
+    ):
         """
         Initialize file watcher
 
         Args:
             watch_path: Directory path to watch
             callback: Function to call when new mail file is created
+            on_moved: Optional function to call with (src_path, dest_path) on renames
         """
         self.watch_path = watch_path
         self.callback = callback
+        self.on_moved = on_moved
         self.observer: Optional[Observer] = None
+        self.event_handler: Optional[MailFileHandler] = None
         self.is_running = False
 
     def start(self) -> tuple[bool, str]:
@@ -90,11 +121,11 @@ class MailFileWatcher:
         try:
             # Create observer and handler
             self.observer = Observer()
-            event_handler = MailFileHandler(self.callback)
+            self.event_handler = MailFileHandler(self.callback, self.on_moved)
 
             # Schedule the observer
             self.observer.schedule(
-                event_handler,
+                self.event_handler,
                 self.watch_path,
                 recursive=True
             )
@@ -137,6 +168,21 @@ class MailFileWatcher:
             logger.error(error_msg, exc_info=True)
             return False, error_msg
 
+    def is_healthy(self) -> bool:
+        """
+        Check that the observer and its emitter threads are still alive
+
+        An emitter dies when reading events fails, e.g. because the watched
+        directory was removed or the event buffer could not be read; the
+        observer keeps running without it and no further events arrive.
+
+        Returns:
+            True if events can still be delivered
+        """
+        if not self.is_active() or not self.observer.is_alive():
+            return False
+        return all(emitter.is_alive() for emitter in self.observer.emitters)
+
     def is_active(self) -> bool:
         """
         Check if watcher is currently active
@@ -0,0 +1,350 @@
+"""
+Searchable upload history backed by SQLite
+"""
+import queue
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+
+logger = logging.getLogger(__name__)
+
+
+def parse_mail_headers(content: str) -> tuple[str, str]:
+    """
+    Extract sender and subject from a SWG mail file
+
+    SWG saves mail as a message id line followed by the sender, the
+    subject and a TIMESTAMP line before the body.
+
+    Args:
+        content: Raw content of the mail file
+
+    Returns:
+        Tuple of (sender: str, subject: str), empty strings if unknown
+    """
+    lines = content.splitlines()[:4]
+    if len(lines) >= 3 and lines[0].strip().isdigit():
+        return lines[1].strip(), lines[2].strip()
+    return "", ""
+
+
+class HistoryStore:
+    """Record processed mail files in an indexed local database"""
+
+    BATCH_SIZE = 100
+    FLUSH_INTERVAL = 1.0  # seconds
+
+    COLUMNS = (
+        "file_path", "label", "size", "sha256", "subject", "sender",
+        "detected_at", "uploaded_at", "status", "response"
+    )
+
+    def __init__(self, db_file: str = "history.db", read_only: bool = False):
+        """
+        Initialize history store
+
+        Args:
+            db_file: Path to the SQLite database file
+            read_only: Only query a database another process writes; such a
+                store is used without start()
+        """
+        self.db_file = db_file
+        self.read_only = read_only
+        self.has_fts = False
+        self._queue: queue.Queue = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._reader: Optional[sqlite3.Connection] = None
+        self._reader_lock = threading.Lock()
+
+    def start(self) -> bool:
+        """
+        Create the schema and start the background writer
+
+        Returns:
+            True if successful, False otherwise
+        """
+        if self._writer is not None:
+            return True
+
+        try:
+            conn = self._connect()
+            self._create_schema(conn)
+            conn.close()
+        except Exception as e:
+            logger.error(f"Failed to open history database: {e}", exc_info=True)
+            return False
+
+        self._writer = threading.Thread(
+            target=self._write_loop,
+            name="HistoryWriter",
+            daemon=True
+        )
+        self._writer.start()
+        logger.info(f"Upload history stored in {self.db_file}")
+        return True
+
+    def close(self) -> None:
+        """Flush pending records and stop the background writer"""
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join(timeout=5)
+            self._writer = None
+
+        with self._reader_lock:
+            if self._reader is not None:
+                self._reader.close()
+                self._reader = None
+
+    def record(
+        self,
+        file_path: str,
+        label: str = "",
+        size: int = 0,
+        sha256: str = "",
+        subject: str = "",
+        sender: str = "",
+        detected_at: Optional[float] = None,
+        uploaded_at: Optional[float] = None,
+        status: str = "",
+        response: str = ""
+    ) -> None:
+        """
+        Queue a processed file for insertion
+
+        This only enqueues the row; the database write happens in batches
+        on the writer thread.
+
+        Args:
+            file_path: Path of the processed mail file
+            label: Mail path label (character name)
+            size: File size in bytes
+            sha256: Hex digest of the file content
+            subject: Mail subject
+            sender: Mail sender
+            detected_at: Epoch time the file was detected
+            uploaded_at: Epoch time the upload finished
+            status: Outcome (uploaded, failed, skipped, error)
+            response: Server response or error message
+        """
+        self._queue.put((
+            file_path, label, size, sha256, subject, sender,
+            detected_at, uploaded_at, status, response
+        ))
+
+    def query(
+        self,
+        search: str = "",
+        status: Optional[str] = None,
+        limit: int = 50,
+        offset: int = 0
+    ) -> List[Dict[str, Any]]:
+        """
+        Fetch one page of history, newest first
+
+        Args:
+            search: Free text matched against subject and sender
+            status: Only return rows with this status
+            limit: Page size
+            offset: Number of rows to skip
+
+        Returns:
+            List of row dictionaries
+        """
+        where, params = self._build_filter(search, status)
+        sql = (
+            f"SELECT id, {', '.join(self.COLUMNS)} FROM uploads"
+            f"{where} ORDER BY id DESC LIMIT ? OFFSET ?"
+        )
+
+        rows = self._read(sql, params + [limit, offset])
+        return [dict(row) for row in rows]
+
+    def count(self, search: str = "", status: Optional[str] = None) -> int:
+        """
+        Count history rows matching a filter
+
+        Args:
+            search: Free text matched against subject and sender
+            status: Only count rows with this status
+
+        Returns:
+            Number of matching rows
+        """
+        where, params = self._build_filter(search, status)
+        rows = self._read(f"SELECT COUNT(*) FROM uploads{where}", params)
+        return rows[0][0] if rows else 0
+
+    def files(
+        self,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        status: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        List each recorded file once, oldest first
+
+        Args:
+            since: Only files first detected at or after this epoch time
+            until: Only files first detected before this epoch time
+            status: Only files with a record of this status
+
+        Returns:
+            List of {file_path, label, detected_at} dictionaries
+        """
+        clauses = []
+        params: list = []
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+
+        having = []
+        if since is not None:
+            having.append("MIN(detected_at) >= ?")
+            params.append(since)
+        if until is not None:
+            having.append("MIN(detected_at) < ?")
+            params.append(until)
+
+        sql = "SELECT file_path, MAX(label) AS label, MIN(detected_at) AS detected_at FROM uploads"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " GROUP BY file_path"
+        if having:
+            sql += " HAVING " + " AND ".join(having)
+        sql += " ORDER BY detected_at"
+
+        return [dict(row) for row in self._read(sql, params)]
+
+    def _build_filter(self, search: str, status: Optional[str]) -> tuple[str, list]:
+        """Build the WHERE clause for query and count"""
+        clauses = []
+        params: list = []
+
+        terms = search.split()
+        if terms:
+            if self.has_fts:
+                # Quote each term so user input cannot inject FTS syntax
+                match = " ".join('"' + t.replace('"', '""') + '"*' for t in terms)
+                clauses.append("id IN (SELECT rowid FROM uploads_fts WHERE uploads_fts MATCH ?)")
+                params.append(match)
+            else:
+                for term in terms:
+                    clauses.append("(subject LIKE ? OR sender LIKE ?)")
+                    params.extend([f"%{term}%", f"%{term}%"])
+
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+
+        where = " WHERE " + " AND ".join(clauses) if clauses else ""
+        return where, params
+
+    def _read(self, sql: str, params: list) -> list:
+        """Run a read-only query on the shared reader connection"""
+        try:
+            with self._reader_lock:
+                if self._reader is None:
+                    self._reader = self._connect_reader()
+                    self._reader.row_factory = sqlite3.Row
+                return self._reader.execute(sql, params).fetchall()
+        except Exception as e:
+            logger.error(f"History query failed: {e}")
+            return []
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection to the history database"""
+        conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _connect_reader(self) -> sqlite3.Connection:
+        """Open the query connection, read-only if the store does not write"""
+        if not self.read_only:
+            return self._connect()
+
+        # The writer created the schema and switched the file to WAL
+        uri = Path(self.db_file).resolve().as_uri() + "?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        self.has_fts = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'uploads_fts'"
+        ).fetchone() is not None
+        return conn
+
+    def _create_schema(self, conn: sqlite3.Connection) -> None:
+        """Create tables, indexes and the full-text index"""
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS uploads (
+                id INTEGER PRIMARY KEY,
+                file_path TEXT NOT NULL,
+                label TEXT,
+                size INTEGER,
+                sha256 TEXT,
+                subject TEXT,
+                sender TEXT,
+                detected_at REAL,
+                uploaded_at REAL,
+                status TEXT,
+                response TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_uploads_path ON uploads(file_path);
+            CREATE INDEX IF NOT EXISTS idx_uploads_sha256 ON uploads(sha256);
+            CREATE INDEX IF NOT EXISTS idx_uploads_status ON uploads(status);
+            CREATE INDEX IF NOT EXISTS idx_uploads_detected ON uploads(detected_at);
+        """)
+
+        try:
+            conn.executescript("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS uploads_fts USING fts5(
+                    subject, sender, content='uploads', content_rowid='id'
+                );
+                CREATE TRIGGER IF NOT EXISTS uploads_fts_insert AFTER INSERT ON uploads BEGIN
+                    INSERT INTO uploads_fts(rowid, subject, sender)
+                    VALUES (new.id, new.subject, new.sender);
+                END;
+            """)
+            self.has_fts = True
+        except sqlite3.OperationalError as e:
+            logger.warning(f"Full-text search unavailable, falling back to LIKE: {e}")
+            self.has_fts = False
+
+        conn.commit()
+
+    def _write_loop(self) -> None:
+        """Drain the record queue in batched transactions"""
+        conn = self._connect()
+        insert_sql = (
+            f"INSERT INTO uploads ({', '.join(self.COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(self.COLUMNS))})"
+        )
+
+        running = True
+        while running:
+            batch = []
+            try:
+                item = self._queue.get(timeout=self.FLUSH_INTERVAL)
+            except queue.Empty:
+                continue
+
+            while item is not None:
+                batch.append(item)
+                if len(batch) >= self.BATCH_SIZE:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            if item is None:
+                running = False
+
+            if batch:
+                try:
+                    with conn:
+                        conn.executemany(insert_sql, batch)
+                except Exception as e:
+                    logger.error(f"Failed to write {len(batch)} history records: {e}")
+
+        conn.close()
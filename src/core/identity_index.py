@@ -0,0 +1,160 @@
+"""
+Index of uploaded mail by file identity, so renames and moves are recognized
+"""
+import os
+import time
+import sqlite3
+import logging
+import threading
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# (device:inode, size, mtime_ns); on Windows st_ino is the NTFS file ID
+FileIdentity = tuple[str, int, int]
+
+
+def file_identity(stat_result: os.stat_result) -> Optional[FileIdentity]:
+    """
+    Get the stable identity of a file from its stat result
+
+    The device and inode (or Windows file ID) survive renames and moves on
+    the same volume; size and mtime guard against a reused inode.
+
+    Args:
+        stat_result: Result of os.stat or os.fstat
+
+    Returns:
+        Identity tuple, or None if the file system has no file IDs
+    """
+    if not stat_result.st_ino:
+        return None
+    return f"{stat_result.st_dev}:{stat_result.st_ino}", stat_result.st_size, stat_result.st_mtime_ns
+
+
+def identity_of(file_path: str) -> Optional[FileIdentity]:
+    """
+    Get the identity of a file on disk
+
+    Args:
+        file_path: Path of the file
+
+    Returns:
+        Identity tuple, or None if the file is gone or has no file ID
+    """
+    try:
+        return file_identity(os.stat(file_path))
+    except OSError:
+        return None
+
+
+class IdentityIndex:
+    """Remember which file identities were uploaded and under which path"""
+
+    MAX_AGE = 365 * 24 * 3600  # seconds an upload is remembered
+
+    def __init__(self, db_file: str = "identities.db"):
+        """
+        Initialize identity index
+
+        Args:
+            db_file: Path to the SQLite database file
+        """
+        self.db_file = db_file
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the database on first use (caller holds the lock)"""
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_file, check_same_thread=False)
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS identities (
+                    identity TEXT PRIMARY KEY,
+                    size INTEGER,
+                    mtime_ns INTEGER,
+                    file_path TEXT,
+                    sha256 TEXT,
+                    uploaded_at REAL
+                );
+                CREATE INDEX IF NOT EXISTS idx_identities_uploaded ON identities(uploaded_at);
+            """)
+            with self._conn:
+                self._conn.execute("DELETE FROM identities WHERE uploaded_at < ?", (time.time() - self.MAX_AGE,))
+        return self._conn
+
+    def is_uploaded(self, identity: Optional[FileIdentity]) -> bool:
+        """
+        Check whether this exact file was uploaded, under any name
+
+        Args:
+            identity: Identity from file_identity or identity_of
+
+        Returns:
+            True if the identity was recorded with the same size and mtime
+        """
+        if identity is None:
+            return False
+
+        key, size, mtime_ns = identity
+        try:
+            with self._lock:
+                row = self._connection().execute(
+                    "SELECT 1 FROM identities WHERE identity = ? AND size = ? AND mtime_ns = ?",
+                    (key, size, mtime_ns)
+                ).fetchone()
+            return row is not None
+
+        except Exception as e:
+            logger.error(f"Error looking up file identity: {e}")
+            return False
+
+    def record(self, identity: Optional[FileIdentity], file_path: str, sha256: str = "") -> None:
+        """
+        Remember an uploaded file
+
+        Args:
+            identity: Identity of the content that was uploaded
+            file_path: Path it was uploaded from
+            sha256: Hex digest of the uploaded content
+        """
+        if identity is None:
+            return
+
+        try:
+            with self._lock:
+                conn = self._connection()
+                with conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO identities (identity, size, mtime_ns, file_path, sha256, uploaded_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        (*identity, file_path, sha256, time.time())
+                    )
+        except Exception as e:
+            logger.error(f"Error recording file identity: {e}")
+
+    def moved(self, identity: Optional[FileIdentity], file_path: str) -> None:
+        """
+        Update the path of an uploaded file after a rename
+
+        Args:
+            identity: Identity of the renamed file
+            file_path: New path
+        """
+        if identity is None:
+            return
+
+        try:
+            with self._lock:
+                conn = self._connection()
+                with conn:
+                    conn.execute("UPDATE identities SET file_path = ? WHERE identity = ?", (file_path, identity[0]))
+        except Exception as e:
+            logger.error(f"Error updating file identity: {e}")
+
+    def close(self) -> None:
+        """Close the database"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,317 @@
+"""
+Rolling per-character zip archives for uploaded mail
+"""
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import logging
+import zipfile
+import threading
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class MailArchive:
+    """
+    Move uploaded mail out of the watched folders into compressed archives
+
+    Files are batched per character into rolling zip archives under
+    archive_dir/<character>/. A SQLite index maps each original path to its
+    archive and member, so archived mail can still be read for re-uploads.
+    Originals are removed only after their batch is written and indexed.
+    """
+
+    BATCH_SIZE = 200  # files that trigger an immediate flush
+    FLUSH_INTERVAL = 30  # seconds between flushes of smaller batches
+    MAX_MEMBERS = 5000  # files per archive before rolling to the next
+    MAX_BYTES = 64 * 1024 * 1024  # uncompressed bytes per archive before rolling
+
+    COLUMNS = ("path_key", "file_path", "character", "sha256", "archive", "member", "size", "archived_at")
+
+    def __init__(self, archive_dir: str = "archive"):
+        """
+        Initialize mail archive
+
+        Args:
+            archive_dir: Directory holding the archives and their index
+        """
+        self.archive_dir = archive_dir
+        self._pending: List[tuple[str, str, str]] = []  # (file_path, character, sha256)
+        self._cond = threading.Condition()
+        self._lock = threading.Lock()  # guards the index and the archive files
+        self._conn: Optional[sqlite3.Connection] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the index on first use (caller holds the lock)"""
+        if self._conn is None:
+            os.makedirs(self.archive_dir, exist_ok=True)
+            self._conn = sqlite3.connect(os.path.join(self.archive_dir, "index.db"), check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS archived (
+                    path_key TEXT PRIMARY KEY,
+                    file_path TEXT NOT NULL,
+                    character TEXT,
+                    sha256 TEXT,
+                    archive TEXT,
+                    member TEXT,
+                    size INTEGER,
+                    archived_at REAL
+                );
+                CREATE INDEX IF NOT EXISTS idx_archived_sha256 ON archived(sha256);
+                CREATE INDEX IF NOT EXISTS idx_archived_character ON archived(character, archive);
+            """)
+        return self._conn
+
+    @staticmethod
+    def _path_key(file_path: str) -> str:
+        """Normalize a path so lookups match however it was spelled"""
+        return os.path.normcase(os.path.abspath(file_path))
+
+    def start(self) -> None:
+        """Start the background flush thread"""
+        if self._thread is not None:
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._flush_loop,
+            name="MailArchiver",
+            daemon=True
+        )
+        self._thread.start()
+
+    def close(self) -> None:
+        """Archive everything still batched and close the index"""
+        self._stop_event.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+
+        self.flush()
+
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def add(self, file_path: str, character: str, sha256: str = "") -> None:
+        """
+        Batch an uploaded file for archiving
+
+        Args:
+            file_path: Path of the uploaded mail file
+            character: Character the mail belongs to
+            sha256: Hex digest of the uploaded content; the file is left
+                alone if it changed since
+        """
+        with self._cond:
+            self._pending.append((file_path, character, sha256))
+            if len(self._pending) >= self.BATCH_SIZE:
+                self._cond.notify()
+
+    def _flush_loop(self) -> None:
+        """Flush batches when they fill up or every FLUSH_INTERVAL seconds"""
+        while not self._stop_event.is_set():
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: len(self._pending) >= self.BATCH_SIZE or self._stop_event.is_set(),
+                    timeout=self.FLUSH_INTERVAL
+                )
+            if self._stop_event.is_set():
+                return
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        Archive every batched file now
+
+        Returns:
+            Number of files archived
+        """
+        with self._cond:
+            batch, self._pending = self._pending, []
+        if not batch:
+            return 0
+
+        by_character: Dict[str, List[tuple[str, str]]] = {}
+        for file_path, character, sha256 in batch:
+            by_character.setdefault(character, []).append((file_path, sha256))
+
+        archived = 0
+        for character, items in by_character.items():
+            try:
+                archived += self._archive_batch(character, items)
+            except Exception as e:
+                logger.error(f"Error archiving mail for {character}: {e}", exc_info=True)
+
+        if archived:
+            logger.info(f"Archived {archived} mail files")
+        return archived
+
+    def _archive_batch(self, character: str, items: List[tuple[str, str]]) -> int:
+        """Write one character's files to its current archive, index them, then remove them"""
+        rows = []
+
+        with self._lock:
+            conn = self._connection()
+            index, members, size = self._current_archive(conn, character)
+            archive = zip_file = None
+
+            try:
+                for file_path, sha256 in items:
+                    try:
+                        with open(file_path, 'rb') as f:
+                            raw = f.read()
+                        mtime = os.path.getmtime(file_path)
+                    except OSError:
+                        continue  # already gone
+
+                    digest = hashlib.sha256(raw).hexdigest()
+                    if sha256 and digest != sha256:
+                        logger.info(f"Not archiving {file_path}, it changed after upload")
+                        continue
+
+                    # Roll over to a new archive when the current one is full,
+                    # including the newest archive left full by an earlier flush
+                    if members >= self.MAX_MEMBERS or size >= self.MAX_BYTES:
+                        if zip_file is not None:
+                            zip_file.close()
+                            zip_file = None
+                        index, members, size = index + 1, 0, 0
+
+                    if zip_file is None:
+                        archive, zip_file = self._open_archive(character, index)
+                        if zip_file is None:
+                            index += 1
+                            archive, zip_file = self._open_archive(character, index)
+
+                    member = f"{digest[:16]}_{os.path.basename(file_path)}"
+                    info = zipfile.ZipInfo(member, date_time=time.localtime(mtime)[:6])
+                    info.compress_type = zipfile.ZIP_DEFLATED
+                    zip_file.writestr(info, raw)
+
+                    members += 1
+                    size += len(raw)
+                    rows.append((
+                        self._path_key(file_path), file_path, character, digest,
+                        archive, member, len(raw), time.time()
+                    ))
+            finally:
+                if zip_file is not None:
+                    zip_file.close()
+
+            if not rows:
+                return 0
+
+            with conn:
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO archived ({', '.join(self.COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * len(self.COLUMNS))})",
+                    rows
+                )
+
+        # Only remove originals once they are safely archived and indexed
+        for row in rows:
+            try:
+                os.remove(row[1])
+            except OSError as e:
+                logger.warning(f"Archived {row[1]} but could not remove it: {e}")
+
+        return len(rows)
+
+    def _current_archive(self, conn: sqlite3.Connection, character: str) -> tuple[int, int, int]:
+        """Get (index, members, bytes) of a character's newest archive (caller holds the lock)"""
+        row = conn.execute(
+            "SELECT archive, COUNT(*), COALESCE(SUM(size), 0) FROM archived "
+            "WHERE character = ? GROUP BY archive ORDER BY archive DESC LIMIT 1",
+            (character,)
+        ).fetchone()
+        if row is None:
+            return 1, 0, 0
+
+        match = re.search(r"-(\d+)\.zip$", row[0])
+        return (int(match.group(1)) if match else 1), row[1], row[2]
+
+    def _open_archive(self, character: str, index: int) -> tuple[str, Optional[zipfile.ZipFile]]:
+        """
+        Open a character's archive for appending (caller holds the lock)
+
+        Returns:
+            Tuple of (archive path relative to archive_dir, open zip file or
+            None if the existing file is damaged)
+        """
+        folder = re.sub(r"[^\w\-. ]", "_", character).strip(" .") or "unknown"
+        archive = os.path.join(folder, f"{folder}-{index:04d}.zip")
+        full_path = os.path.join(self.archive_dir, archive)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+
+        try:
+            return archive, zipfile.ZipFile(full_path, 'a', compression=zipfile.ZIP_DEFLATED)
+        except zipfile.BadZipFile:
+            logger.error(f"Archive {full_path} is damaged, starting a new one")
+            return archive, None
+
+    def lookup(self, file_path: str) -> Optional[Dict[str, Any]]:
+        """
+        Find where a mail file was archived
+
+        Args:
+            file_path: Original path of the mail file
+
+        Returns:
+            Index row as a dictionary, or None if it was not archived
+        """
+        try:
+            with self._lock:
+                row = self._connection().execute(
+                    f"SELECT {', '.join(self.COLUMNS)} FROM archived WHERE path_key = ?",
+                    (self._path_key(file_path),)
+                ).fetchone()
+            return dict(row) if row else None
+
+        except Exception as e:
+            logger.error(f"Error looking up archived mail: {e}")
+            return None
+
+    def read(self, file_path: str) -> Optional[bytes]:
+        """
+        Get the content of an archived mail file
+
+        Args:
+            file_path: Original path of the mail file
+
+        Returns:
+            File content, or None if it was not archived
+        """
+        try:
+            with self._lock:
+                row = self._connection().execute(
+                    "SELECT archive, member FROM archived WHERE path_key = ?",
+                    (self._path_key(file_path),)
+                ).fetchone()
+                if row is None:
+                    return None
+
+                with zipfile.ZipFile(os.path.join(self.archive_dir, row['archive'])) as zip_file:
+                    return zip_file.read(row['member'])
+
+        except Exception as e:
+            logger.error(f"Error reading archived mail {file_path}: {e}")
+            return None
+
+    def count(self) -> int:
+        """Get the number of archived files"""
+        try:
+            with self._lock:
+                return self._connection().execute("SELECT COUNT(*) FROM archived").fetchone()[0]
+        except Exception as e:
+            logger.error(f"Error counting archived mail: {e}")
+            return 0
@@ -0,0 +1,184 @@
+"""
+Find SWG mail directories on local drives
+"""
+import os
+import sys
+import queue
+import string
+import logging
+import threading
+from typing import Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def candidate_roots(known_paths: Iterable[str] = ()) -> List[str]:
+    """
+    Get directories worth scanning for SWG installs
+
+    Args:
+        known_paths: Already configured mail paths; their profiles folders are scanned first
+
+    Returns:
+        List of existing root directories
+    """
+    roots = []
+
+    # The profiles folder of a configured character usually holds the others
+    for path in known_paths:
+        parts = os.path.normpath(path).split(os.sep)
+        lowered = [part.lower() for part in parts]
+        if "profiles" in lowered:
+            index = len(lowered) - 1 - lowered[::-1].index("profiles")
+            roots.append(os.sep.join(parts[:index + 1]) or os.sep)
+
+    if sys.platform == 'win32':
+        roots += [f"{letter}:\\" for letter in string.ascii_uppercase if os.path.isdir(f"{letter}:\\")]
+    roots.append(os.path.expanduser("~"))
+
+    return list(dict.fromkeys(root for root in roots if root))
+
+
+class MailDiscovery:
+    """
+    Scan directory trees in parallel for mail_<Character> folders
+
+    Outside of a profiles folder only a few levels are searched and system
+    or tooling directories are skipped; inside one, every server and
+    account folder is listed. Symlinks are not followed.
+    """
+
+    WORKERS = 8
+    SEARCH_DEPTH = 5  # levels below a root searched for a profiles folder
+    PROFILE_DEPTH = 3  # levels below profiles searched for mail folders
+    SKIP_DIRS = {
+        "windows", "windows.old", "programdata", "appdata", "recovery", "perflogs",
+        "system volume information", "$recycle.bin", "windowsapps", "node_modules",
+        "__pycache__", "site-packages",
+    }
+
+    def __init__(self, roots: Iterable[str]):
+        """
+        Initialize discovery
+
+        Args:
+            roots: Directories to scan
+        """
+        self.roots = list(roots)
+        self.found: Dict[str, Dict[str, str]] = {}  # normalized path -> {"path", "label"}
+        self.scanned = 0
+        self._profiles_seen = set()
+        self._lock = threading.Lock()
+        self._cancel_event = threading.Event()
+
+    def cancel(self) -> None:
+        """Stop scanning; scan() returns what was found so far"""
+        self._cancel_event.set()
+
+    @property
+    def is_cancelled(self) -> bool:
+        """Whether cancel() was called"""
+        return self._cancel_event.is_set()
+
+    def scan(self, on_found: Optional[Callable[[Dict[str, str]], None]] = None) -> List[Dict[str, str]]:
+        """
+        Scan every root and wait for the result
+
+        Args:
+            on_found: Optional callback with each new {"path", "label"} entry, called from worker threads
+
+        Returns:
+            Found mail directories as {"path", "label"} entries, sorted by label
+        """
+        work: queue.Queue = queue.Queue()
+        for root in self.roots:
+            if os.path.basename(os.path.normpath(root)).lower() == "profiles":
+                self._queue_profiles(root, work)
+            else:
+                work.put((root, 0, False))
+
+        threads = []
+        for i in range(self.WORKERS):
+            thread = threading.Thread(
+                target=self._worker_loop,
+                args=(work, on_found),
+                name=f"MailDiscovery-{i + 1}",
+                daemon=True
+            )
+            thread.start()
+            threads.append(thread)
+
+        work.join()
+        for _ in threads:
+            work.put(None)
+
+        logger.info(
+            f"Mail discovery {'cancelled' if self.is_cancelled else 'finished'}: "
+            f"{len(self.found)} found in {self.scanned} directories"
+        )
+        return sorted(self.found.values(), key=lambda entry: entry["label"].lower())
+
+    def _worker_loop(self, work: queue.Queue, on_found) -> None:
+        """List directories from the work queue until told to stop"""
+        while True:
+            item = work.get()
+            if item is None:
+                return
+
+            try:
+                if not self.is_cancelled:
+                    self._scan_dir(*item, work, on_found)
+            except Exception as e:
+                logger.debug(f"Error scanning {item[0]}: {e}")
+            finally:
+                work.task_done()
+
+    def _scan_dir(self, path: str, depth: int, in_profiles: bool, work: queue.Queue, on_found) -> None:
+        """List one directory, record mail folders and queue subdirectories worth visiting"""
+        try:
+            with os.scandir(path) as entries:
+                subdirs = [entry for entry in entries if entry.is_dir(follow_symlinks=False)]
+        except OSError:
+            return  # unreadable or vanished
+
+        with self._lock:
+            self.scanned += 1
+
+        for entry in subdirs:
+            name = entry.name.lower()
+
+            if in_profiles and name.startswith("mail_") and len(name) > 5:
+                self._record(entry.path, entry.name[5:], on_found)
+            elif name == "profiles" and not in_profiles:
+                self._queue_profiles(entry.path, work)
+            elif in_profiles:
+                if depth < self.PROFILE_DEPTH:
+                    work.put((entry.path, depth + 1, True))
+            elif depth < self.SEARCH_DEPTH and not self._skip(name):
+                work.put((entry.path, depth + 1, False))
+
+    def _queue_profiles(self, path: str, work: queue.Queue) -> None:
+        """Queue a profiles folder unless another root already reached it"""
+        key = os.path.normcase(os.path.abspath(path))
+        with self._lock:
+            if key in self._profiles_seen:
+                return
+            self._profiles_seen.add(key)
+        work.put((path, 0, True))
+
+    def _skip(self, name: str) -> bool:
+        """Check whether a directory outside profiles can be pruned"""
+        return name.startswith((".", "$")) or name in self.SKIP_DIRS
+
+    def _record(self, path: str, character: str, on_found) -> None:
+        """Remember a mail folder once"""
+        key = os.path.normcase(os.path.abspath(path))
+        entry = {"path": path, "label": character}
+
+        with self._lock:
+            if key in self.found:
+                return
+            self.found[key] = entry
+
+        if on_found:
+            on_found(entry)
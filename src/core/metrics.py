@@ -0,0 +1,103 @@
+"""
+Lightweight in-process metrics for diagnostics and tuning
+"""
+import time
+import logging
+import threading
+from collections import deque
+from typing import Dict, Any, List
+
+logger = logging.getLogger(__name__)
+
+
+class Metrics:
+    """Thread-safe counters, value summaries and a log of recent events"""
+
+    MAX_EVENTS = 200
+
+    def __init__(self):
+        """Initialize metrics"""
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+        self._summaries: Dict[str, Dict[str, float]] = {}
+        self._events: deque = deque(maxlen=self.MAX_EVENTS)
+
+    def increment(self, name: str, amount: float = 1) -> None:
+        """
+        Add to a counter
+
+        Args:
+            name: Counter name
+            amount: Amount to add
+        """
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def observe(self, name: str, value: float) -> None:
+        """
+        Record one value in a count/sum/min/max/last summary
+
+        Args:
+            name: Summary name
+            value: Observed value
+        """
+        with self._lock:
+            summary = self._summaries.get(name)
+            if summary is None:
+                self._summaries[name] = {
+                    'count': 1, 'sum': value, 'min': value, 'max': value, 'last': value
+                }
+            else:
+                summary['count'] += 1
+                summary['sum'] += value
+                summary['min'] = min(summary['min'], value)
+                summary['max'] = max(summary['max'], value)
+                summary['last'] = value
+
+    def event(self, name: str, **fields: Any) -> None:
+        """
+        Append a structured event to the recent events log
+
+        Args:
+            name: Event name
+            fields: Event details
+        """
+        with self._lock:
+            self._events.append({'time': time.time(), 'event': name, **fields})
+        logger.debug(f"{name}: {fields}")
+
+    def events(self, name: str = "") -> List[Dict[str, Any]]:
+        """
+        Get recent events, oldest first
+
+        Args:
+            name: Only return events with this name
+
+        Returns:
+            List of event dictionaries
+        """
+        with self._lock:
+            return [e for e in self._events if not name or e['event'] == name]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get a copy of all counters and summaries
+
+        Returns:
+            Dictionary with 'counters' and 'summaries' (each summary has an 'avg')
+        """
+        with self._lock:
+            summaries = {}
+            for name, summary in self._summaries.items():
+                summaries[name] = {**summary, 'avg': summary['sum'] / summary['count']}
+            return {'counters': dict(self._counters), 'summaries': summaries}
+
+    def format_summary(self) -> str:
+        """Format all metrics as one line per metric"""
+        snapshot = self.snapshot()
+        lines = [f"{name}={value:g}" for name, value in sorted(snapshot['counters'].items())]
+        for name, s in sorted(snapshot['summaries'].items()):
+            lines.append(
+                f"{name}: n={s['count']:g} avg={s['avg']:.1f} min={s['min']:.1f} max={s['max']:.1f}"
+            )
+        return "\n".join(lines)
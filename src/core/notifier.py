@@ -0,0 +1,174 @@
+"""
+Coalesced, rate-limited desktop notifications
+"""
+import time
+import logging
+import threading
+from collections import deque
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationAggregator:
+    """
+    Collect upload outcomes and turn them into a few summary notifications
+
+    Outcomes are only counted on the calling thread; formatting and
+    sending happen on a dispatch thread, so upload workers never wait on
+    the notification backend.
+    """
+
+    WINDOW = 10  # seconds to collect outcomes after the first one arrives
+    MAX_PER_MINUTE = 3  # notifications shown per rolling minute
+    DEDUP_INTERVAL = 600  # seconds before an identical error is shown again
+    MAX_ERRORS_LISTED = 3
+    MAX_LENGTH = 250  # Windows truncates balloon text at 256 characters
+
+    def __init__(self, send: Callable[[str, str], None]):
+        """
+        Initialize aggregator
+
+        Args:
+            send: Called with (title, message) on the dispatch thread
+        """
+        self.send = send
+        self._cond = threading.Condition()
+        self._uploaded = 0
+        self._failed = 0
+        self._characters = set()
+        self._errors: Dict[str, int] = {}  # message -> count in this window
+        self._sent_at: deque = deque()  # monotonic times of recent notifications
+        self._error_sent_at: Dict[str, float] = {}
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start the dispatch thread"""
+        if self._thread is not None:
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._dispatch_loop,
+            name="NotificationDispatch",
+            daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the dispatch thread, dropping anything not yet shown"""
+        self._stop_event.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def add_upload(self, character: str) -> None:
+        """
+        Count a successful upload
+
+        Args:
+            character: Character the mail belonged to
+        """
+        with self._cond:
+            self._uploaded += 1
+            self._characters.add(character)
+            self._cond.notify()
+
+    def add_failure(self, character: str, message: str) -> None:
+        """
+        Count a failed upload
+
+        Args:
+            character: Character the mail belonged to
+            message: Error message, identical messages are merged
+        """
+        with self._cond:
+            self._failed += 1
+            self._characters.add(character)
+            self._errors[message] = self._errors.get(message, 0) + 1
+            self._cond.notify()
+
+    def _has_pending(self) -> bool:
+        """Check whether outcomes are waiting (caller holds the lock)"""
+        return bool(self._uploaded or self._failed)
+
+    def _dispatch_loop(self) -> None:
+        """Wait for outcomes, coalesce a window of them and send a summary"""
+        while not self._stop_event.is_set():
+            with self._cond:
+                self._cond.wait_for(lambda: self._has_pending() or self._stop_event.is_set())
+
+            # Let the rest of a burst arrive
+            if self._stop_event.wait(self.WINDOW):
+                break
+
+            # Hold back while over the per-minute cap; outcomes keep accumulating
+            while not self._stop_event.is_set():
+                now = time.monotonic()
+                while self._sent_at and now - self._sent_at[0] >= 60:
+                    self._sent_at.popleft()
+                if len(self._sent_at) < self.MAX_PER_MINUTE:
+                    break
+                self._stop_event.wait(60 - (now - self._sent_at[0]))
+
+            if self._stop_event.is_set():
+                break
+
+            with self._cond:
+                uploaded, failed = self._uploaded, self._failed
+                characters, errors = len(self._characters), self._errors
+                self._uploaded = self._failed = 0
+                self._characters = set()
+                self._errors = {}
+
+            notification = self._format(uploaded, failed, characters, errors)
+            if notification is None:
+                continue
+
+            self._sent_at.append(time.monotonic())
+            try:
+                self.send(*notification)
+            except Exception as e:
+                logger.error(f"Error showing notification: {e}", exc_info=True)
+
+    def _format(self, uploaded: int, failed: int, characters: int, errors: Dict[str, int]) -> Optional[tuple[str, str]]:
+        """
+        Build the (title, message) for one window
+
+        Errors shown within DEDUP_INTERVAL are counted but not listed
+        again; a window with only such errors is not shown at all.
+
+        Returns:
+            Tuple of (title, message), or None if there is nothing new to show
+        """
+        now = time.monotonic()
+        new_errors = [
+            (message, count) for message, count in errors.items()
+            if now - self._error_sent_at.get(message, float('-inf')) >= self.DEDUP_INTERVAL
+        ]
+        if not uploaded and not new_errors:
+            return None
+
+        for message, _ in new_errors:
+            self._error_sent_at[message] = now
+        for message in [m for m, at in self._error_sent_at.items() if now - at >= self.DEDUP_INTERVAL]:
+            del self._error_sent_at[message]
+
+        from_text = f" from {characters} character{'' if characters == 1 else 's'}" if characters > 1 else ""
+        if uploaded:
+            title = "Mail Uploaded" if not failed else "Mail Uploaded With Errors"
+            text = f"Uploaded {uploaded} mail{'' if uploaded == 1 else 's'}{from_text}"
+            if failed:
+                text += f", {failed} failed"
+        else:
+            title = "Upload Failed"
+            text = f"{failed} upload{'' if failed == 1 else 's'} failed{from_text}"
+
+        lines = [text]
+        for message, count in new_errors[:self.MAX_ERRORS_LISTED]:
+            lines.append(f"{message} (x{count})" if count > 1 else message)
+
+        return title, "\n".join(lines)[:self.MAX_LENGTH]
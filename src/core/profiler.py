@@ -0,0 +1,228 @@
+"""
+Opt-in profiling, memory tracing and thread dumps for diagnosing slowdowns
+"""
+import io
+import os
+import sys
+import time
+import pstats
+import cProfile
+import logging
+import threading
+import traceback
+import tracemalloc
+from typing import Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ENV_VAR = "SWG_TRACKER_PROFILE"
+
+
+def profiling_requested() -> bool:
+    """Check whether profiling was requested through the environment"""
+    return os.environ.get(PROFILE_ENV_VAR, "").strip().lower() not in ("", "0", "false", "no", "off")
+
+
+class Profiler:
+    """
+    Capture cProfile stats, tracemalloc growth and thread stacks into a report directory
+
+    Nothing is hooked until an instance exists: wrapped callables are
+    swapped in by the owner and swapped back after stop(), so there is no
+    cost while profiling is off.
+    """
+
+    SNAPSHOT_INTERVAL = 300  # seconds between memory snapshots and thread dumps
+    TRACE_FRAMES = 10  # stack depth recorded per allocation
+    TOP_STATS = 30  # lines per report section
+    STOP_WAIT = 5  # seconds to wait for profiled calls to finish on stop
+
+    def __init__(self, report_root: str = "profiles"):
+        """
+        Start profiling
+
+        Args:
+            report_root: Directory under which a timestamped report directory is created
+        """
+        self.report_dir = os.path.join(report_root, time.strftime("%Y%m%d-%H%M%S"))
+        os.makedirs(self.report_dir, exist_ok=True)
+
+        self._lock = threading.Condition()
+        self._profiles: Dict[str, List[cProfile.Profile]] = {}
+        self._local = threading.local()
+        self._active_calls = 0
+        self._skipped_calls = 0
+        self._snapshot_index = 0
+        self._stop_event = threading.Event()
+
+        self._owns_tracemalloc = not tracemalloc.is_tracing()
+        if self._owns_tracemalloc:
+            tracemalloc.start(self.TRACE_FRAMES)
+        self._baseline = tracemalloc.take_snapshot()
+        self._previous = self._baseline
+
+        self._thread = threading.Thread(
+            target=self._snapshot_loop,
+            name="ProfilerSnapshots",
+            daemon=True
+        )
+        self._thread.start()
+
+        logger.info(f"Profiling started, writing reports to {self.report_dir}")
+
+    def wrap(self, name: str, func: Callable) -> Callable:
+        """
+        Get a version of func that profiles each call on the calling thread
+
+        Stats of all threads running the wrapper are merged under name.
+
+        Args:
+            name: Report name, e.g. 'upload_workers'
+            func: Callable to profile
+
+        Returns:
+            Wrapped callable
+        """
+        def profiled(*args, **kwargs):
+            profile = self._thread_profile(name)
+            with self._lock:
+                self._active_calls += 1
+
+            try:
+                try:
+                    profile.enable()
+                except ValueError:
+                    # Python 3.12+ allows one active cProfile per process;
+                    # calls overlapping another profiled call run unprofiled
+                    with self._lock:
+                        self._skipped_calls += 1
+                    return func(*args, **kwargs)
+
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    profile.disable()
+
+            finally:
+                with self._lock:
+                    self._active_calls -= 1
+                    self._lock.notify_all()
+
+        profiled.__wrapped__ = func
+        return profiled
+
+    def _thread_profile(self, name: str) -> cProfile.Profile:
+        """Get the calling thread's profile for a report name"""
+        profiles = getattr(self._local, 'profiles', None)
+        if profiles is None:
+            profiles = self._local.profiles = {}
+
+        profile = profiles.get(name)
+        if profile is None:
+            profile = profiles[name] = cProfile.Profile()
+            with self._lock:
+                self._profiles.setdefault(name, []).append(profile)
+        return profile
+
+    def _snapshot_loop(self) -> None:
+        """Write memory diffs and thread dumps periodically"""
+        while not self._stop_event.wait(self.SNAPSHOT_INTERVAL):
+            self.write_snapshot()
+
+    def write_snapshot(self) -> None:
+        """Write a tracemalloc growth report and a thread dump now"""
+        try:
+            self._snapshot_index += 1
+            snapshot = tracemalloc.take_snapshot()
+            self._write_memory_report(snapshot)
+            self._previous = snapshot
+            self._write_thread_dump()
+        except Exception as e:
+            logger.error(f"Error writing profiling snapshot: {e}", exc_info=True)
+
+    def _write_memory_report(self, snapshot: tracemalloc.Snapshot) -> None:
+        """Write top allocation growth since the last snapshot and since start"""
+        current, peak = tracemalloc.get_traced_memory()
+        lines = [
+            f"Snapshot {self._snapshot_index} at {time.strftime('%Y-%m-%d %H:%M:%S')}",
+            f"Traced memory: {current / 1024:.0f} KB (peak {peak / 1024:.0f} KB)",
+            "",
+            "Top growth since previous snapshot:",
+        ]
+        lines += [str(stat) for stat in snapshot.compare_to(self._previous, 'lineno')[:self.TOP_STATS]]
+        lines += ["", "Top growth since profiling started:"]
+        lines += [str(stat) for stat in snapshot.compare_to(self._baseline, 'lineno')[:self.TOP_STATS]]
+
+        self._write(f"memory-{self._snapshot_index:03d}.txt", "\n".join(lines))
+
+    def _write_thread_dump(self) -> None:
+        """Write the current stack of every thread"""
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        lines = []
+        for ident, frame in sys._current_frames().items():
+            lines.append(f"Thread {names.get(ident, '?')} ({ident}):")
+            lines.append("".join(traceback.format_stack(frame)))
+
+        self._write(f"threads-{self._snapshot_index:03d}.txt", "\n".join(lines))
+
+    def stop(self) -> str:
+        """
+        Stop profiling and write the final reports
+
+        Call after swapping wrapped callables back out.
+
+        Returns:
+            The report directory
+        """
+        self._stop_event.set()
+        self._thread.join(timeout=5)
+
+        with self._lock:
+            self._lock.wait_for(lambda: self._active_calls == 0, timeout=self.STOP_WAIT)
+            profiles = {name: list(items) for name, items in self._profiles.items()}
+            skipped = self._skipped_calls
+
+        self.write_snapshot()
+
+        for name, items in profiles.items():
+            self._write_profile(name, items)
+        if skipped:
+            logger.info(f"{skipped} overlapping calls were not profiled")
+
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+
+        logger.info(f"Profiling stopped, reports in {self.report_dir}")
+        return self.report_dir
+
+    def _write_profile(self, name: str, profiles: List[cProfile.Profile]) -> None:
+        """Merge per-thread profiles and write binary and text reports"""
+        try:
+            stats = None
+            for profile in profiles:
+                profile.create_stats()
+                if not profile.stats:
+                    continue
+                if stats is None:
+                    stats = pstats.Stats(profile)
+                else:
+                    stats.add(profile)
+
+            if stats is None:
+                return
+
+            stats.dump_stats(os.path.join(self.report_dir, f"{name}.prof"))
+
+            text = io.StringIO()
+            stats.stream = text
+            stats.sort_stats('cumulative').print_stats(self.TOP_STATS)
+            stats.sort_stats('tottime').print_stats(self.TOP_STATS)
+            self._write(f"{name}.txt", text.getvalue())
+
+        except Exception as e:
+            logger.error(f"Error writing {name} profile: {e}", exc_info=True)
+
+    def _write(self, file_name: str, text: str) -> None:
+        """Write one report file"""
+        with open(os.path.join(self.report_dir, file_name), 'w', encoding='utf-8') as f:
+            f.write(text)
@@ -0,0 +1,238 @@
+"""
+Upload bandwidth cap and the schedules deciding when it applies
+"""
+import os
+import sys
+import time
+import logging
+import subprocess
+import threading
+from collections import deque
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+GAME_PROCESSES = ("swgclient_r.exe", "swgclient.exe", "swgemu.exe")
+
+
+def game_running() -> bool:
+    """
+    Check whether a Star Wars Galaxies client is running
+
+    Returns:
+        True if a known client process was found
+    """
+    try:
+        if sys.platform == 'win32':
+            output = subprocess.run(
+                ["tasklist", "/NH", "/FO", "CSV"],
+                capture_output=True,
+                text=True,
+                timeout=10,
+                creationflags=subprocess.CREATE_NO_WINDOW
+            ).stdout.lower()
+            return any(f'"{name}"' in output for name in GAME_PROCESSES)
+
+        # Wine and Proton clients show up under their executable name
+        for pid in os.listdir("/proc"):
+            if not pid.isdigit():
+                continue
+            try:
+                with open(f"/proc/{pid}/cmdline", 'rb') as f:
+                    cmdline = f.read().lower()
+            except OSError:
+                continue
+            if any(name.encode() in cmdline for name in GAME_PROCESSES):
+                return True
+        return False
+
+    except Exception as e:
+        logger.debug(f"Cannot list processes: {e}")
+        return False
+
+
+def parse_hours(text: str) -> Optional[tuple[int, int]]:
+    """
+    Parse an hour window such as "18-23"
+
+    Args:
+        text: Start and end hour (0-24), the end is exclusive and may wrap past midnight
+
+    Returns:
+        Tuple of (start, end), or None if the text is not a window
+    """
+    try:
+        start, end = (int(part) for part in text.split("-"))
+    except ValueError:
+        return None
+    if not (0 <= start <= 24 and 0 <= end <= 24) or start == end:
+        return None
+    return start, end
+
+
+class UploadSchedule:
+    """
+    Decide the upload cap at any moment
+
+    Modes:
+        off: never capped
+        always: always capped
+        game_running: capped while the game client runs, full speed otherwise
+        hours: capped during a daily hour window
+    """
+
+    MODES = ("off", "always", "game_running", "hours")
+    GAME_CHECK_INTERVAL = 30  # seconds a game detection is reused; listing processes is not free
+
+    def __init__(
+        self,
+        mode: str = "off",
+        limit_kbps: float = 0,
+        hours: str = "",
+        is_game_running: Callable[[], bool] = game_running
+    ):
+        """
+        Initialize schedule
+
+        Args:
+            mode: One of MODES
+            limit_kbps: Cap in KB/s while it applies; 0 holds uploads
+            hours: Window for the hours mode, e.g. "18-23"
+            is_game_running: Detects the game client for the game_running mode
+        """
+        self.mode = mode if mode in self.MODES else "off"
+        self.limit_kbps = max(0.0, limit_kbps)
+        self.hours = parse_hours(hours)
+        self.is_game_running = is_game_running
+        self._game_running = False
+        self._game_checked_at: Optional[float] = None  # monotonic time
+
+    def limit(self) -> tuple[Optional[float], str]:
+        """
+        Get the cap that applies now
+
+        Returns:
+            Tuple of (bytes per second or None when unlimited, reason)
+        """
+        if self.mode == "always":
+            return self.limit_kbps * 1024, "always"
+
+        if self.mode == "game_running":
+            now = time.monotonic()
+            if self._game_checked_at is None or now - self._game_checked_at >= self.GAME_CHECK_INTERVAL:
+                self._game_running = self.is_game_running()
+                self._game_checked_at = now
+            if self._game_running:
+                return self.limit_kbps * 1024, "game running"
+            return None, "game not running"
+
+        if self.mode == "hours" and self.hours:
+            start, end = self.hours
+            hour = time.localtime().tm_hour
+            inside = start <= hour < end if start < end else hour >= start or hour < end
+            if inside:
+                return self.limit_kbps * 1024, f"{start:02d}:00-{end:02d}:00"
+            return None, f"outside {start:02d}:00-{end:02d}:00"
+
+        return None, ""
+
+
+class ByteRateLimiter:
+    """
+    Token bucket limiting upload bytes per second across all workers
+
+    An upload larger than the bucket is let through once the bucket is
+    full and leaves it in debt, so later uploads wait until the average
+    is back under the rate. A rate of 0 holds every upload until the rate
+    changes.
+    """
+
+    BURST_SECONDS = 1.0  # a full bucket holds this many seconds of traffic
+    WINDOW = 10  # seconds of traffic averaged by effective_rate()
+
+    def __init__(self, rate: Optional[float] = None):
+        """
+        Initialize limiter
+
+        Args:
+            rate: Bytes per second, None for unlimited
+        """
+        self.rate = rate
+        self._tokens = self._capacity()
+        self._updated = time.monotonic()
+        self._sent: deque = deque()  # (monotonic time, bytes)
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def _capacity(self) -> float:
+        """Get the bucket size for the current rate"""
+        return (self.rate or 0) * self.BURST_SECONDS
+
+    def _refill(self, now: float) -> None:
+        """Add the tokens earned since the last update (caller holds the lock)"""
+        if self.rate:
+            self._tokens = min(self._capacity(), self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    @property
+    def is_holding(self) -> bool:
+        """Whether uploads are held completely"""
+        return self.rate == 0
+
+    def set_rate(self, rate: Optional[float]) -> None:
+        """
+        Change the rate; waiting uploads re-check immediately
+
+        Args:
+            rate: Bytes per second, None for unlimited, 0 to hold
+        """
+        with self._cond:
+            self._refill(time.monotonic())
+            self.rate = rate
+            self._tokens = min(self._tokens, self._capacity())
+            self._cond.notify_all()
+
+    def acquire(self, nbytes: int) -> bool:
+        """
+        Wait until nbytes may be sent
+
+        Args:
+            nbytes: Size of the upload
+
+        Returns:
+            True to send, False if the limiter was closed while waiting
+        """
+        with self._cond:
+            while not self._closed:
+                now = time.monotonic()
+                self._refill(now)
+
+                if self.rate is None or (self.rate and self._tokens >= min(nbytes, self._capacity())):
+                    if self.rate:
+                        self._tokens -= nbytes
+                    self._sent.append((now, nbytes))
+                    return True
+
+                # Sleep until enough tokens have accumulated, or until the rate changes
+                wait = (min(nbytes, self._capacity()) - self._tokens) / self.rate if self.rate else None
+                self._cond.wait(wait)
+            return False
+
+    def effective_rate(self) -> float:
+        """
+        Get the bytes per second let through recently
+
+        Returns:
+            Average over the last WINDOW seconds
+        """
+        with self._cond:
+            cutoff = time.monotonic() - self.WINDOW
+            while self._sent and self._sent[0][0] < cutoff:
+                self._sent.popleft()
+            return sum(nbytes for _, nbytes in self._sent) / self.WINDOW
+
+    def close(self) -> None:
+        """Release every waiting upload without sending"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
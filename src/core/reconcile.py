@@ -0,0 +1,120 @@
+"""
+Directory snapshots for finding mail the file watcher missed
+"""
+import os
+import time
+import logging
+from typing import Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class DirectorySnapshot:
+    """
+    Remember the files under a directory tree and report the ones added since
+
+    A directory is only listed again when its mtime changed, and only names
+    not seen before are stat'ed, so a pass over an unchanged tree costs one
+    stat per directory and a pass after new mail costs one listing of the
+    changed directory plus one stat per new file. Files younger than
+    SETTLE_TIME are left for the next pass, so reconciliation does not race
+    the watcher for mail that is still arriving.
+    """
+
+    SETTLE_TIME = 5  # seconds
+
+    def __init__(self, root: str, recursive: bool = True):
+        """
+        Initialize snapshot
+
+        Args:
+            root: Directory to snapshot
+            recursive: Include subdirectories, like the watcher does
+        """
+        self.root = root
+        self.recursive = recursive
+        # directory -> (mtime_ns, file names, subdirectory names); mtime -1 forces a new listing
+        self._dirs: Dict[str, tuple[int, Set[str], Set[str]]] = {}
+
+    def baseline(self) -> int:
+        """
+        Record the current contents without reporting them
+
+        Returns:
+            Number of files recorded
+        """
+        self._dirs.clear()
+        self._scan(self.root, None)
+        return sum(len(files) for _, files, _ in self._dirs.values())
+
+    def added(self) -> List[str]:
+        """
+        Find files that appeared since the last call
+
+        Returns:
+            Paths of new files, each reported once
+        """
+        found: List[str] = []
+        self._scan(self.root, found)
+        return found
+
+    def _scan(self, path: str, found: Optional[List[str]]) -> None:
+        """Update one directory and its subdirectories, appending new files to found"""
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            self._forget(path)
+            return
+
+        known = self._dirs.get(path)
+        if known is not None and known[0] == mtime_ns:
+            for name in known[2]:
+                self._scan(os.path.join(path, name), found)
+            return
+
+        try:
+            with os.scandir(path) as entries:
+                files, subdirs = set(), set()
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.add(entry.name)
+                    else:
+                        files.add(entry.name)
+        except OSError as e:
+            logger.debug(f"Cannot list {path}: {e}")
+            return
+
+        now = time.time()
+        settled = set(files)
+        if found is not None:
+            for name in files - (known[1] if known else set()):
+                file_path = os.path.join(path, name)
+                try:
+                    mtime = os.stat(file_path).st_mtime
+                except OSError:
+                    settled.discard(name)  # already gone
+                    continue
+                if now - mtime < self.SETTLE_TIME:
+                    settled.discard(name)
+                    continue
+                found.append(file_path)
+
+        # A directory changed within the settle time may change again in
+        # the same mtime tick, so list it again next pass
+        recent = now - mtime_ns / 1e9 < self.SETTLE_TIME or settled != files
+        self._dirs[path] = (-1 if recent else mtime_ns, settled, subdirs if self.recursive else set())
+
+        if known is not None:
+            for name in known[2] - subdirs:
+                self._forget(os.path.join(path, name))
+
+        if self.recursive:
+            for name in subdirs:
+                self._scan(os.path.join(path, name), found)
+
+    def _forget(self, path: str) -> None:
+        """Drop a vanished directory and everything below it"""
+        known = self._dirs.pop(path, None)
+        if known is not None:
+            for name in known[2]:
+                self._forget(os.path.join(path, name))
@@ -0,0 +1,392 @@
+"""
+Rate-limited, resumable re-upload of previously seen mail
+"""
+import os
+import json
+import time
+import logging
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional, Iterable
+from .history_store import HistoryStore
+from .upload_queue import UploadJob, character_for
+
+logger = logging.getLogger(__name__)
+
+
+class ReplayRequest:
+    """Which files to replay and how fast"""
+
+    __slots__ = ('label', 'since', 'until', 'status', 'rate', 'bundles')
+
+    DEFAULT_RATE = 60  # files per minute
+
+    def __init__(
+        self,
+        label: str = "",
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        status: Optional[str] = None,
+        rate: float = DEFAULT_RATE,
+        bundles: Optional[List[str]] = None
+    ):
+        """
+        Initialize replay request
+
+        Args:
+            label: Only files of this character (case-insensitive), all if empty
+            since: Only files detected or modified at or after this epoch time
+            until: Only files detected or modified before this epoch time
+            status: Only files with a history record of this status; when
+                unset, unrecorded files in the mail folders are included too
+            rate: Files submitted per minute
+            bundles: Export bundles to upload instead of selecting mail
+        """
+        self.label = label
+        self.since = since
+        self.until = until
+        self.status = status
+        self.rate = rate if rate and rate > 0 else self.DEFAULT_RATE
+        self.bundles = list(bundles) if bundles else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the request for checkpoints and the engine process"""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ReplayRequest':
+        """Restore a request serialized with to_dict"""
+        return cls(**{name: data.get(name) for name in cls.__slots__ if name in data})
+
+    def describe(self) -> str:
+        """Short human readable summary"""
+        if self.bundles:
+            return f"import of {len(self.bundles)} bundle{'' if len(self.bundles) == 1 else 's'}, {self.rate:g}/min"
+
+        parts = [self.label or "all characters"]
+        if self.since is not None or self.until is not None:
+            since = time.strftime("%Y-%m-%d", time.localtime(self.since)) if self.since is not None else "start"
+            until = time.strftime("%Y-%m-%d", time.localtime(self.until - 1)) if self.until is not None else "now"
+            parts.append(f"{since} to {until}")
+        if self.status:
+            parts.append(f"status {self.status}")
+        parts.append(f"{self.rate:g}/min")
+        return ", ".join(parts)
+
+
+def select_files(
+    request: ReplayRequest,
+    history_store: HistoryStore,
+    mail_paths: Iterable[tuple[str, str]]
+) -> List[tuple[str, str]]:
+    """
+    Pick the files a replay covers, oldest first
+
+    Args:
+        request: Replay filters
+        history_store: History to select recorded files from
+        mail_paths: Configured (path, label) pairs scanned for unrecorded files
+
+    Returns:
+        List of (file_path, label) pairs without duplicates
+    """
+    wanted = request.label.strip().lower()
+    selected: Dict[str, tuple[float, str, str]] = {}  # normalized path -> (time, path, label)
+
+    for row in history_store.files(request.since, request.until, request.status):
+        label = row['label'] or ""
+        if wanted and character_for(row['file_path'], label).lower() != wanted:
+            continue
+        key = os.path.normcase(os.path.abspath(row['file_path']))
+        selected.setdefault(key, (row['detected_at'] or 0, row['file_path'], label))
+
+    # Mail received before the history existed is only on disk
+    if not request.status:
+        for path, label in mail_paths:
+            if not path or (wanted and character_for(os.path.join(path, "x"), label).lower() != wanted):
+                continue
+            try:
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        if not entry.is_file():
+                            continue
+                        mtime = entry.stat().st_mtime
+                        if request.since is not None and mtime < request.since:
+                            continue
+                        if request.until is not None and mtime >= request.until:
+                            continue
+                        key = os.path.normcase(os.path.abspath(entry.path))
+                        selected.setdefault(key, (mtime, entry.path, label))
+            except OSError as e:
+                logger.warning(f"Cannot list {path} for replay: {e}")
+
+    return [(path, label) for _, path, label in sorted(selected.values())]
+
+
+class ReplayRunner:
+    """
+    Feed a list of files into the upload queue at a fixed rate
+
+    Replay jobs go to the backfill lane with force set, so live mail is
+    never delayed and earlier uploads do not suppress them. At most
+    MAX_AHEAD files are outstanding at once. The file list is saved once
+    when the replay starts and a checkpoint with the first unfinished
+    position is written regularly; a replay interrupted by exit or a crash
+    resumes from them on the next open.
+    """
+
+    MAX_AHEAD = 20  # submitted files not yet finished
+    CHECKPOINT_INTERVAL = 5  # seconds between checkpoint writes
+
+    def __init__(
+        self,
+        submit: Callable[[UploadJob], bool],
+        checkpoint_file: str = "replay.json",
+        on_progress: Optional[Callable[[int, int, bool], None]] = None
+    ):
+        """
+        Initialize replay runner
+
+        Args:
+            submit: Queues one job, returns False when no more work is accepted
+            checkpoint_file: Path of the resumable progress file; the file
+                list is saved next to it with a .files suffix
+            on_progress: Optional callback with (done, total, running)
+        """
+        self.submit = submit
+        self.checkpoint_file = Path(checkpoint_file)
+        self.files_file = self.checkpoint_file.with_name(self.checkpoint_file.name + '.files')
+        self.on_progress = on_progress
+        self.request: Optional[ReplayRequest] = None
+        self.files: List[tuple[str, str]] = []
+        self.position = 0  # next file to submit
+        self._outstanding: Dict[str, int] = {}  # normalized path -> position
+        self._cond = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_checkpoint = 0.0
+
+    @property
+    def is_running(self) -> bool:
+        """Whether a replay is in progress"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, request: ReplayRequest, select: Callable[[ReplayRequest], List[tuple[str, str]]]) -> tuple[bool, str]:
+        """
+        Start a new replay, replacing any saved checkpoint
+
+        Args:
+            request: Replay filters and rate
+            select: Returns the (file_path, label) pairs for a request;
+                runs on the replay thread
+
+        Returns:
+            Tuple of (success: bool, message: str)
+        """
+        if self.is_running:
+            return False, "A replay is already running"
+
+        self.request = request
+        self.files = []
+        self.position = 0
+        self._run(lambda: self._select_and_replay(select))
+        return True, f"Replay started ({request.describe()})"
+
+    def resume(self) -> bool:
+        """
+        Continue a replay saved in the checkpoint
+
+        Returns:
+            True if a replay was resumed
+        """
+        if self.is_running or not self.checkpoint_file.exists():
+            return False
+
+        try:
+            with open(self.checkpoint_file, 'r') as f:
+                data = json.load(f)
+            if 'files' not in data:
+                with open(self.files_file, 'r') as f:
+                    data['files'] = json.load(f)
+            self.request = ReplayRequest.from_dict(data['request'])
+            self.files = [tuple(item) for item in data['files']]
+            self.position = int(data['position'])
+            if len(self.files) != data.get('total', len(self.files)):
+                raise ValueError("file list does not match the checkpoint")
+        except Exception as e:
+            logger.error(f"Error loading replay checkpoint: {e}")
+            return False
+
+        logger.info(f"Resuming replay at {self.position} of {len(self.files)} ({self.request.describe()})")
+        self._run(self._replay)
+        return True
+
+    def stop(self, keep_checkpoint: bool = False) -> None:
+        """
+        Stop submitting files
+
+        Args:
+            keep_checkpoint: Save progress so the next resume() continues;
+                otherwise the replay is cancelled
+        """
+        self._stop_event.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+        if keep_checkpoint:
+            if self.request is None:
+                return
+            # Files finishing during the drain may complete the replay
+            if self._done() < len(self.files):
+                self._save_checkpoint()
+            else:
+                self._remove_checkpoint()
+        else:
+            self._remove_checkpoint()
+            self._report(running=False)
+
+    def is_tracking(self, file_path: str) -> bool:
+        """Check whether a file was submitted by the replay and has not finished"""
+        with self._cond:
+            return os.path.normcase(os.path.abspath(file_path)) in self._outstanding
+
+    def finished(self, file_path: str) -> None:
+        """
+        Note that a file reached a final outcome
+
+        Args:
+            file_path: Path of the finished file
+        """
+        with self._cond:
+            if self._outstanding.pop(os.path.normcase(os.path.abspath(file_path)), None) is None:
+                return
+            self._cond.notify_all()
+        self._report(running=True)
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Get replay progress
+
+        Returns:
+            Dictionary with running, done, total and the request description
+        """
+        return {
+            'running': self.is_running,
+            'done': self._done(),
+            'total': len(self.files),
+            'request': self.request.describe() if self.request else "",
+        }
+
+    def _run(self, target: Callable[[], None]) -> None:
+        """Start the replay thread"""
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=target, name="Replay", daemon=True)
+        self._thread.start()
+
+    def _select_and_replay(self, select) -> None:
+        """Select the files, checkpoint the list and replay it"""
+        try:
+            self.files = select(self.request)
+        except Exception as e:
+            logger.error(f"Error selecting files to replay: {e}", exc_info=True)
+            self.files = []
+
+        logger.info(f"Replaying {len(self.files)} files ({self.request.describe()})")
+        self._write_json(self.files_file, self.files)
+        self._save_checkpoint()
+        self._replay()
+
+    def _replay(self) -> None:
+        """Submit files at the requested rate until done or stopped"""
+        interval = 60.0 / self.request.rate
+        self._report(running=True)
+
+        while self.position < len(self.files) and not self._stop_event.is_set():
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: len(self._outstanding) < self.MAX_AHEAD or self._stop_event.is_set()
+                )
+            if self._stop_event.is_set():
+                break
+
+            file_path, label = self.files[self.position]
+            key = os.path.normcase(os.path.abspath(file_path))
+            with self._cond:
+                self._outstanding[key] = self.position
+
+            if not self.submit(UploadJob(file_path, label, backfill=True, force=True)):
+                with self._cond:
+                    self._outstanding.pop(key, None)
+                break  # shutting down; the checkpoint resumes here
+
+            self.position += 1
+            if time.monotonic() - self._last_checkpoint >= self.CHECKPOINT_INTERVAL:
+                self._save_checkpoint()
+
+            self._stop_event.wait(interval)
+
+        if self._stop_event.is_set():
+            return
+
+        # Wait for the last files before calling the replay complete
+        with self._cond:
+            while self._outstanding and not self._stop_event.is_set():
+                self._cond.wait(self.CHECKPOINT_INTERVAL)
+        if self._stop_event.is_set():
+            return
+
+        self._remove_checkpoint()
+        logger.info(f"Replay finished: {len(self.files)} files ({self.request.describe()})")
+        self._report(running=False)
+
+    def _done(self) -> int:
+        """Get the number of files before the first unfinished one"""
+        with self._cond:
+            if self._outstanding:
+                return min(self._outstanding.values())
+            return self.position
+
+    def _report(self, running: bool) -> None:
+        """Send progress to the listener"""
+        if self.on_progress is None:
+            return
+
+        try:
+            self.on_progress(self._done(), len(self.files), running)
+        except Exception as e:
+            logger.error(f"Error in replay progress callback: {e}", exc_info=True)
+
+    def _save_checkpoint(self) -> None:
+        """Write the request and the first unfinished position; the file list is saved once at the start"""
+        self._last_checkpoint = time.monotonic()
+        self._write_json(self.checkpoint_file, {
+            'request': self.request.to_dict(),
+            'total': len(self.files),
+            'position': self._done(),
+        })
+
+    @staticmethod
+    def _write_json(path: Path, data: Any) -> None:
+        """Atomically replace a checkpoint file"""
+        try:
+            tmp_file = path.with_name(path.name + '.tmp')
+            with open(tmp_file, 'w') as f:
+                json.dump(data, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, path)
+
+        except Exception as e:
+            logger.error(f"Error saving replay checkpoint: {e}")
+
+    def _remove_checkpoint(self) -> None:
+        """Forget saved progress"""
+        try:
+            for path in (self.checkpoint_file, self.files_file):
+                if path.exists():
+                    path.unlink()
+        except Exception as e:
+            logger.error(f"Error removing replay checkpoint: {e}")
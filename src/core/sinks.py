@@ -0,0 +1,414 @@
+"""
+Additional destinations that receive every processed mail
+"""
+import os
+import time
+import sqlite3
+import logging
+import threading
+import requests
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Dict, Any, Optional
+from .metrics import Metrics
+
+logger = logging.getLogger(__name__)
+
+
+class MailRecord:
+    """A mail file read and parsed once, shared by every sink"""
+
+    __slots__ = ('file_path', 'label', 'character', 'content', 'size', 'sha256', 'sender', 'subject', 'detected_at')
+
+    def __init__(
+        self,
+        file_path: str,
+        label: str,
+        character: str,
+        content: str,
+        size: int,
+        sha256: str,
+        sender: str = "",
+        subject: str = "",
+        detected_at: Optional[float] = None
+    ):
+        """
+        Initialize mail record
+
+        Args:
+            file_path: Path to the mail file
+            label: Label of the mail path the file was found in
+            character: Character the mail belongs to
+            content: Decoded file content
+            size: File size in bytes
+            sha256: Hex digest of the file content
+            sender: Sender parsed from the mail headers
+            subject: Subject parsed from the mail headers
+            detected_at: Epoch time the file was detected
+        """
+        self.file_path = file_path
+        self.label = label
+        self.character = character
+        self.content = content
+        self.size = size
+        self.sha256 = sha256
+        self.sender = sender
+        self.subject = subject
+        self.detected_at = detected_at
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the record, e.g. as a webhook body"""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class SinkError(Exception):
+    """A delivery failed; permanent failures are not retried"""
+
+    def __init__(self, message: str, permanent: bool = False):
+        super().__init__(message)
+        self.permanent = permanent
+
+
+class Sink(ABC):
+    """
+    Destination for processed mail
+
+    deliver() runs on the sink's own worker thread and raises on failure;
+    SinkError(permanent=True) skips the remaining retries.
+    """
+
+    name = "sink"
+
+    @abstractmethod
+    def deliver(self, record: MailRecord) -> None:
+        """
+        Deliver one mail
+
+        Args:
+            record: Mail to deliver
+        """
+
+    def close(self) -> None:
+        """Release connections and files"""
+
+
+class LocalDatabaseSink(Sink):
+    """Store every mail with its content in a local SQLite database"""
+
+    name = "local_db"
+
+    def __init__(self, db_file: str = "mail.db"):
+        """
+        Initialize local database sink
+
+        Args:
+            db_file: Path to the SQLite database file
+        """
+        self.db_file = db_file
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the database on first use (caller holds the lock)"""
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_file, check_same_thread=False)
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS mail (
+                    path_key TEXT NOT NULL,
+                    sha256 TEXT NOT NULL,
+                    file_path TEXT NOT NULL,
+                    character TEXT,
+                    sender TEXT,
+                    subject TEXT,
+                    content TEXT,
+                    size INTEGER,
+                    detected_at REAL,
+                    stored_at REAL,
+                    PRIMARY KEY (path_key, sha256)
+                );
+                CREATE INDEX IF NOT EXISTS idx_mail_character ON mail(character, detected_at);
+            """)
+        return self._conn
+
+    def deliver(self, record: MailRecord) -> None:
+        """Insert the mail; the same content at the same path is stored once"""
+        try:
+            with self._lock:
+                conn = self._connection()
+                with conn:
+                    conn.execute(
+                        "INSERT OR IGNORE INTO mail (path_key, sha256, file_path, character, sender, "
+                        "subject, content, size, detected_at, stored_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (
+                            os.path.normcase(os.path.abspath(record.file_path)), record.sha256,
+                            record.file_path, record.character, record.sender, record.subject,
+                            record.content, record.size, record.detected_at, time.time()
+                        )
+                    )
+        except sqlite3.Error as e:
+            raise SinkError(f"Database error: {e}")
+
+    def close(self) -> None:
+        """Close the database"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class WebhookSink(Sink):
+    """POST every mail as JSON to a URL"""
+
+    name = "webhook"
+    TIMEOUT = 10  # seconds
+
+    def __init__(self, url: str):
+        """
+        Initialize webhook sink
+
+        Args:
+            url: Endpoint receiving a MailRecord.to_dict() body per mail
+        """
+        self.url = url
+        self.session = requests.Session()
+
+    def deliver(self, record: MailRecord) -> None:
+        """Post the mail; 4xx answers other than 408 and 429 are permanent"""
+        try:
+            response = self.session.post(self.url, json=record.to_dict(), timeout=self.TIMEOUT)
+        except requests.exceptions.RequestException as e:
+            raise SinkError(f"Webhook unreachable: {e}")
+
+        if response.status_code >= 400:
+            permanent = response.status_code < 500 and response.status_code not in (408, 429)
+            raise SinkError(f"Webhook returned HTTP {response.status_code}", permanent)
+
+    def close(self) -> None:
+        """Close pooled connections"""
+        self.session.close()
+
+
+class RetryPolicy:
+    """How often and how patiently a sink retries a failed delivery"""
+
+    __slots__ = ('max_attempts', 'base_delay', 'max_delay')
+
+    def __init__(self, max_attempts: int = 5, base_delay: float = 2.0, max_delay: float = 120.0):
+        """
+        Initialize retry policy
+
+        Args:
+            max_attempts: Deliveries tried before the mail is given up
+            base_delay: Seconds before the first retry, doubled after each failure
+            max_delay: Upper bound for the delay between retries
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int) -> float:
+        """Get the seconds to wait after the given failed attempt (1-based)"""
+        return min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+
+
+class SinkRunner:
+    """
+    Deliver to one sink from its own queue and worker thread
+
+    Deliveries are in order; a retry holds back only this sink's queue.
+    When the queue is full the oldest mail is dropped and counted, so a
+    sink that is down for long cannot grow memory without bound.
+    """
+
+    MAX_QUEUED = 1000
+
+    def __init__(self, sink: Sink, policy: Optional[RetryPolicy] = None):
+        """
+        Initialize sink runner
+
+        Args:
+            sink: Destination to deliver to
+            policy: Retry policy, defaults to RetryPolicy()
+        """
+        self.sink = sink
+        self.policy = policy or RetryPolicy()
+        self.metrics = Metrics()
+        self._queue: deque = deque()
+        self._cond = threading.Condition()
+        self._busy = False
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(
+            target=self._worker_loop,
+            name=f"Sink-{sink.name}",
+            daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, record: MailRecord) -> None:
+        """
+        Queue a mail for delivery
+
+        Args:
+            record: Mail to deliver
+        """
+        with self._cond:
+            if len(self._queue) >= self.MAX_QUEUED:
+                dropped = self._queue.popleft()
+                self.metrics.increment('dropped')
+                logger.warning(f"Sink {self.sink.name} queue full, dropped {dropped.file_path}")
+            self._queue.append(record)
+            self._cond.notify()
+
+    def stop(self, timeout: float) -> int:
+        """
+        Wait for queued deliveries, then stop the worker and close the sink
+
+        Args:
+            timeout: Maximum seconds to wait
+
+        Returns:
+            Number of mails not delivered
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while (self._queue or self._busy) and time.monotonic() < deadline:
+                self._cond.wait(min(0.25, max(0.0, deadline - time.monotonic())))
+            leftover = len(self._queue) + (1 if self._busy else 0)
+            self._queue.clear()
+            self._stop_event.set()
+            self._cond.notify_all()
+
+        self._thread.join(timeout=2)
+        try:
+            self.sink.close()
+        except Exception as e:
+            logger.error(f"Error closing sink {self.sink.name}: {e}")
+
+        if leftover:
+            logger.warning(f"Sink {self.sink.name} stopped with {leftover} mails undelivered")
+        return leftover
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Get the queue depth and delivery counters
+
+        Returns:
+            Dictionary with queued, delivered, retries, failed and dropped
+        """
+        counters = self.metrics.snapshot()['counters']
+        with self._cond:
+            queued = len(self._queue)
+        status = {'queued': queued}
+        for name in ('delivered', 'retries', 'failed', 'dropped'):
+            status[name] = int(counters.get(name, 0))
+        return status
+
+    def _worker_loop(self) -> None:
+        """Deliver queued mail until stopped"""
+        while True:
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
+                while not self._queue and not self._stop_event.is_set():
+                    self._cond.wait()
+                if self._stop_event.is_set():
+                    return
+                record = self._queue.popleft()
+                self._busy = True
+
+            self._deliver(record)
+
+    def _deliver(self, record: MailRecord) -> None:
+        """Deliver one mail, retrying per the policy"""
+        for attempt in range(1, self.policy.max_attempts + 1):
+            start = time.monotonic()
+            try:
+                self.sink.deliver(record)
+                self.metrics.increment('delivered')
+                self.metrics.observe('deliver_ms', (time.monotonic() - start) * 1000)
+                return
+
+            except Exception as e:
+                permanent = isinstance(e, SinkError) and e.permanent
+                if permanent or attempt == self.policy.max_attempts:
+                    self.metrics.increment('failed')
+                    self.metrics.event('failed', file_path=record.file_path, error=str(e))
+                    logger.error(f"Sink {self.sink.name} gave up on {record.file_path} after {attempt} attempts: {e}")
+                    return
+
+                self.metrics.increment('retries')
+                logger.warning(f"Sink {self.sink.name} failed on {record.file_path}, retrying: {e}")
+                if self._stop_event.wait(self.policy.delay(attempt)):
+                    return
+
+
+class SinkFanout:
+    """Dispatch each processed mail to every configured sink without waiting on any"""
+
+    def __init__(self):
+        """Initialize fan-out with no sinks"""
+        self.runners: Dict[str, SinkRunner] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Optional[Sink]:
+        """Get the configured sink with this name"""
+        with self._lock:
+            runner = self.runners.get(name)
+        return runner.sink if runner else None
+
+    def add(self, sink: Sink, policy: Optional[RetryPolicy] = None) -> None:
+        """
+        Start delivering to a sink, replacing one with the same name
+
+        Args:
+            sink: Destination to add
+            policy: Retry policy for this sink
+        """
+        with self._lock:
+            old = self.runners.get(sink.name)
+            self.runners[sink.name] = SinkRunner(sink, policy)
+        if old:
+            old.stop(timeout=0)
+        logger.info(f"Sink {sink.name} enabled")
+
+    def remove(self, name: str) -> None:
+        """Stop delivering to a sink, dropping what it has queued"""
+        with self._lock:
+            runner = self.runners.pop(name, None)
+        if runner:
+            runner.stop(timeout=0)
+            logger.info(f"Sink {name} disabled")
+
+    def dispatch(self, record: MailRecord) -> None:
+        """
+        Queue a mail on every sink
+
+        Args:
+            record: Mail to deliver
+        """
+        with self._lock:
+            runners = list(self.runners.values())
+        for runner in runners:
+            runner.submit(record)
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Get status() of every sink by name"""
+        with self._lock:
+            runners = dict(self.runners)
+        return {name: runner.status() for name, runner in runners.items()}
+
+    def close(self, timeout: float) -> int:
+        """
+        Give every sink up to timeout seconds to finish, then stop them
+
+        Returns:
+            Number of mails not delivered
+        """
+        with self._lock:
+            runners, self.runners = list(self.runners.values()), {}
+
+        deadline = time.monotonic() + timeout
+        leftover = 0
+        for runner in runners:
+            leftover += runner.stop(max(0.0, deadline - time.monotonic()))
+        return leftover
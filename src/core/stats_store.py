@@ -0,0 +1,322 @@
+"""
+Persistent time-series statistics with per-minute, per-hour and per-day rollups
+"""
+import os
+import json
+import time
+import logging
+import threading
+from array import array
+from pathlib import Path
+from typing import Dict, Optional, List
+
+logger = logging.getLogger(__name__)
+
+# Counters kept for every bucket. latency is the summed request time in
+# seconds and requests the number of timed requests, so averages can be
+# derived from any range of buckets.
+METRICS = ('processed', 'uploaded', 'errors', 'bytes', 'latency', 'requests')
+
+
+def _local_time(ts: float) -> float:
+    """Shift an epoch timestamp so bucket boundaries fall on local midnight"""
+    return ts + time.localtime(ts).tm_gmtoff
+
+
+class RingSeries:
+    """Fixed-size ring of time buckets backed by arrays"""
+
+    def __init__(self, bucket_seconds: int, size: int):
+        """
+        Initialize ring series
+
+        Args:
+            bucket_seconds: Width of one bucket in seconds
+            size: Number of buckets kept before the oldest is overwritten
+        """
+        self.bucket_seconds = bucket_seconds
+        self.size = size
+        # Absolute bucket number held by each slot, -1 when unused
+        self.stamps = array('q', [-1]) * size
+        self.values = {name: array('d', [0.0]) * size for name in METRICS}
+
+    def bucket_of(self, ts: float) -> int:
+        """Get the absolute bucket number for a timestamp"""
+        return int(_local_time(ts) // self.bucket_seconds)
+
+    def add(self, bucket: int, amounts: Dict[str, float]) -> None:
+        """
+        Add amounts to a bucket, recycling the slot if it holds older data
+
+        Args:
+            bucket: Absolute bucket number
+            amounts: Metric name to amount
+        """
+        slot = bucket % self.size
+        if self.stamps[slot] != bucket:
+            self.stamps[slot] = bucket
+            for values in self.values.values():
+                values[slot] = 0.0
+
+        for name, amount in amounts.items():
+            self.values[name][slot] += amount
+
+    def get(self, bucket: int) -> Optional[Dict[str, float]]:
+        """
+        Get the values of one bucket
+
+        Args:
+            bucket: Absolute bucket number
+
+        Returns:
+            Metric values, or None if the bucket is empty or expired
+        """
+        slot = bucket % self.size
+        if self.stamps[slot] != bucket:
+            return None
+        return {name: values[slot] for name, values in self.values.items()}
+
+    def to_rows(self) -> List[list]:
+        """Serialize the populated slots as [bucket, *metrics] rows"""
+        rows = []
+        for slot, bucket in enumerate(self.stamps):
+            if bucket >= 0:
+                rows.append([bucket] + [self.values[name][slot] for name in METRICS])
+        return rows
+
+    def load_rows(self, rows: List[list]) -> None:
+        """Restore slots produced by to_rows"""
+        for row in rows:
+            bucket = int(row[0])
+            slot = bucket % self.size
+            if bucket < self.stamps[slot]:
+                continue
+            self.stamps[slot] = bucket
+            for name, value in zip(METRICS, row[1:]):
+                self.values[name][slot] = float(value)
+
+
+class StatsStore:
+    """Record upload statistics per mail path and persist them between runs"""
+
+    # resolution: (bucket seconds, buckets kept)
+    RESOLUTIONS = {
+        'minute': (60, 24 * 60),
+        'hour': (3600, 30 * 24),
+        'day': (86400, 366),
+    }
+
+    def __init__(self, stats_file: str = "stats.json"):
+        """
+        Initialize statistics store
+
+        Args:
+            stats_file: Path to the persisted statistics file
+        """
+        self.stats_file = Path(stats_file)
+        self.series: Dict[str, Dict[str, RingSeries]] = {}
+        self.dirty = False
+        self._lock = threading.Lock()
+        self.load()
+
+    def _series_for(self, key: str) -> Dict[str, RingSeries]:
+        """Get or create the rollups for a mail path"""
+        rollups = self.series.get(key)
+        if rollups is None:
+            rollups = {
+                name: RingSeries(seconds, size)
+                for name, (seconds, size) in self.RESOLUTIONS.items()
+            }
+            self.series[key] = rollups
+        return rollups
+
+    def record(
+        self,
+        key: str,
+        processed: int = 0,
+        uploaded: int = 0,
+        errors: int = 0,
+        size: int = 0,
+        latency: Optional[float] = None,
+        ts: Optional[float] = None
+    ) -> None:
+        """
+        Add an event to every rollup of a mail path
+
+        Args:
+            key: Mail path label or path
+            processed: Files processed
+            uploaded: Files uploaded successfully
+            errors: Failed files
+            size: Bytes uploaded
+            latency: Request time in seconds, if a request was made
+            ts: Event time, defaults to now
+        """
+        ts = time.time() if ts is None else ts
+        amounts = {
+            'processed': processed,
+            'uploaded': uploaded,
+            'errors': errors,
+            'bytes': size,
+        }
+        if latency is not None:
+            amounts['latency'] = latency
+            amounts['requests'] = 1
+
+        with self._lock:
+            for series in self._series_for(key).values():
+                series.add(series.bucket_of(ts), amounts)
+            self.dirty = True
+
+    def query(
+        self,
+        resolution: str,
+        start: float,
+        end: Optional[float] = None,
+        key: Optional[str] = None
+    ) -> List[tuple[float, Dict[str, float]]]:
+        """
+        Get bucket values over a time range
+
+        Args:
+            resolution: 'minute', 'hour' or 'day'
+            start: Range start (epoch seconds)
+            end: Range end (epoch seconds), defaults to now
+            key: Mail path to query, or None to combine all paths
+
+        Returns:
+            List of (bucket start in epoch seconds, values), oldest first,
+            for buckets that have data
+        """
+        end = time.time() if end is None else end
+        seconds, size = self.RESOLUTIONS[resolution]
+
+        with self._lock:
+            keys = [key] if key is not None else list(self.series)
+            rollups = [self.series[k][resolution] for k in keys if k in self.series]
+            if not rollups:
+                return []
+
+            first = rollups[0].bucket_of(start)
+            last = rollups[0].bucket_of(end)
+            first = max(first, last - size + 1)
+
+            results = []
+            for bucket in range(first, last + 1):
+                combined = None
+                for series in rollups:
+                    values = series.get(bucket)
+                    if values is None:
+                        continue
+                    if combined is None:
+                        combined = dict(values)
+                    else:
+                        for name, value in values.items():
+                            combined[name] += value
+                if combined is not None:
+                    local_start = bucket * seconds
+                    results.append((local_start - time.localtime(local_start).tm_gmtoff, combined))
+
+        return results
+
+    def totals(
+        self,
+        resolution: str,
+        start: float,
+        end: Optional[float] = None,
+        key: Optional[str] = None
+    ) -> Dict[str, float]:
+        """
+        Sum bucket values over a time range
+
+        Args:
+            resolution: 'minute', 'hour' or 'day'
+            start: Range start (epoch seconds)
+            end: Range end (epoch seconds), defaults to now
+            key: Mail path to query, or None to combine all paths
+
+        Returns:
+            Metric totals plus avg_latency in seconds
+        """
+        totals = {name: 0.0 for name in METRICS}
+        for _, values in self.query(resolution, start, end, key):
+            for name, value in values.items():
+                totals[name] += value
+
+        totals['avg_latency'] = totals['latency'] / totals['requests'] if totals['requests'] else 0.0
+        return totals
+
+    def last_hour(self, key: Optional[str] = None) -> Dict[str, float]:
+        """Get totals for the last 60 minutes"""
+        now = time.time()
+        return self.totals('minute', now - 3599, now, key)
+
+    def today(self, key: Optional[str] = None) -> Dict[str, float]:
+        """Get totals for the current local day"""
+        now = time.time()
+        return self.totals('day', now, now, key)
+
+    def keys(self) -> List[str]:
+        """Get all mail paths with recorded statistics"""
+        with self._lock:
+            return list(self.series)
+
+    def load(self) -> bool:
+        """
+        Load statistics from file
+
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            if not self.stats_file.exists():
+                return False
+
+            with open(self.stats_file, 'r') as f:
+                data = json.load(f)
+
+            with self._lock:
+                for key, resolutions in data.get('series', {}).items():
+                    rollups = self._series_for(key)
+                    for name, rows in resolutions.items():
+                        if name in rollups:
+                            rollups[name].load_rows(rows)
+
+            logger.info(f"Statistics loaded from {self.stats_file}")
+            return True
+
+        except Exception as e:
+            logger.error(f"Error loading statistics: {e}")
+            return False
+
+    def save(self) -> bool:
+        """
+        Save statistics to file if anything changed
+
+        Returns:
+            True if successful or nothing to save, False otherwise
+        """
+        with self._lock:
+            if not self.dirty:
+                return True
+            data = {
+                'version': 1,
+                'metrics': list(METRICS),
+                'series': {
+                    key: {name: series.to_rows() for name, series in rollups.items()}
+                    for key, rollups in self.series.items()
+                }
+            }
+            self.dirty = False
+
+        try:
+            tmp_file = self.stats_file.with_name(self.stats_file.name + '.tmp')
+            with open(tmp_file, 'w') as f:
+                json.dump(data, f, separators=(',', ':'))
+            os.replace(tmp_file, self.stats_file)
+            return True
+
+        except Exception as e:
+            logger.error(f"Error saving statistics: {e}")
+            self.dirty = True
+            return False
@@ -0,0 +1,143 @@
+"""
+Adaptive per-phase request timeouts driven by observed latency
+"""
+import math
+import logging
+import threading
+from collections import deque
+from typing import Dict, Optional
+from .metrics import Metrics
+
+logger = logging.getLogger(__name__)
+
+
+def percentile(samples, fraction: float) -> float:
+    """
+    Get a percentile of a sequence using nearest-rank
+
+    Args:
+        samples: Non-empty sequence of numbers
+        fraction: Percentile as a fraction (0.95 for p95)
+
+    Returns:
+        The percentile value
+    """
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[rank - 1]
+
+
+class AdaptiveTimeouts:
+    """Derive connect and read timeouts from a rolling latency window per endpoint"""
+
+    WINDOW = 50  # samples kept per endpoint and phase
+    MIN_SAMPLES = 5  # use defaults until this many samples exist
+    PERCENTILE = 0.95
+
+    CONNECT_MULTIPLIER = 3.0
+    CONNECT_FLOOR = 1.0  # seconds
+    CONNECT_CEILING = 5.0
+    CONNECT_DEFAULT = 5.0
+
+    READ_MULTIPLIER = 3.0
+    READ_FLOOR = 3.0  # seconds
+    READ_CEILING = 60.0
+    READ_DEFAULT = 10.0
+    READ_SECONDS_PER_KB = 0.02  # extra read allowance per KB of payload
+
+    def __init__(self, metrics: Optional[Metrics] = None):
+        """
+        Initialize adaptive timeouts
+
+        Args:
+            metrics: Optional Metrics instance to log timeout decisions into
+        """
+        self.metrics = metrics
+        self._lock = threading.Lock()
+        self._connect: Dict[str, deque] = {}
+        self._read: Dict[str, deque] = {}
+
+    def record_connect(self, endpoint: str, seconds: float) -> None:
+        """
+        Record a round trip that approximates connection setup time
+
+        Args:
+            endpoint: Endpoint URL
+            seconds: Observed time
+        """
+        with self._lock:
+            self._connect.setdefault(endpoint, deque(maxlen=self.WINDOW)).append(seconds)
+
+    def record_read(self, endpoint: str, seconds: float, payload_bytes: int = 0) -> None:
+        """
+        Record the time a request took to return a response
+
+        The payload allowance is subtracted so samples from small and large
+        uploads are comparable.
+
+        Args:
+            endpoint: Endpoint URL
+            seconds: Time until the response headers arrived
+            payload_bytes: Size of the request body
+        """
+        base = max(0.0, seconds - self._payload_allowance(payload_bytes))
+        with self._lock:
+            self._read.setdefault(endpoint, deque(maxlen=self.WINDOW)).append(base)
+
+    def timeouts_for(self, endpoint: str, payload_bytes: int = 0) -> tuple[float, float]:
+        """
+        Get the (connect, read) timeouts to use for a request
+
+        Args:
+            endpoint: Endpoint URL
+            payload_bytes: Size of the request body
+
+        Returns:
+            Tuple of (connect timeout, read timeout) in seconds
+        """
+        with self._lock:
+            connect_samples = list(self._connect.get(endpoint, ()))
+            read_samples = list(self._read.get(endpoint, ()))
+
+        if len(connect_samples) >= self.MIN_SAMPLES:
+            connect = self._clamp(
+                percentile(connect_samples, self.PERCENTILE) * self.CONNECT_MULTIPLIER,
+                self.CONNECT_FLOOR,
+                self.CONNECT_CEILING
+            )
+        else:
+            connect = self.CONNECT_DEFAULT
+
+        if len(read_samples) >= self.MIN_SAMPLES:
+            base = percentile(read_samples, self.PERCENTILE) * self.READ_MULTIPLIER
+        else:
+            base = self.READ_DEFAULT
+        read = self._clamp(
+            base + self._payload_allowance(payload_bytes),
+            self.READ_FLOOR,
+            self.READ_CEILING
+        )
+
+        if self.metrics:
+            self.metrics.observe('timeout.connect_s', connect)
+            self.metrics.observe('timeout.read_s', read)
+            self.metrics.event(
+                'timeout_decision',
+                endpoint=endpoint,
+                payload_bytes=payload_bytes,
+                connect=round(connect, 3),
+                read=round(read, 3),
+                connect_samples=len(connect_samples),
+                read_samples=len(read_samples)
+            )
+
+        return connect, read
+
+    def _payload_allowance(self, payload_bytes: int) -> float:
+        """Extra read time granted for a payload size"""
+        return payload_bytes / 1024 * self.READ_SECONDS_PER_KB
+
+    @staticmethod
+    def _clamp(value: float, floor: float, ceiling: float) -> float:
+        """Clamp a value between a floor and a ceiling"""
+        return max(floor, min(ceiling, value))
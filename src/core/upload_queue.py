@@ -0,0 +1,441 @@
+"""
+Fair upload queue with worker threads, draining and persistence
+"""
+import json
+import os
+import time
+import heapq
+import logging
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Callable, Optional, List, Dict
+
+logger = logging.getLogger(__name__)
+
+
+def character_for(file_path: str, label: str = "") -> str:
+    """
+    Get the character a mail file belongs to
+
+    Uses the mail path label if set, otherwise the name from the
+    mail_<Character> folder, otherwise the containing directory.
+
+    Args:
+        file_path: Path to the mail file
+        label: Label of the mail path the file was found in
+
+    Returns:
+        Character name or directory used as the scheduling key
+    """
+    if label:
+        return label
+
+    directory = os.path.dirname(file_path)
+    for part in reversed(Path(directory).parts):
+        if part.lower().startswith("mail_") and len(part) > 5:
+            return part[5:]
+    return directory
+
+
+class UploadJob:
+    """A detected mail file waiting to be uploaded"""
+
+    __slots__ = ('file_path', 'label', 'detected_at', 'backfill', 'force', 'attempts', 'dispatched')
+
+    def __init__(
+        self,
+        file_path: str,
+        label: str = "",
+        detected_at: Optional[float] = None,
+        backfill: bool = False,
+        force: bool = False
+    ):
+        """
+        Initialize upload job
+
+        Args:
+            file_path: Path to the mail file
+            label: Label of the mail path the file was found in
+            detected_at: Epoch time the file was detected, defaults to now
+            backfill: True for catch-up work that must not delay live mail
+            force: Upload even if the file was uploaded before (replays)
+        """
+        self.file_path = file_path
+        self.label = label
+        self.detected_at = time.time() if detected_at is None else detected_at
+        self.backfill = backfill
+        self.force = force
+        self.attempts = 0
+        self.dispatched = False  # handed to the additional sinks
+
+    def to_dict(self) -> Dict:
+        """Serialize the job for persistence"""
+        return {
+            'file_path': self.file_path,
+            'label': self.label,
+            'detected_at': self.detected_at,
+            'force': self.force,
+            'dispatched': self.dispatched
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict, backfill: bool = False) -> 'UploadJob':
+        """Restore a job serialized with to_dict"""
+        job = cls(data['file_path'], data.get('label', ""), data.get('detected_at'), backfill, data.get('force', False))
+        job.dispatched = data.get('dispatched', False)  # not delivered to the sinks again after a restart
+        return job
+
+
+class UploadQueue:
+    """
+    Fair upload queue served by worker threads
+
+    Jobs are grouped into one FIFO stream per character and lane (live or
+    backfill). Workers take streams round-robin, live streams first, and
+    never run two jobs of the same stream at once, so each stream stays in
+    order while different characters upload in parallel.
+    """
+
+    def __init__(
+        self,
+        process: Callable[[UploadJob], None],
+        workers: int = 4,
+        on_change: Optional[Callable[[int], None]] = None
+    ):
+        """
+        Initialize upload queue
+
+        Args:
+            process: Function that uploads one job; exceptions are logged
+            workers: Number of worker threads
+            on_change: Optional callback with the pending count after a job is added or finishes
+        """
+        self.process = process
+        self.on_change = on_change
+        self.worker_count = workers
+        self.accepting = True
+        self.paused = False
+        self._streams: Dict[tuple, deque] = {}
+        self._live_ring: deque = deque()  # live stream keys with work and no job in flight
+        self._backfill_ring: deque = deque()
+        self._busy: set = set()
+        self._queued = 0
+        self._delayed: List[tuple] = []  # heap of (due monotonic time, sequence, job, front)
+        self._delayed_seq = 0
+        self._in_flight: Dict[int, UploadJob] = {}
+        self._cond = threading.Condition()
+        self._running = False
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> None:
+        """Start the worker threads"""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+            self.accepting = True
+
+        for i in range(self.worker_count):
+            thread = threading.Thread(
+                target=self._worker_loop,
+                name=f"UploadWorker-{i + 1}",
+                daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, job: UploadJob) -> bool:
+        """
+        Add a job to the back of its stream
+
+        Args:
+            job: Job to upload
+
+        Returns:
+            True if queued, False if the queue no longer accepts work
+        """
+        with self._cond:
+            if not self.accepting:
+                return False
+            self._enqueue(job, front=False)
+        self._notify_change()
+        return True
+
+    def requeue(self, job: UploadJob, front: bool = True, delay: float = 0) -> None:
+        """
+        Put a job back in its stream
+
+        Unlike submit this works during shutdown, so a job that could not be
+        uploaded is kept and persisted instead of dropped.
+
+        Args:
+            job: Job to retry
+            front: Retry before the rest of the stream instead of after it
+            delay: Seconds to hold the job back; it joins its stream once
+                due and counts as pending meanwhile
+        """
+        with self._cond:
+            if delay > 0:
+                self._delayed_seq += 1
+                heapq.heappush(self._delayed, (time.monotonic() + delay, self._delayed_seq, job, front))
+                self._cond.notify()
+            else:
+                self._enqueue(job, front=front)
+
+    def pause(self) -> None:
+        """Stop handing jobs to workers; new jobs are parked in the queue"""
+        with self._cond:
+            self.paused = True
+
+    def resume(self) -> None:
+        """Resume processing parked jobs"""
+        with self._cond:
+            self.paused = False
+            self._cond.notify_all()
+
+    def stop_accepting(self) -> None:
+        """Reject new jobs; queued and in-flight jobs keep running"""
+        with self._cond:
+            self.accepting = False
+
+    def pending(self) -> List[UploadJob]:
+        """
+        Get every job that has not finished, in-flight jobs first
+
+        Returns:
+            List of in-flight and queued jobs
+        """
+        with self._cond:
+            return self._unfinished()
+
+    def pending_count(self) -> int:
+        """Get the number of queued and in-flight jobs"""
+        with self._cond:
+            return self._queued + len(self._delayed) + len(self._in_flight)
+
+    def backlog(self) -> Dict[str, int]:
+        """
+        Get the number of queued jobs per character
+
+        Returns:
+            Dictionary of character to queued job count
+        """
+        with self._cond:
+            counts: Dict[str, int] = {}
+            for (character, _), jobs in self._streams.items():
+                counts[character] = counts.get(character, 0) + len(jobs)
+            return counts
+
+    def drain(
+        self,
+        timeout: float,
+        on_progress: Optional[Callable[[int, float], None]] = None
+    ) -> List[UploadJob]:
+        """
+        Wait for queued and in-flight jobs to finish, then stop the workers
+
+        Args:
+            timeout: Maximum seconds to wait
+            on_progress: Called with (jobs remaining, seconds left) while waiting
+
+        Returns:
+            Jobs that did not finish before the deadline
+        """
+        self.stop_accepting()
+        deadline = time.monotonic() + timeout
+
+        with self._cond:
+            while self._queued or self._delayed or self._in_flight:
+                remaining_time = deadline - time.monotonic()
+                if remaining_time <= 0:
+                    break
+
+                # Parked jobs cannot drain while paused
+                if self.paused and not self._in_flight:
+                    break
+
+                if on_progress:
+                    remaining = self._queued + len(self._delayed) + len(self._in_flight)
+                    self._cond.release()
+                    try:
+                        on_progress(remaining, remaining_time)
+                    finally:
+                        self._cond.acquire()
+
+                self._promote_due()
+                self._cond.wait(min(0.25, max(0.0, deadline - time.monotonic())))
+
+            leftover = self._unfinished()
+            self._streams.clear()
+            self._delayed.clear()
+            self._live_ring.clear()
+            self._backfill_ring.clear()
+            self._busy.clear()
+            self._queued = 0
+            self._running = False
+            self._cond.notify_all()
+
+        self._threads = []
+        return leftover
+
+    def _notify_change(self) -> None:
+        """Report the pending count to on_change (caller must not hold the lock)"""
+        if self.on_change is None:
+            return
+
+        try:
+            self.on_change(self.pending_count())
+        except Exception as e:
+            logger.error(f"Error in queue change callback: {e}", exc_info=True)
+
+    def _enqueue(self, job: UploadJob, front: bool) -> None:
+        """Add a job to its stream and mark the stream ready (caller holds the lock)"""
+        key = (character_for(job.file_path, job.label), job.backfill)
+        stream = self._streams.get(key)
+        if stream is None:
+            stream = self._streams[key] = deque()
+
+        if front:
+            stream.appendleft(job)
+        else:
+            stream.append(job)
+        self._queued += 1
+
+        if key not in self._busy:
+            ring = self._backfill_ring if job.backfill else self._live_ring
+            if key not in ring:
+                ring.append(key)
+        self._cond.notify()
+
+    def _promote_due(self) -> Optional[float]:
+        """
+        Move delayed jobs that are due into their streams (caller holds the lock)
+
+        Returns:
+            Seconds until the next delayed job is due, None if there is none
+        """
+        now = time.monotonic()
+        while self._delayed and self._delayed[0][0] <= now:
+            _, _, job, front = heapq.heappop(self._delayed)
+            self._enqueue(job, front=front)
+        return self._delayed[0][0] - now if self._delayed else None
+
+    def _next_job(self) -> Optional[tuple]:
+        """Take the next job round-robin, live streams first (caller holds the lock)"""
+        ring = self._live_ring or self._backfill_ring
+        if not ring:
+            return None
+
+        key = ring.popleft()
+        job = self._streams[key].popleft()
+        self._queued -= 1
+        self._busy.add(key)
+        return key, job
+
+    def _finish(self, key: tuple) -> None:
+        """Release a stream after its job ran (caller holds the lock)"""
+        self._busy.discard(key)
+        stream = self._streams.get(key)
+        if stream:
+            # Back of the ring so other characters get their turn first
+            (self._backfill_ring if key[1] else self._live_ring).append(key)
+        else:
+            self._streams.pop(key, None)
+
+    def _unfinished(self) -> List[UploadJob]:
+        """List in-flight then queued jobs once each (caller holds the lock)"""
+        jobs = list(self._in_flight.values())
+        for stream in self._streams.values():
+            jobs.extend(stream)
+        jobs.extend(job for _, _, job, _ in sorted(self._delayed))
+        # A job being requeued can briefly be both in flight and queued
+        return list(dict.fromkeys(jobs))
+
+    def _worker_loop(self) -> None:
+        """Take jobs off the queue and process them"""
+        ident = threading.get_ident()
+
+        while True:
+            with self._cond:
+                while self._running:
+                    wait = self._promote_due()
+                    if not self.paused and (self._live_ring or self._backfill_ring):
+                        break
+                    self._cond.wait(wait)
+                if not self._running:
+                    return
+                key, job = self._next_job()
+                self._in_flight[ident] = job
+
+            try:
+                self.process(job)
+            except Exception as e:
+                logger.error(f"Error processing {job.file_path}: {e}", exc_info=True)
+            finally:
+                with self._cond:
+                    self._in_flight.pop(ident, None)
+                    self._finish(key)
+                    self._cond.notify_all()
+                self._notify_change()
+
+
+class PendingStore:
+    """Persist unfinished upload jobs so they are retried on next start"""
+
+    def __init__(self, pending_file: str = "pending_uploads.json"):
+        """
+        Initialize pending store
+
+        Args:
+            pending_file: Path to the persisted job list
+        """
+        self.pending_file = Path(pending_file)
+
+    def save(self, jobs: List[UploadJob]) -> bool:
+        """
+        Replace the persisted job list
+
+        Args:
+            jobs: Jobs to persist; an empty list removes the file
+
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            if not jobs:
+                if self.pending_file.exists():
+                    self.pending_file.unlink()
+                return True
+
+            tmp_file = self.pending_file.with_name(self.pending_file.name + '.tmp')
+            with open(tmp_file, 'w') as f:
+                json.dump([job.to_dict() for job in jobs], f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.pending_file)
+
+            logger.info(f"Saved {len(jobs)} pending uploads to {self.pending_file}")
+            return True
+
+        except Exception as e:
+            logger.error(f"Error saving pending uploads: {e}")
+            return False
+
+    def load(self) -> List[UploadJob]:
+        """
+        Load persisted jobs
+
+        Returns:
+            List of jobs, empty if none were saved
+        """
+        try:
+            if not self.pending_file.exists():
+                return []
+
+            with open(self.pending_file, 'r') as f:
+                return [UploadJob.from_dict(item, backfill=True) for item in json.load(f)]
+
+        except Exception as e:
+            logger.error(f"Error loading pending uploads: {e}")
+            return []
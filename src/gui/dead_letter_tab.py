@@ -0,0 +1,150 @@
+"""
+Dead letters tab for inspecting and retrying permanently failed uploads
+"""
+import customtkinter as ctk
+from datetime import datetime
+import logging
+from typing import Callable
+from .theme import COLORS, FONTS
+
+logger = logging.getLogger(__name__)
+
+
+class DeadLetterTab(ctk.CTkFrame):
+    """List dead-lettered uploads with bulk retry"""
+
+    MAX_ROWS = 200
+
+    def __init__(self, master, dead_letter_store, on_retry: Callable, on_message: Callable = None):
+        """
+        Initialize dead letters tab
+
+        Args:
+            master: Parent widget
+            dead_letter_store: DeadLetterStore instance
+            on_retry: Callback to retry all dead letters, returns (success, message)
+            on_message: Optional callback to log a (message, level) to the activity log
+        """
+        super().__init__(master)
+        self.dead_letter_store = dead_letter_store
+        self.on_retry = on_retry
+        self.on_message = on_message
+
+        self.configure(fg_color=COLORS['bg_primary'])
+        self._create_widgets()
+
+    def _create_widgets(self):
+        """Create all dead letter widgets"""
+
+        # Main container
+        container = ctk.CTkFrame(self, fg_color=COLORS['bg_primary'])
+        container.pack(fill="both", expand=True, padx=20, pady=20)
+
+        # Header with actions
+        header = ctk.CTkFrame(container, fg_color="transparent")
+        header.pack(fill="x", pady=(0, 20))
+
+        title = ctk.CTkLabel(
+            header,
+            text="Dead Letters",
+            font=FONTS['title'],
+            text_color=COLORS['text_primary']
+        )
+        title.pack(side="left")
+
+        discard_btn = ctk.CTkButton(
+            header,
+            text="Discard All",
+            command=self._discard_all,
+            font=FONTS['body'],
+            width=100,
+            height=30,
+            fg_color=COLORS['bg_tertiary'],
+            hover_color=COLORS['border'],
+            border_width=1,
+            border_color=COLORS['border']
+        )
+        discard_btn.pack(side="right")
+
+        retry_btn = ctk.CTkButton(
+            header,
+            text="Retry All",
+            command=self._retry_all,
+            font=FONTS['body'],
+            width=100,
+            height=30,
+            fg_color=COLORS['accent_green'],
+            hover_color="#15803d"
+        )
+        retry_btn.pack(side="right", padx=(0, 10))
+
+        self.count_label = ctk.CTkLabel(
+            header,
+            text="",
+            font=FONTS['small'],
+            text_color=COLORS['text_secondary']
+        )
+        self.count_label.pack(side="right", padx=(0, 15))
+
+        # Failure list
+        list_section = ctk.CTkFrame(container, fg_color=COLORS['bg_secondary'])
+        list_section.pack(fill="both", expand=True)
+
+        self.list_textbox = ctk.CTkTextbox(
+            list_section,
+            font=FONTS['mono'],
+            wrap="word",
+            state="disabled",
+            fg_color=COLORS['bg_tertiary']
+        )
+        self.list_textbox.pack(fill="both", expand=True, padx=15, pady=15)
+
+        self.list_textbox.tag_config("reason", foreground=COLORS['error'])
+        self.list_textbox.tag_config("detail", foreground=COLORS['text_muted'])
+
+    def on_show(self):
+        """Reload the list whenever the tab becomes visible"""
+        self.refresh()
+
+    def refresh(self):
+        """Redraw the list of dead letters"""
+        total = self.dead_letter_store.count()
+        rows = self.dead_letter_store.entries(limit=self.MAX_ROWS)
+
+        self.list_textbox.configure(state="normal")
+        self.list_textbox.delete("1.0", "end")
+
+        if not rows:
+            self.list_textbox.insert("end", "No failed uploads\n", "detail")
+
+        for row in rows:
+            when = datetime.fromtimestamp(row['failed_at'] or 0).strftime("%Y-%m-%d %H:%M:%S")
+            status = f"HTTP {row['status_code']}" if row['status_code'] else "no response"
+
+            self.list_textbox.insert("end", f"[{when}] {row['label'] or '-'} · {row['file_path']}\n")
+            self.list_textbox.insert("end", f"    {row['reason']}\n", "reason")
+            self.list_textbox.insert(
+                "end",
+                f"    {status} · {row['attempts']} attempt{'' if row['attempts'] == 1 else 's'}"
+                f" · {' '.join((row['response'] or '').split())[:200]}\n",
+                "detail"
+            )
+
+        self.list_textbox.configure(state="disabled")
+
+        shown = f" (showing newest {self.MAX_ROWS})" if total > self.MAX_ROWS else ""
+        self.count_label.configure(text=f"{total} failed upload{'' if total == 1 else 's'}{shown}")
+
+    def _retry_all(self):
+        """Queue every dead letter for another upload"""
+        success, message = self.on_retry()
+        if self.on_message:
+            self.on_message(message, "info" if success else "error")
+        self.refresh()
+
+    def _discard_all(self):
+        """Drop every dead letter"""
+        self.dead_letter_store.clear()
+        if self.on_message:
+            self.on_message("Discarded all dead letters", "info")
+        self.refresh()
@@ -0,0 +1,460 @@
+"""
+History tab for browsing recorded uploads
+"""
+import customtkinter as ctk
+from tkinter import filedialog
+from datetime import datetime, timedelta
+import logging
+from typing import Callable, Optional
+from .theme import COLORS, FONTS
+
+logger = logging.getLogger(__name__)
+
+
+class HistoryTab(ctk.CTkFrame):
+    """Paged, searchable view of the upload history"""
+
+    PAGE_SIZE = 50
+    STATUS_FILTERS = ["All", "uploaded", "failed", "skipped", "error"]
+
+    def __init__(
+        self,
+        master,
+        history_store,
+        on_start_replay: Optional[Callable] = None,
+        on_stop_replay: Optional[Callable] = None,
+        on_export: Optional[Callable] = None,
+        on_import: Optional[Callable] = None
+    ):
+        """
+        Initialize history tab
+
+        Args:
+            master: Parent widget
+            history_store: HistoryStore instance
+            on_start_replay: Optional callback with (label, since, until, status, rate),
+                returns (success, message)
+            on_stop_replay: Optional callback to cancel the replay, returns (success, message)
+            on_export: Optional callback with (output_dir, pending, label, since, until, status),
+                returns (success, message)
+            on_import: Optional callback with (bundle paths, rate), returns (success, message)
+        """
+        super().__init__(master)
+        self.history_store = history_store
+        self.on_start_replay = on_start_replay
+        self.on_stop_replay = on_stop_replay
+        self.on_export = on_export
+        self.on_import = on_import
+        self.is_replaying = False
+        self.page = 0
+        self.total = 0
+
+        self.configure(fg_color=COLORS['bg_primary'])
+        self._create_widgets()
+
+    def _create_widgets(self):
+        """Create all history widgets"""
+
+        # Main container
+        container = ctk.CTkFrame(self, fg_color=COLORS['bg_primary'])
+        container.pack(fill="both", expand=True, padx=20, pady=20)
+
+        # Title
+        title = ctk.CTkLabel(
+            container,
+            text="History",
+            font=FONTS['title'],
+            text_color=COLORS['text_primary']
+        )
+        title.pack(anchor="w", pady=(0, 20))
+
+        # Search bar
+        search_frame = ctk.CTkFrame(container, fg_color=COLORS['bg_secondary'])
+        search_frame.pack(fill="x", pady=(0, 15))
+
+        self.search_entry = ctk.CTkEntry(
+            search_frame,
+            placeholder_text="Search subject or sender",
+            font=FONTS['body'],
+            height=35
+        )
+        self.search_entry.pack(side="left", fill="x", expand=True, padx=(15, 10), pady=15)
+        self.search_entry.bind("<Return>", lambda event: self._search())
+
+        self.status_var = ctk.StringVar(value="All")
+        status_menu = ctk.CTkOptionMenu(
+            search_frame,
+            values=self.STATUS_FILTERS,
+            variable=self.status_var,
+            command=lambda value: self._search(),
+            font=FONTS['body'],
+            width=120,
+            height=35
+        )
+        status_menu.pack(side="left", padx=(0, 10), pady=15)
+
+        search_btn = ctk.CTkButton(
+            search_frame,
+            text="Search",
+            command=self._search,
+            font=FONTS['body'],
+            width=80,
+            height=35
+        )
+        search_btn.pack(side="left", padx=(0, 15), pady=15)
+
+        # Replay bar
+        if self.on_start_replay:
+            self._create_replay_bar(container)
+
+        # Results section
+        results_section = ctk.CTkFrame(container, fg_color=COLORS['bg_secondary'])
+        results_section.pack(fill="both", expand=True)
+
+        self.results_textbox = ctk.CTkTextbox(
+            results_section,
+            font=FONTS['mono'],
+            wrap="none",
+            state="disabled",
+            fg_color=COLORS['bg_tertiary']
+        )
+        self.results_textbox.pack(fill="both", expand=True, padx=15, pady=(15, 10))
+
+        self.results_textbox.tag_config("uploaded", foreground=COLORS['success'])
+        self.results_textbox.tag_config("failed", foreground=COLORS['error'])
+        self.results_textbox.tag_config("error", foreground=COLORS['error'])
+        self.results_textbox.tag_config("skipped", foreground=COLORS['warning'])
+        self.results_textbox.tag_config("detail", foreground=COLORS['text_muted'])
+
+        # Paging controls
+        paging_frame = ctk.CTkFrame(results_section, fg_color="transparent")
+        paging_frame.pack(fill="x", padx=15, pady=(0, 15))
+
+        self.prev_button = ctk.CTkButton(
+            paging_frame,
+            text="‹ Newer",
+            command=self._prev_page,
+            font=FONTS['small'],
+            width=80,
+            height=25,
+            fg_color=COLORS['bg_tertiary'],
+            hover_color=COLORS['border']
+        )
+        self.prev_button.pack(side="left")
+
+        self.page_label = ctk.CTkLabel(
+            paging_frame,
+            text="",
+            font=FONTS['small'],
+            text_color=COLORS['text_secondary']
+        )
+        self.page_label.pack(side="left", expand=True)
+
+        self.next_button = ctk.CTkButton(
+            paging_frame,
+            text="Older ›",
+            command=self._next_page,
+            font=FONTS['small'],
+            width=80,
+            height=25,
+            fg_color=COLORS['bg_tertiary'],
+            hover_color=COLORS['border']
+        )
+        self.next_button.pack(side="right")
+
+    def _create_replay_bar(self, container):
+        """Create the controls for re-uploading a range of mail"""
+        replay_frame = ctk.CTkFrame(container, fg_color=COLORS['bg_secondary'])
+        replay_frame.pack(fill="x", pady=(0, 15))
+
+        replay_label = ctk.CTkLabel(
+            replay_frame,
+            text="Replay",
+            font=FONTS['heading'],
+            text_color=COLORS['text_primary']
+        )
+        replay_label.pack(side="left", padx=(15, 10), pady=15)
+
+        self.replay_label_entry = ctk.CTkEntry(
+            replay_frame,
+            placeholder_text="Character (all)",
+            font=FONTS['body'],
+            width=130,
+            height=35
+        )
+        self.replay_label_entry.pack(side="left", padx=(0, 10), pady=15)
+
+        self.replay_since_entry = ctk.CTkEntry(
+            replay_frame,
+            placeholder_text="From YYYY-MM-DD",
+            font=FONTS['body'],
+            width=130,
+            height=35
+        )
+        self.replay_since_entry.pack(side="left", padx=(0, 10), pady=15)
+
+        self.replay_until_entry = ctk.CTkEntry(
+            replay_frame,
+            placeholder_text="To YYYY-MM-DD",
+            font=FONTS['body'],
+            width=130,
+            height=35
+        )
+        self.replay_until_entry.pack(side="left", padx=(0, 10), pady=15)
+
+        self.replay_rate_entry = ctk.CTkEntry(
+            replay_frame,
+            placeholder_text="Files/min (60)",
+            font=FONTS['body'],
+            width=110,
+            height=35
+        )
+        self.replay_rate_entry.pack(side="left", padx=(0, 10), pady=15)
+
+        self.replay_button = ctk.CTkButton(
+            replay_frame,
+            text="Replay Matching",
+            command=self._toggle_replay,
+            font=FONTS['body'],
+            width=130,
+            height=35
+        )
+        self.replay_button.pack(side="left", padx=(0, 10), pady=15)
+
+        self.replay_status = ctk.CTkLabel(
+            replay_frame,
+            text="",
+            font=FONTS['small'],
+            text_color=COLORS['text_secondary']
+        )
+        self.replay_status.pack(side="left", padx=(0, 15), pady=15)
+
+        if not (self.on_export and self.on_import):
+            return
+
+        # Offline transfer
+        bundle_frame = ctk.CTkFrame(container, fg_color=COLORS['bg_secondary'])
+        bundle_frame.pack(fill="x", pady=(0, 15))
+
+        bundle_label = ctk.CTkLabel(
+            bundle_frame,
+            text="Bundles",
+            font=FONTS['heading'],
+            text_color=COLORS['text_primary']
+        )
+        bundle_label.pack(side="left", padx=(15, 10), pady=15)
+
+        for text, command in (
+            ("Export Matching", lambda: self._export(pending=False)),
+            ("Export Pending", lambda: self._export(pending=True)),
+            ("Import Bundles", self._import),
+        ):
+            button = ctk.CTkButton(
+                bundle_frame,
+                text=text,
+                command=command,
+                font=FONTS['body'],
+                width=130,
+                height=35,
+                fg_color=COLORS['bg_tertiary'],
+                hover_color=COLORS['border'],
+                border_width=1,
+                border_color=COLORS['border']
+            )
+            button.pack(side="left", padx=(0, 10), pady=15)
+
+        bundle_hint = ctk.CTkLabel(
+            bundle_frame,
+            text="Matching uses the replay filters; imports use the replay rate",
+            font=FONTS['small'],
+            text_color=COLORS['text_secondary']
+        )
+        bundle_hint.pack(side="left", padx=(0, 15), pady=15)
+
+    def _toggle_replay(self):
+        """Start a replay of the selected range, or cancel the running one"""
+        if self.is_replaying:
+            success, message = self.on_stop_replay()
+            self.replay_status.configure(
+                text=message,
+                text_color=COLORS['text_secondary'] if success else COLORS['error']
+            )
+            return
+
+        filters = self._replay_filters()
+        if filters is None:
+            return
+
+        label, since, until, status, rate = filters
+        success, message = self.on_start_replay(label, since, until, status, rate)
+        self.replay_status.configure(
+            text=message,
+            text_color=COLORS['info'] if success else COLORS['error']
+        )
+        if success:
+            self.set_replay_progress(0, 0, True)
+
+    def _replay_filters(self) -> Optional[tuple]:
+        """Read (label, since, until, status, rate) from the replay bar, None if invalid"""
+        try:
+            since = self._parse_date(self.replay_since_entry.get())
+            until = self._parse_date(self.replay_until_entry.get(), end_of_day=True)
+            rate_text = self.replay_rate_entry.get().strip()
+            rate = float(rate_text) if rate_text else 60
+        except ValueError:
+            self.replay_status.configure(text="Use YYYY-MM-DD dates and a number of files per minute", text_color=COLORS['error'])
+            return None
+
+        # The status filter above narrows the selection to matching history
+        status = self.status_var.get()
+        status = None if status == "All" else status
+
+        return self.replay_label_entry.get().strip(), since, until, status, rate
+
+    def _export(self, pending: bool):
+        """Export matching or pending mail to bundles in a chosen folder"""
+        filters = self._replay_filters()
+        if filters is None:
+            return
+
+        output_dir = filedialog.askdirectory(title="Select Export Folder")
+        if not output_dir:
+            return
+
+        label, since, until, status, _ = filters
+        success, message = self.on_export(output_dir, pending, label, since, until, status)
+        self.replay_status.configure(
+            text=message,
+            text_color=COLORS['info'] if success else COLORS['error']
+        )
+
+    def _import(self):
+        """Upload the mail in chosen bundle files"""
+        if self.is_replaying:
+            self.replay_status.configure(text="Wait for the replay to finish or cancel it", text_color=COLORS['error'])
+            return
+
+        filters = self._replay_filters()
+        if filters is None:
+            return
+
+        paths = filedialog.askopenfilenames(
+            title="Select Mail Bundles",
+            filetypes=[("Mail bundles", "*.jsonl.gz"), ("All files", "*.*")]
+        )
+        if not paths:
+            return
+
+        success, message = self.on_import(list(paths), filters[4])
+        self.replay_status.configure(
+            text=message,
+            text_color=COLORS['info'] if success else COLORS['error']
+        )
+        if success:
+            self.set_replay_progress(0, 0, True)
+
+    @staticmethod
+    def _parse_date(text: str, end_of_day: bool = False) -> Optional[float]:
+        """Parse a YYYY-MM-DD date as local midnight (of the next day if end_of_day), None if empty"""
+        text = text.strip()
+        if not text:
+            return None
+        day = datetime.strptime(text, "%Y-%m-%d")
+        if end_of_day:
+            day += timedelta(days=1)
+        return day.timestamp()
+
+    def set_replay_progress(self, done: int, total: int, running: bool):
+        """
+        Show replay progress
+
+        Args:
+            done: Files finished
+            total: Files selected, 0 while still selecting
+            running: Whether the replay is still going
+        """
+        if not self.on_start_replay:
+            return
+
+        self.is_replaying = running
+        self.replay_button.configure(text="Cancel Replay" if running else "Replay Matching")
+
+        if running:
+            text = f"Replaying {done}/{total}" if total else "Selecting files..."
+            self.replay_status.configure(text=text, text_color=COLORS['info'])
+        elif total:
+            self.replay_status.configure(
+                text=f"Replay {'finished' if done >= total else 'cancelled'}: {done}/{total}",
+                text_color=COLORS['success'] if done >= total else COLORS['text_secondary']
+            )
+
+    def on_show(self):
+        """Reload the current page whenever the tab becomes visible"""
+        self.refresh()
+
+    def refresh(self):
+        """Re-run the current query and redraw the current page"""
+        search = self.search_entry.get().strip()
+        status = self.status_var.get()
+        status = None if status == "All" else status
+
+        self.total = self.history_store.count(search, status)
+        last_page = max(0, (self.total - 1) // self.PAGE_SIZE)
+        self.page = min(self.page, last_page)
+
+        rows = self.history_store.query(
+            search,
+            status,
+            limit=self.PAGE_SIZE,
+            offset=self.page * self.PAGE_SIZE
+        )
+        self._render(rows)
+
+    def _render(self, rows):
+        """Draw one page of rows"""
+        self.results_textbox.configure(state="normal")
+        self.results_textbox.delete("1.0", "end")
+
+        if not rows:
+            self.results_textbox.insert("end", "No matching uploads\n", "detail")
+
+        for row in rows:
+            response = " ".join((row['response'] or "").split())[:120]
+            when = datetime.fromtimestamp(row['detected_at'] or 0).strftime("%Y-%m-%d %H:%M:%S")
+            status = row['status'] or ""
+            label = row['label'] or "-"
+            subject = row['subject'] or "(no subject)"
+            sender = row['sender'] or "unknown"
+
+            self.results_textbox.insert("end", f"[{when}] ")
+            self.results_textbox.insert("end", f"{status:<9}", status)
+            self.results_textbox.insert("end", f" {label} · {sender} · {subject}\n")
+            self.results_textbox.insert(
+                "end",
+                f"    {row['file_path']} · {row['size'] or 0} bytes · {(row['sha256'] or '')[:12]}"
+                f" · {response}\n",
+                "detail"
+            )
+
+        self.results_textbox.configure(state="disabled")
+
+        page_count = max(1, (self.total + self.PAGE_SIZE - 1) // self.PAGE_SIZE)
+        self.page_label.configure(text=f"Page {self.page + 1} of {page_count} · {self.total} uploads")
+        self.prev_button.configure(state="normal" if self.page > 0 else "disabled")
+        self.next_button.configure(state="normal" if self.page + 1 < page_count else "disabled")
+
+    def _search(self):
+        """Start a new search from the first page"""
+        self.page = 0
+        self.refresh()
+
+    def _prev_page(self):
+        """Show newer uploads"""
+        if self.page > 0:
+            self.page -= 1
+            self.refresh()
+
+    def _next_page(self):
+        """Show older uploads"""
+        self.page += 1
+        self.refresh()
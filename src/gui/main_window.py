@@ -3,10 +3,13 @@ Main application window
 """
 import customtkinter as ctk
 import logging
+import threading
 from typing import Optional
 from .theme import COLORS, FONTS
 from .settings_tab import SettingsTab
 from .monitor_tab import MonitorTab
+from .history_tab import HistoryTab
+from .dead_letter_tab import DeadLetterTab
 
 logger = logging.getLogger(__name__)
 
@@ -20,7 +23,18 @@ class MainWindow(ctk.CTk):
         on_start_monitoring,
         on_stop_monitoring,
         on_test_connection,
-        on_close
+        on_close,
+        on_session_end=None,
+        history_store=None,
+        stats_store=None,
+        on_reconfigure=None,
+        dead_letter_store=None,
+        on_retry_dead_letters=None,
+        on_toggle_profiling=None,
+        on_start_replay=None,
+        on_stop_replay=None,
+        on_export=None,
+        on_import=None
     ):
         """
         Initialize main window
@@ -31,6 +45,17 @@ class MainWindow(ctk.CTk):
             on_stop_monitoring: Callback to stop monitoring
             on_test_connection: Callback to test API connection
             on_close: Callback when window is closed
+            on_session_end: Optional callback when the OS session is ending
+            history_store: Optional HistoryStore backing the History tab
+            stats_store: Optional StatsStore backing the monitor rollups
+            on_reconfigure: Optional callback to apply saved settings to the engine
+            dead_letter_store: Optional DeadLetterStore backing the Dead Letters tab
+            on_retry_dead_letters: Callback to retry all dead letters
+            on_toggle_profiling: Optional callback to start or stop profiling
+            on_start_replay: Optional callback to replay a range of mail
+            on_stop_replay: Optional callback to cancel the replay
+            on_export: Optional callback to export mail bundles
+            on_import: Optional callback to upload mail bundles
         """
         super().__init__()
 
@@ -39,8 +64,24 @@ class MainWindow(ctk.CTk):
         self.on_stop_monitoring = on_stop_monitoring
         self.on_test_connection = on_test_connection
         self.on_close_callback = on_close
+        self.on_session_end = on_session_end
+        self.on_reconfigure = on_reconfigure
+        self.history_store = history_store
+        self.stats_store = stats_store
+        self.dead_letter_store = dead_letter_store
+        self.on_retry_dead_letters = on_retry_dead_letters
+        self.on_toggle_profiling = on_toggle_profiling
+        self.on_start_replay = on_start_replay
+        self.on_stop_replay = on_stop_replay
+        self.on_export = on_export
+        self.on_import = on_import
+        self.dead_letter_tab: Optional[DeadLetterTab] = None
+        self.history_tab: Optional[HistoryTab] = None
 
         self.is_monitoring = False
+        self.is_starting = False
+        self.is_reconfiguring = False
+        self._reconfigure_again = False  # settings saved while a reconfigure was running
 
         self._setup_window()
         self._create_widgets()
@@ -95,6 +136,9 @@ class MainWindow(ctk.CTk):
         # Handle window close
         self.protocol("WM_DELETE_WINDOW", self._on_window_close)
 
+        # Tk sends WM_SAVE_YOURSELF when Windows is logging off
+        self.protocol("WM_SAVE_YOURSELF", self._on_session_end)
+
     def _create_widgets(self):
         """Create all widgets"""
 
@@ -185,54 +229,133 @@ class MainWindow(ctk.CTk):
             fg_color=COLORS['bg_primary'],
             segmented_button_fg_color=COLORS['bg_secondary'],
             segmented_button_selected_color=COLORS['accent_red'],
-            segmented_button_selected_hover_color="#b91c1c"
+            segmented_button_selected_hover_color="#b91c1c",
+            command=self._on_tab_changed
         )
         self.tabview.pack(fill="both", expand=True, padx=0, pady=0)
 
         # Create tabs
         self.tabview.add("Monitor")
+        if self.history_store:
+            self.tabview.add("History")
+        if self.dead_letter_store:
+            self.tabview.add("Dead Letters")
         self.tabview.add("Settings")
 
         # Monitor tab
         self.monitor_tab = MonitorTab(
             self.tabview.tab("Monitor"),
-            self.config_manager
+            self.config_manager,
+            stats_store=self.stats_store
         )
         self.monitor_tab.pack(fill="both", expand=True)
 
+        # History tab (queried lazily when first shown)
+        if self.history_store:
+            self.history_tab = HistoryTab(
+                self.tabview.tab("History"),
+                self.history_store,
+                on_start_replay=self.on_start_replay,
+                on_stop_replay=self.on_stop_replay,
+                on_export=self.on_export,
+                on_import=self.on_import
+            )
+            self.history_tab.pack(fill="both", expand=True)
+
+        # Dead letters tab
+        if self.dead_letter_store:
+            self.dead_letter_tab = DeadLetterTab(
+                self.tabview.tab("Dead Letters"),
+                self.dead_letter_store,
+                on_retry=self.on_retry_dead_letters,
+                on_message=self.monitor_tab.log_message
+            )
+            self.dead_letter_tab.pack(fill="both", expand=True)
+
         # Settings tab
         self.settings_tab = SettingsTab(
             self.tabview.tab("Settings"),
             self.config_manager,
-            on_save_callback=self._on_settings_saved
+            on_save_callback=self._on_settings_saved,
+            on_toggle_profiling=self.on_toggle_profiling
         )
         self.settings_tab.pack(fill="both", expand=True)
 
         # Set default tab
         self.tabview.set("Monitor")
 
+    def _on_tab_changed(self):
+        """Handle tab selection changes"""
+        selected = self.tabview.get()
+        if selected == "History" and self.history_tab:
+            self.history_tab.on_show()
+        elif selected == "Dead Letters" and self.dead_letter_tab:
+            self.dead_letter_tab.on_show()
+
     def _handle_start(self):
         """Handle start monitoring button"""
-        # Validate configuration first
-        is_valid, errors = self.config_manager.validate()
+        self.begin_start()
+
+    def begin_start(self, auto: bool = False):
+        """
+        Validate the configuration and start monitoring on a background thread
+
+        Mail paths can live on slow or disconnected drives, so nothing here
+        touches the file system on the UI thread; progress is shown in the
+        monitor status line.
+
+        Args:
+            auto: Started by auto-start rather than the Start button
+        """
+        if self.is_starting or self.is_monitoring:
+            return
+
+        self.is_starting = True
+        self.start_button.configure(state="disabled")
+        self.monitor_tab.show_status_message("Checking mail directories...", "info")
+
+        def on_progress(done: int, total: int, path: str):
+            self.after(0, lambda: self.monitor_tab.show_status_message(
+                f"Checking mail directory {done}/{total}: {path}", "info"
+            ))
+
+        def start_thread():
+            # Validate configuration first
+            is_valid, errors = self.config_manager.validate(on_progress)
+            if not is_valid:
+                self.after(0, lambda: self._handle_start_result(False, "", errors, auto))
+                return
+
+            self.after(0, lambda: self.monitor_tab.show_status_message("Starting watchers...", "info"))
+            success, message = self.on_start_monitoring()
 
-        if not is_valid:
+            # Update UI on main thread
+            self.after(0, lambda: self._handle_start_result(success, message, [], auto))
+
+        threading.Thread(target=start_thread, name="MonitorStart", daemon=True).start()
+
+    def _handle_start_result(self, success: bool, message: str, errors: list, auto: bool):
+        """Handle the outcome of begin_start"""
+        self.is_starting = False
+
+        if errors:
             error_msg = "Configuration errors:\n" + "\n".join(f"• {err}" for err in errors)
             self.monitor_tab.log_message(error_msg, "error")
+            self.monitor_tab.set_monitoring_status(False)
+            self.start_button.configure(state="normal")
             self.tabview.set("Settings")
             return
 
-        # Call start callback
-        success, message = self.on_start_monitoring()
-
         if success:
             self.is_monitoring = True
             self.start_button.configure(state="disabled")
             self.stop_button.configure(state="normal")
             self.monitor_tab.set_monitoring_status(True, message)
-            self.monitor_tab.log_message(message, "success")
+            self.monitor_tab.log_message(f"Auto-started: {message}" if auto else message, "success")
         else:
-            self.monitor_tab.log_message(f"Failed to start: {message}", "error")
+            self.start_button.configure(state="normal")
+            self.monitor_tab.set_monitoring_status(False)
+            self.monitor_tab.log_message(f"{'Auto-start' if auto else 'Failed to start'}: {message}", "error")
 
     def _handle_stop(self):
         """Handle stop monitoring button"""
@@ -261,7 +384,6 @@ class MainWindow(ctk.CTk):
             # Update UI on main thread
             self.after(0, lambda: self._handle_test_result(success, message))
 
-        import threading
         threading.Thread(target=test_thread, daemon=True).start()
 
     def _handle_test_result(self, success: bool, message: str):
@@ -277,6 +399,47 @@ class MainWindow(ctk.CTk):
         """Handle settings saved event"""
         self.monitor_tab.log_message("Settings saved successfully", "success")
 
+        # Hand every save to the engine; while monitoring, path and key
+        # changes apply without a restart
+        self.begin_reconfigure()
+
+    def begin_reconfigure(self):
+        """
+        Apply the saved settings to the engine on a background thread
+
+        Reconfiguring checks mail paths, stops watchers and sinks and may
+        wait for a start in progress, so it never runs on the UI thread.
+        Saves made meanwhile are applied once it finishes, in order.
+        """
+        if not self.on_reconfigure:
+            return
+        if self.is_reconfiguring:
+            self._reconfigure_again = True
+            return
+
+        self.is_reconfiguring = True
+
+        def reconfigure_thread():
+            try:
+                success, message = self.on_reconfigure()
+            except Exception as e:
+                logger.error(f"Error applying settings: {e}", exc_info=True)
+                success, message = False, f"Failed to apply settings: {e}"
+
+            # Update UI on main thread
+            self.after(0, lambda: self._handle_reconfigure_result(success, message))
+
+        threading.Thread(target=reconfigure_thread, name="Reconfigure", daemon=True).start()
+
+    def _handle_reconfigure_result(self, success: bool, message: str):
+        """Handle the outcome of begin_reconfigure"""
+        self.is_reconfiguring = False
+        self.monitor_tab.log_message(message, "success" if success else "error")
+
+        if self._reconfigure_again:
+            self._reconfigure_again = False
+            self.begin_reconfigure()
+
     def _on_window_close(self):
         """Handle window close event"""
         # Check if minimize to tray is enabled
@@ -286,6 +449,14 @@ class MainWindow(ctk.CTk):
         else:
             self.on_close_callback()
 
+    def _on_session_end(self):
+        """Handle OS logoff or shutdown"""
+        logger.info("Session ending")
+        if self.on_session_end:
+            self.on_session_end()
+        else:
+            self.on_close_callback()
+
     def show_window(self):
         """Show the window"""
         self.deiconify()
@@ -13,16 +13,21 @@ logger = logging.getLogger(__name__)
 class MonitorTab(ctk.CTkFrame):
     """Monitoring and status tab"""
 
-    def __init__(self, master, config_manager):
+    ROLLUP_REFRESH_MS = 5000
+    MAX_LOG_LINES = 1000
+
+    def __init__(self, master, config_manager, stats_store=None):
         """
         Initialize monitor tab
 
         Args:
             master: Parent widget
             config_manager: ConfigManager instance
+            stats_store: Optional StatsStore for last hour / today figures
         """
         super().__init__(master)
         self.config_manager = config_manager
+        self.stats_store = stats_store
         self.is_monitoring = False
         self.stats = {
             'files_processed': 0,
@@ -34,6 +39,9 @@ class MonitorTab(ctk.CTkFrame):
         self.configure(fg_color=COLORS['bg_primary'])
         self._create_widgets()
 
+        if self.stats_store:
+            self._refresh_rollups()
+
     def _create_widgets(self):
         """Create all monitor widgets"""
 
@@ -82,6 +90,22 @@ class MonitorTab(ctk.CTkFrame):
         )
         self.status_text.pack(side="left")
 
+        self.connection_label = ctk.CTkLabel(
+            status_frame,
+            text="",
+            font=FONTS['small'],
+            text_color=COLORS['text_secondary']
+        )
+        self.connection_label.pack(side="right")
+
+        self.rate_label = ctk.CTkLabel(
+            status_frame,
+            text="",
+            font=FONTS['small'],
+            text_color=COLORS['text_secondary']
+        )
+        self.rate_label.pack(side="right", padx=(0, 15))
+
         # Statistics Section
         stats_section = ctk.CTkFrame(container, fg_color=COLORS['bg_secondary'])
         stats_section.pack(fill="x", pady=(0, 15))
@@ -155,6 +179,27 @@ class MonitorTab(ctk.CTkFrame):
         )
         self.errors_label.pack(pady=(0, 10))
 
+        # Rollups from the persistent statistics store
+        if self.stats_store:
+            rollup_frame = ctk.CTkFrame(stats_section, fg_color="transparent")
+            rollup_frame.pack(fill="x", padx=15, pady=(0, 15))
+
+            self.last_hour_label = ctk.CTkLabel(
+                rollup_frame,
+                text="",
+                font=FONTS['small'],
+                text_color=COLORS['text_secondary']
+            )
+            self.last_hour_label.pack(anchor="w")
+
+            self.today_label = ctk.CTkLabel(
+                rollup_frame,
+                text="",
+                font=FONTS['small'],
+                text_color=COLORS['text_secondary']
+            )
+            self.today_label.pack(anchor="w")
+
         # Activity Log Section
         log_section = ctk.CTkFrame(container, fg_color=COLORS['bg_secondary'])
         log_section.pack(fill="both", expand=True)
@@ -224,6 +269,52 @@ class MonitorTab(ctk.CTkFrame):
                 text_color=COLORS['text_secondary']
             )
 
+    def set_connection_state(self, online: bool, parked: int = 0):
+        """
+        Show whether the server is reachable
+
+        Args:
+            online: Whether the API is reachable
+            parked: Number of uploads waiting for the connection
+        """
+        if online:
+            self.connection_label.configure(text="● Online", text_color=COLORS['success'])
+        else:
+            self.connection_label.configure(
+                text=f"● Offline · {parked} upload{'' if parked == 1 else 's'} parked",
+                text_color=COLORS['warning']
+            )
+
+    def set_upload_rate(self, rate: float, limit=None, reason: str = ""):
+        """
+        Show the current upload rate and cap
+
+        Args:
+            rate: Bytes per second sent recently
+            limit: Cap in bytes per second, 0 if uploads are held, None if uncapped
+            reason: Why the cap applies or not
+        """
+        text = f"↑ {rate / 1024:.1f} KB/s"
+        color = COLORS['text_secondary']
+        if limit == 0:
+            text += f" · held ({reason})"
+            color = COLORS['warning']
+        elif limit is not None:
+            text += f" · cap {limit / 1024:g} KB/s ({reason})"
+            color = COLORS['info']
+        self.rate_label.configure(text=text, text_color=color)
+
+    def show_status_message(self, message: str, level: str = "warning"):
+        """
+        Show a transient status such as shutdown progress
+
+        Args:
+            message: Status text
+            level: Color level (info, success, error, warning)
+        """
+        self.status_indicator.configure(text_color=COLORS[level])
+        self.status_text.configure(text=message, text_color=COLORS[level])
+
     def log_message(self, message: str, level: str = "info"):
         """
         Add message to activity log
@@ -237,6 +328,12 @@ class MonitorTab(ctk.CTkFrame):
         self.log_textbox.configure(state="normal")
         self.log_textbox.insert("end", f"[{timestamp}] ", "timestamp")
         self.log_textbox.insert("end", f"{message}\n", level)
+
+        # Keep the log bounded when running for weeks
+        lines = int(self.log_textbox.index("end-1c").split(".")[0]) - 1
+        if lines > self.MAX_LOG_LINES:
+            self.log_textbox.delete("1.0", f"{lines - self.MAX_LOG_LINES + 1}.0")
+
         self.log_textbox.configure(state="disabled")
         self.log_textbox.see("end")
 
@@ -259,6 +356,33 @@ class MonitorTab(ctk.CTkFrame):
             elif stat_type == 'errors':
                 self.errors_label.configure(text=str(self.stats['errors']))
 
+    def _refresh_rollups(self):
+        """Update the last hour and today figures"""
+        try:
+            self.last_hour_label.configure(
+                text="Last hour: " + self._format_rollup(self.stats_store.last_hour())
+            )
+            self.today_label.configure(
+                text="Today: " + self._format_rollup(self.stats_store.today())
+            )
+        except Exception as e:
+            logger.error(f"Error refreshing statistics: {e}")
+
+        self.after(self.ROLLUP_REFRESH_MS, self._refresh_rollups)
+
+    @staticmethod
+    def _format_rollup(totals) -> str:
+        """Format rollup totals for display"""
+        text = (
+            f"{int(totals['processed'])} processed · "
+            f"{int(totals['uploaded'])} uploaded · "
+            f"{int(totals['errors'])} errors · "
+            f"{totals['bytes'] / 1024:.1f} KB"
+        )
+        if totals['requests']:
+            text += f" · avg {totals['avg_latency'] * 1000:.0f} ms"
+        return text
+
     def reset_stats(self):
         """Reset all statistics"""
         self.stats = {
@@ -3,8 +3,11 @@ Settings tab for configuration management
 """
 import customtkinter as ctk
 from tkinter import filedialog
+import os
 import logging
-from typing import Callable, List, Dict
+import threading
+from typing import Callable, List, Dict, Optional
+from src.core.mail_discovery import MailDiscovery, candidate_roots
 from .theme import COLORS, FONTS
 
 logger = logging.getLogger(__name__)
@@ -19,7 +22,7 @@ class MailPathEntry(ctk.CTkFrame):
 
         Args:
             master: Parent widget
-            index: Entry index (0-3)
+            index: Entry index (0-19)
             on_remove: Callback when remove button is clicked
         """
         super().__init__(master, fg_color="transparent", **kwargs)
@@ -114,9 +117,21 @@ class MailPathEntry(ctk.CTkFrame):
 class SettingsTab(ctk.CTkFrame):
     """Settings configuration tab"""
 
-    MAX_MAIL_PATHS = 4
-
-    def __init__(self, master, config_manager, on_save_callback: Callable = None):
+    MAX_MAIL_PATHS = 20
+    LIMIT_MODES = {
+        "Off": "off",
+        "Always": "always",
+        "While the game is running": "game_running",
+        "During hours": "hours",
+    }
+
+    def __init__(
+        self,
+        master,
+        config_manager,
+        on_save_callback: Callable = None,
+        on_toggle_profiling: Callable = None
+    ):
         """
         Initialize settings tab
 
@@ -124,11 +139,17 @@ class SettingsTab(ctk.CTkFrame):
             master: Parent widget
             config_manager: ConfigManager instance
             on_save_callback: Optional callback when settings are saved
+            on_toggle_profiling: Optional callback to start or stop profiling,
+                returns (success, message)
         """
         super().__init__(master)
         self.config_manager = config_manager
         self.on_save_callback = on_save_callback
+        self.on_toggle_profiling = on_toggle_profiling
+        self.profile_button = None
         self.mail_path_entries: List[MailPathEntry] = []
+        self.discovery: Optional[MailDiscovery] = None
+        self.discovered: List[Dict[str, str]] = []
 
         self.configure(fg_color=COLORS['bg_primary'])
         self._create_widgets()
@@ -169,7 +190,7 @@ class SettingsTab(ctk.CTkFrame):
 
         mail_label = ctk.CTkLabel(
             header_frame,
-            text="SWG Mail Directories (up to 4 characters)",
+            text=f"SWG Mail Directories (up to {self.MAX_MAIL_PATHS} characters)",
             font=FONTS['heading'],
             text_color=COLORS['text_primary']
         )
@@ -182,9 +203,36 @@ class SettingsTab(ctk.CTkFrame):
         # Add initial entry
         self._add_mail_path_entry()
 
+        # Discovered mail folders, shown after a search
+        self.discovery_frame = ctk.CTkFrame(mail_section, fg_color=COLORS['bg_tertiary'])
+
+        self.discovery_label = ctk.CTkLabel(
+            self.discovery_frame,
+            text="",
+            font=FONTS['small'],
+            text_color=COLORS['text_secondary'],
+            justify="left",
+            wraplength=500
+        )
+        self.discovery_label.pack(side="left", padx=10, pady=8)
+
+        self.import_button = ctk.CTkButton(
+            self.discovery_frame,
+            text="Import",
+            command=self._import_discovered,
+            font=FONTS['body'],
+            width=120,
+            height=30,
+            fg_color=COLORS['accent_green'],
+            hover_color="#15803d"
+        )
+
+        buttons_frame = ctk.CTkFrame(mail_section, fg_color="transparent")
+        buttons_frame.pack(padx=15, pady=(5, 15))
+
         # Add Character button
         self.add_button = ctk.CTkButton(
-            mail_section,
+            buttons_frame,
             text="+ Add Character",
             command=self._add_mail_path_entry,
             font=FONTS['body'],
@@ -194,7 +242,21 @@ class SettingsTab(ctk.CTkFrame):
             border_width=1,
             border_color=COLORS['border']
         )
-        self.add_button.pack(padx=15, pady=(5, 15))
+        self.add_button.pack(side="left", padx=(0, 10))
+
+        # Find Characters button
+        self.find_button = ctk.CTkButton(
+            buttons_frame,
+            text="Find Characters",
+            command=self._toggle_discovery,
+            font=FONTS['body'],
+            height=35,
+            fg_color=COLORS['bg_tertiary'],
+            hover_color=COLORS['border'],
+            border_width=1,
+            border_color=COLORS['border']
+        )
+        self.find_button.pack(side="left")
 
         # API Credentials Section
         api_section = ctk.CTkFrame(container, fg_color=COLORS['bg_secondary'])
@@ -226,6 +288,118 @@ class SettingsTab(ctk.CTkFrame):
         )
         self.user_key_entry.pack(fill="x", padx=15, pady=(0, 10))
 
+        # Additional Destinations Section
+        sinks_section = ctk.CTkFrame(container, fg_color=COLORS['bg_secondary'])
+        sinks_section.pack(fill="x", pady=(0, 10))
+
+        sinks_label = ctk.CTkLabel(
+            sinks_section,
+            text="Additional Destinations",
+            font=FONTS['heading'],
+            text_color=COLORS['text_primary']
+        )
+        sinks_label.pack(anchor="w", padx=15, pady=(10, 5))
+
+        sinks_hint = ctk.CTkLabel(
+            sinks_section,
+            text="Each destination has its own queue and retries, so it never slows swgtracker.com uploads",
+            font=FONTS['small'],
+            text_color=COLORS['text_secondary']
+        )
+        sinks_hint.pack(anchor="w", padx=15, pady=(0, 5))
+
+        self.local_database_var = ctk.BooleanVar()
+        local_database_switch = ctk.CTkSwitch(
+            sinks_section,
+            text="Store mail in a local database (mail.db)",
+            variable=self.local_database_var,
+            font=FONTS['body'],
+            progress_color=COLORS['accent_green']
+        )
+        local_database_switch.pack(anchor="w", padx=15, pady=5)
+
+        webhook_label = ctk.CTkLabel(
+            sinks_section,
+            text="Webhook URL",
+            font=FONTS['body'],
+            text_color=COLORS['text_secondary']
+        )
+        webhook_label.pack(anchor="w", padx=15, pady=(5, 5))
+
+        self.webhook_entry = ctk.CTkEntry(
+            sinks_section,
+            placeholder_text="http://localhost:8080/mail (leave empty to disable)",
+            font=FONTS['body'],
+            height=35
+        )
+        self.webhook_entry.pack(fill="x", padx=15, pady=(0, 10))
+
+        # Bandwidth Section
+        bandwidth_section = ctk.CTkFrame(container, fg_color=COLORS['bg_secondary'])
+        bandwidth_section.pack(fill="x", pady=(0, 10))
+
+        bandwidth_label = ctk.CTkLabel(
+            bandwidth_section,
+            text="Upload Bandwidth",
+            font=FONTS['heading'],
+            text_color=COLORS['text_primary']
+        )
+        bandwidth_label.pack(anchor="w", padx=15, pady=(10, 5))
+
+        bandwidth_hint = ctk.CTkLabel(
+            bandwidth_section,
+            text="While the cap applies, new mail waits in the queue and uploads when it is lifted. 0 KB/s holds uploads completely.",
+            font=FONTS['small'],
+            text_color=COLORS['text_secondary']
+        )
+        bandwidth_hint.pack(anchor="w", padx=15, pady=(0, 5))
+
+        bandwidth_frame = ctk.CTkFrame(bandwidth_section, fg_color="transparent")
+        bandwidth_frame.pack(fill="x", padx=15, pady=(5, 10))
+
+        self.limit_mode_var = ctk.StringVar(value="Off")
+        limit_mode_menu = ctk.CTkOptionMenu(
+            bandwidth_frame,
+            values=list(self.LIMIT_MODES),
+            variable=self.limit_mode_var,
+            font=FONTS['body'],
+            width=220,
+            height=35
+        )
+        limit_mode_menu.pack(side="left", padx=(0, 10))
+
+        self.limit_kbps_entry = ctk.CTkEntry(
+            bandwidth_frame,
+            placeholder_text="KB/s",
+            font=FONTS['body'],
+            width=80,
+            height=35
+        )
+        self.limit_kbps_entry.pack(side="left", padx=(0, 5))
+
+        ctk.CTkLabel(
+            bandwidth_frame,
+            text="KB/s",
+            font=FONTS['body'],
+            text_color=COLORS['text_secondary']
+        ).pack(side="left", padx=(0, 15))
+
+        ctk.CTkLabel(
+            bandwidth_frame,
+            text="Hours",
+            font=FONTS['body'],
+            text_color=COLORS['text_secondary']
+        ).pack(side="left", padx=(0, 5))
+
+        self.limit_hours_entry = ctk.CTkEntry(
+            bandwidth_frame,
+            placeholder_text="18-23",
+            font=FONTS['body'],
+            width=80,
+            height=35
+        )
+        self.limit_hours_entry.pack(side="left")
+
         # Application Preferences Section
         prefs_section = ctk.CTkFrame(container, fg_color=COLORS['bg_secondary'])
         prefs_section.pack(fill="x", pady=(0, 10))
@@ -269,7 +443,63 @@ class SettingsTab(ctk.CTkFrame):
             font=FONTS['body'],
             progress_color=COLORS['accent_green']
         )
-        auto_start_switch.pack(anchor="w", padx=15, pady=(5, 10))
+        auto_start_switch.pack(anchor="w", padx=15, pady=5)
+
+        # Engine process
+        self.engine_process_var = ctk.BooleanVar()
+        engine_process_switch = ctk.CTkSwitch(
+            prefs_section,
+            text="Run uploads in a separate process (applies after restart)",
+            variable=self.engine_process_var,
+            font=FONTS['body'],
+            progress_color=COLORS['accent_green']
+        )
+        engine_process_switch.pack(anchor="w", padx=15, pady=5)
+
+        # Archive uploaded mail
+        self.archive_var = ctk.BooleanVar()
+        archive_switch = ctk.CTkSwitch(
+            prefs_section,
+            text="Archive uploaded mail (moves files out of the mail folders into zip archives)",
+            variable=self.archive_var,
+            font=FONTS['body'],
+            progress_color=COLORS['accent_green']
+        )
+        archive_switch.pack(anchor="w", padx=15, pady=(5, 10))
+
+        # Diagnostics Section
+        if self.on_toggle_profiling:
+            diagnostics_section = ctk.CTkFrame(container, fg_color=COLORS['bg_secondary'])
+            diagnostics_section.pack(fill="x", pady=(0, 10))
+
+            diagnostics_label = ctk.CTkLabel(
+                diagnostics_section,
+                text="Diagnostics",
+                font=FONTS['heading'],
+                text_color=COLORS['text_primary']
+            )
+            diagnostics_label.pack(anchor="w", padx=15, pady=(10, 5))
+
+            diagnostics_hint = ctk.CTkLabel(
+                diagnostics_section,
+                text="Records CPU profiles, memory growth and thread dumps to the profiles folder",
+                font=FONTS['small'],
+                text_color=COLORS['text_secondary']
+            )
+            diagnostics_hint.pack(anchor="w", padx=15, pady=(0, 5))
+
+            self.profile_button = ctk.CTkButton(
+                diagnostics_section,
+                text="Start Profiling",
+                command=self._toggle_profiling,
+                font=FONTS['body'],
+                height=35,
+                fg_color=COLORS['bg_tertiary'],
+                hover_color=COLORS['border'],
+                border_width=1,
+                border_color=COLORS['border']
+            )
+            self.profile_button.pack(anchor="w", padx=15, pady=(5, 15))
 
         # Save Button
         save_btn = ctk.CTkButton(
@@ -325,6 +555,87 @@ class SettingsTab(ctk.CTkFrame):
             if len(self.mail_path_entries) < self.MAX_MAIL_PATHS:
                 self.add_button.configure(state="normal")
 
+    def _toggle_discovery(self):
+        """Search the drives for mail folders, or cancel a running search"""
+        if self.discovery:
+            self.discovery.cancel()
+            self.find_button.configure(text="Cancelling...", state="disabled")
+            return
+
+        known_paths = [entry.get_values()["path"] for entry in self.mail_path_entries]
+        discovery = self.discovery = MailDiscovery([])
+
+        self.find_button.configure(text="Cancel Search")
+        self.import_button.pack_forget()
+        self.discovery_label.configure(text="Searching for mail folders...")
+        self.discovery_frame.pack(fill="x", padx=15, pady=(0, 5), before=self.add_button.master)
+
+        def on_found(entry: Dict[str, str]):
+            self.after(0, lambda: self.discovery_label.configure(
+                text=f"Searching for mail folders... {len(discovery.found)} found"
+            ))
+
+        def discovery_thread():
+            # Listing drive letters can block on disconnected network drives
+            discovery.roots = candidate_roots(path for path in known_paths if path)
+            results = discovery.scan(on_found)
+
+            # Update UI on main thread
+            self.after(0, lambda: self._handle_discovery_result(discovery, results))
+
+        threading.Thread(target=discovery_thread, name="MailDiscovery", daemon=True).start()
+
+    def _handle_discovery_result(self, discovery: MailDiscovery, results: List[Dict[str, str]]):
+        """Offer discovered mail folders that are not configured yet"""
+        self.discovery = None
+        self.find_button.configure(text="Find Characters", state="normal")
+
+        configured = {
+            os.path.normcase(os.path.abspath(entry.get_values()["path"]))
+            for entry in self.mail_path_entries if entry.get_values()["path"]
+        }
+        self.discovered = [
+            entry for entry in results
+            if os.path.normcase(os.path.abspath(entry["path"])) not in configured
+        ]
+
+        stopped = "Search cancelled. " if discovery.is_cancelled else ""
+        if not self.discovered:
+            self.discovery_label.configure(text=f"{stopped}No new mail folders found")
+            self.after(5000, lambda: self.discovery_frame.pack_forget() if not self.discovery else None)
+            return
+
+        names = ", ".join(entry["label"] for entry in self.discovered)
+        count = len(self.discovered)
+        self.discovery_label.configure(text=f"{stopped}Found {count} new character{'' if count == 1 else 's'}: {names}")
+        self.import_button.configure(text=f"Import {count}")
+        self.import_button.pack(side="right", padx=10, pady=8)
+
+    def _import_discovered(self):
+        """Add discovered mail folders to the form"""
+        imported = 0
+        for found in self.discovered:
+            # Fill blank entries before adding new ones
+            entry = next((e for e in self.mail_path_entries if not e.get_values()["path"]), None)
+            if entry is None:
+                if len(self.mail_path_entries) >= self.MAX_MAIL_PATHS:
+                    break
+                self._add_mail_path_entry()
+                entry = self.mail_path_entries[-1]
+
+            label = entry.get_values()["label"] or found["label"]
+            entry.set_values(found["path"], label)
+            imported += 1
+
+        skipped = len(self.discovered) - imported
+        self.discovered = []
+        self.discovery_frame.pack_forget()
+
+        message = f"Imported {imported} character{'' if imported == 1 else 's'}, save to apply"
+        if skipped:
+            message += f" ({skipped} skipped, maximum {self.MAX_MAIL_PATHS})"
+        self._show_status(message, COLORS['success'] if not skipped else COLORS['warning'])
+
     def _load_settings(self):
         """Load settings from config manager"""
         config = self.config_manager.get_all()
@@ -349,12 +660,38 @@ class SettingsTab(ctk.CTkFrame):
                     self.mail_path_entries[i].set_values(path, label)
 
         # Load API key
+        self.user_key_entry.delete(0, "end")
         self.user_key_entry.insert(0, config.get('scanner_user_key', ''))
 
+        # Load additional destinations
+        self.local_database_var.set(config.get('local_database', False))
+        self.webhook_entry.delete(0, "end")
+        self.webhook_entry.insert(0, config.get('webhook_url', ''))
+
+        # Load bandwidth cap
+        mode = config.get('upload_limit_mode', 'off')
+        self.limit_mode_var.set(next((name for name, value in self.LIMIT_MODES.items() if value == mode), "Off"))
+        self.limit_kbps_entry.delete(0, "end")
+        self.limit_kbps_entry.insert(0, str(config.get('upload_limit_kbps', 64)))
+        self.limit_hours_entry.delete(0, "end")
+        self.limit_hours_entry.insert(0, config.get('upload_limit_hours', ''))
+
         # Load preferences
         self.minimize_tray_var.set(config.get('minimize_to_tray', True))
         self.show_notifications_var.set(config.get('show_notifications', True))
         self.auto_start_var.set(config.get('auto_start_monitoring', False))
+        self.engine_process_var.set(config.get('engine_in_subprocess', False))
+        self.archive_var.set(config.get('archive_uploaded', False))
+
+    def reload_settings(self):
+        """Rebuild the form from the current configuration"""
+        for entry in self.mail_path_entries:
+            entry.destroy()
+        self.mail_path_entries.clear()
+        self.add_button.configure(state="normal")
+
+        self._add_mail_path_entry()
+        self._load_settings()
 
     def _save_settings(self):
         """Save settings to config manager"""
@@ -368,11 +705,20 @@ class SettingsTab(ctk.CTkFrame):
                     mail_paths.append(values)
 
             # Update config
-            self.config_manager.set('mail_paths', mail_paths)
-            self.config_manager.set('scanner_user_key', self.user_key_entry.get())
-            self.config_manager.set('minimize_to_tray', self.minimize_tray_var.get())
-            self.config_manager.set('show_notifications', self.show_notifications_var.get())
-            self.config_manager.set('auto_start_monitoring', self.auto_start_var.get())
+            self.config_manager.update({
+                'mail_paths': mail_paths,
+                'scanner_user_key': self.user_key_entry.get(),
+                'minimize_to_tray': self.minimize_tray_var.get(),
+                'show_notifications': self.show_notifications_var.get(),
+                'auto_start_monitoring': self.auto_start_var.get(),
+                'engine_in_subprocess': self.engine_process_var.get(),
+                'archive_uploaded': self.archive_var.get(),
+                'local_database': self.local_database_var.get(),
+                'webhook_url': self.webhook_entry.get().strip(),
+                'upload_limit_mode': self.LIMIT_MODES[self.limit_mode_var.get()],
+                'upload_limit_kbps': self._limit_kbps(),
+                'upload_limit_hours': self.limit_hours_entry.get().strip(),
+            })
 
             # Save to file
             if self.config_manager.save():
@@ -388,6 +734,23 @@ class SettingsTab(ctk.CTkFrame):
             logger.error(f"Error saving settings: {e}")
             self._show_status(f"Error: {str(e)}", COLORS['error'])
 
+    def _limit_kbps(self) -> float:
+        """Get the entered upload cap, keeping the saved one if the entry is not a number"""
+        try:
+            return max(0.0, float(self.limit_kbps_entry.get().strip()))
+        except ValueError:
+            return self.config_manager.snapshot.upload_limit_kbps
+
+    def _toggle_profiling(self):
+        """Start or stop profiling"""
+        success, message = self.on_toggle_profiling()
+        self._show_status(message, COLORS['success'] if success else COLORS['error'])
+
+    def set_profiling_state(self, is_profiling: bool):
+        """Update the profiling button"""
+        if self.profile_button:
+            self.profile_button.configure(text="Stop Profiling" if is_profiling else "Start Profiling")
+
     def _show_status(self, message: str, color: str):
         """Show status message"""
         self.status_label.configure(text=message, text_color=color)
@@ -409,5 +772,12 @@ class SettingsTab(ctk.CTkFrame):
             'scanner_user_key': self.user_key_entry.get(),
             'minimize_to_tray': self.minimize_tray_var.get(),
             'show_notifications': self.show_notifications_var.get(),
-            'auto_start_monitoring': self.auto_start_var.get()
+            'auto_start_monitoring': self.auto_start_var.get(),
+            'engine_in_subprocess': self.engine_process_var.get(),
+            'archive_uploaded': self.archive_var.get(),
+            'local_database': self.local_database_var.get(),
+            'webhook_url': self.webhook_entry.get().strip(),
+            'upload_limit_mode': self.LIMIT_MODES[self.limit_mode_var.get()],
+            'upload_limit_kbps': self._limit_kbps(),
+            'upload_limit_hours': self.limit_hours_entry.get().strip()
         }
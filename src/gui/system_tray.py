@@ -3,8 +3,12 @@ System tray integration
 """
 import pystray
 from PIL import Image, ImageDraw
+import time
 import logging
-from typing import Callable, Optional
+import threading
+from datetime import datetime
+from typing import Callable, Optional, Dict
+from .theme import COLORS
 
 logger = logging.getLogger(__name__)
 
@@ -12,6 +16,22 @@ logger = logging.getLogger(__name__)
 class SystemTray:
     """System tray icon and menu"""
 
+    ICON_SIZE = 64
+    UPDATE_INTERVAL = 1.0  # minimum seconds between icon/tooltip changes
+    ERROR_DISPLAY = 60  # seconds the error badge stays after a failure
+
+    # Status dot colors
+    STATE_COLORS = {
+        'idle': COLORS['text_muted'],
+        'active': COLORS['success'],
+        'uploading': COLORS['info'],
+        'offline': COLORS['warning'],
+        'error': COLORS['error'],
+    }
+
+    # (minimum queued uploads, badge text) per backlog level
+    BACKLOG_LEVELS = ((0, ""), (10, "10+"), (100, "99+"), (1000, "1k+"))
+
     def __init__(
         self,
         on_show: Callable,
@@ -39,6 +59,18 @@ class SystemTray:
         self.icon: Optional[pystray.Icon] = None
         self.is_monitoring = False
 
+        # Live status, rendered through the pre-built icon cache
+        self.icons: Dict[tuple, Image.Image] = {}
+        self.is_online = True
+        self.pending = 0
+        self.last_upload_at: Optional[float] = None
+        self.last_error_at: Optional[float] = None  # monotonic time
+        self._lock = threading.Lock()
+        self._shown: tuple = (None, None)  # (icon key, tooltip) last applied
+        self._last_update = 0.0
+        self._update_timer: Optional[threading.Timer] = None
+        self._update_due = 0.0  # monotonic time the scheduled update runs
+
     def create_icon(self):
         """Create system tray icon"""
         try:
@@ -67,10 +99,36 @@ class SystemTray:
 
         return image
 
+    def _render_icons(self, base: Image.Image) -> None:
+        """
+        Pre-render one icon per (state, backlog level) so updates only swap images
+
+        Args:
+            base: Application icon to draw badges on
+        """
+        base = base.convert('RGBA')
+        size = self.ICON_SIZE
+
+        for state, color in self.STATE_COLORS.items():
+            for level, (_, text) in enumerate(self.BACKLOG_LEVELS):
+                image = base.copy()
+                draw = ImageDraw.Draw(image)
+
+                # Status dot, bottom right
+                draw.ellipse([size - 26, size - 26, size - 2, size - 2], fill=color, outline=(0, 0, 0), width=2)
+
+                # Backlog badge, top right
+                if text:
+                    draw.rounded_rectangle([size - 30, 0, size - 1, 16], radius=6, fill=COLORS['accent_red'])
+                    draw.text((size - 15, 8), text, fill=(255, 255, 255), anchor="mm")
+
+                self.icons[(state, level)] = image
+
     def setup(self):
         """Set up system tray icon"""
         try:
-            icon_image = self.create_icon()
+            self._render_icons(self.create_icon())
+            icon_image = self.icons[self._state_key()]
 
             # Create menu
             menu = pystray.Menu(
@@ -119,6 +177,11 @@ class SystemTray:
 
     def stop(self):
         """Stop system tray"""
+        with self._lock:
+            if self._update_timer is not None:
+                self._update_timer.cancel()
+                self._update_timer = None
+
         if self.icon:
             try:
                 self.icon.stop()
@@ -138,6 +201,149 @@ class SystemTray:
         # Update icon if needed
         if self.icon:
             self.icon.update_menu()
+        self._schedule_update()
+
+    def update_status(
+        self,
+        online: Optional[bool] = None,
+        pending: Optional[int] = None,
+        uploaded: bool = False,
+        failed: bool = False
+    ):
+        """
+        Record pipeline status; the icon and tooltip follow at a throttled rate
+
+        Safe to call from any thread and as often as needed.
+
+        Args:
+            online: Whether the API is reachable
+            pending: Number of queued and in-flight uploads
+            uploaded: A file was just uploaded
+            failed: A file just failed
+        """
+        with self._lock:
+            if online is not None:
+                self.is_online = online
+            if pending is not None:
+                self.pending = pending
+            if uploaded:
+                self.last_upload_at = time.time()
+            if failed:
+                self.last_error_at = time.monotonic()
+        self._schedule_update()
+
+    def _state_key(self) -> tuple:
+        """Get the icon cache key for the current status"""
+        if not self.is_monitoring:
+            state = 'idle'
+        elif not self.is_online:
+            state = 'offline'
+        elif self.last_error_at is not None and time.monotonic() - self.last_error_at < self.ERROR_DISPLAY:
+            state = 'error'
+        elif self.pending:
+            state = 'uploading'
+        else:
+            state = 'active'
+
+        level = 0
+        for index, (minimum, _) in enumerate(self.BACKLOG_LEVELS):
+            if self.pending >= minimum:
+                level = index
+        return state, level
+
+    def _tooltip(self, state: str) -> str:
+        """Build the tooltip for the current status"""
+        if state == 'idle':
+            parts = ["Not monitoring"]
+        elif state == 'offline':
+            parts = [f"Offline, {self.pending} parked"]
+        else:
+            parts = ["Monitoring"]
+            if self.pending:
+                parts.append(f"{self.pending} queued")
+        if self.last_upload_at:
+            parts.append(f"last upload {datetime.fromtimestamp(self.last_upload_at).strftime('%H:%M')}")
+        return "SWG Mail Tracker - " + ", ".join(parts)
+
+    def _schedule_update(self):
+        """Apply the status now, or once the throttle interval has passed"""
+        with self._lock:
+            due = self._last_update + self.UPDATE_INTERVAL
+            if self._update_timer is not None and self._update_due <= due:
+                return  # an update is already scheduled and will see the latest status
+
+            delay = due - time.monotonic()
+            if delay > 0:
+                self._start_timer(delay)
+                return
+
+        self._apply_update()
+
+    def _start_timer(self, delay: float):
+        """Schedule the next update, replacing any scheduled one (caller holds the lock)"""
+        if self._update_timer is not None:
+            self._update_timer.cancel()
+
+        self._update_due = time.monotonic() + delay
+        self._update_timer = threading.Timer(delay, self._apply_update)
+        self._update_timer.daemon = True
+        self._update_timer.start()
+
+    def _apply_update(self):
+        """Swap in the cached icon and tooltip if the status changed"""
+        with self._lock:
+            if self._update_timer is not None:
+                self._update_timer.cancel()
+                self._update_timer = None
+            self._last_update = time.monotonic()
+            key = self._state_key()
+            tooltip = self._tooltip(key[0])
+            changed_icon = key != self._shown[0]
+            changed_tooltip = tooltip != self._shown[1]
+            self._shown = (key, tooltip)
+
+            # Clear the error badge when it expires even if nothing else happens
+            if key[0] == 'error':
+                expires = self.last_error_at + self.ERROR_DISPLAY - time.monotonic()
+                self._start_timer(max(expires, self.UPDATE_INTERVAL))
+
+        if not self.icon or not (changed_icon or changed_tooltip):
+            return
+
+        try:
+            if changed_icon and key in self.icons:
+                self.icon.icon = self.icons[key]
+            if changed_tooltip:
+                self.icon.title = tooltip
+        except Exception as e:
+            logger.error(f"Error updating tray icon: {e}")
+
+    def set_tooltip(self, text: str):
+        """
+        Update the tray icon tooltip
+
+        Args:
+            text: Tooltip text
+        """
+        if self.icon:
+            try:
+                self.icon.title = text
+            except Exception as e:
+                logger.error(f"Error updating tray tooltip: {e}")
+
+    def notify(self, title: str, message: str):
+        """
+        Show a desktop notification from the tray icon
+
+        Args:
+            title: Notification title
+            message: Notification message
+        """
+        if self.icon:
+            try:
+                self.icon.notify(message, title)
+            except Exception as e:
+                logger.error(f"Error showing notification: {e}")
 
     def _handle_show(self, icon, item):
         """Handle show window"""
@@ -0,0 +1,481 @@
+"""
+Soak test: replay days of synthetic mail traffic against a local stub endpoint
+
+Runs the real MailEngine (watchers, queue, pooled client, stores) while
+the statistics store runs on a simulated wall clock many times faster
+than real time, so a few minutes cover several days of idle gaps,
+bursts, network flaps and configuration changes, including minute, hour
+and day bucket rollover. Resource usage is sampled every simulated hour and
+checked against bounds at the end.
+
+Usage:
+    python tools/soak_test.py --days 3 --speed 720
+
+Exits with status 1 if any bound is exceeded. The GUI is not exercised.
+"""
+import os
+import sys
+import time
+import random
+import logging
+import argparse
+import tempfile
+import threading
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.core import stats_store
+from src.core.config_manager import ConfigSnapshot
+from src.core.engine import MailEngine
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+logger = logging.getLogger("soak_test")
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+CHARACTERS = ["Alpha", "Bravo", "Charlie", "Delta"]
+
+
+class SimulatedClock:
+    """Wall clock that runs speed times faster than real time"""
+
+    def __init__(self, speed: float):
+        """
+        Initialize clock
+
+        Args:
+            speed: Simulated seconds per real second
+        """
+        self.speed = speed
+        self._origin = time.time()
+        self._real_start = time.monotonic()
+
+    def time(self) -> float:
+        """Get the simulated epoch time"""
+        return self._origin + (time.monotonic() - self._real_start) * self.speed
+
+    def elapsed(self) -> float:
+        """Get simulated seconds since the clock started"""
+        return self.time() - self._origin
+
+    def sleep_until(self, elapsed: float) -> None:
+        """Sleep in real time until the simulated elapsed time is reached"""
+        remaining = (elapsed - self.elapsed()) / self.speed
+        if remaining > 0:
+            time.sleep(remaining)
+
+    def __getattr__(self, name):
+        # Everything but time() (monotonic, sleep, localtime...) stays real
+        return getattr(time, name)
+
+    def install(self, *modules) -> None:
+        """Replace the time module used by the given modules"""
+        for module in modules:
+            module.time = self
+
+
+class StubEndpoint:
+    """Local HTTP server standing in for swgtracker.com"""
+
+    def __init__(self, server_error_rate: float, client_error_rate: float, seed: int):
+        """
+        Initialize stub endpoint
+
+        Args:
+            server_error_rate: Fraction of uploads answered with HTTP 500
+            client_error_rate: Fraction of uploads answered with HTTP 400
+            seed: Random seed for error injection
+        """
+        self.down = False
+        self.requests = 0
+        self.dropped = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _drop_if_down(self) -> bool:
+                if stub.down:
+                    with stub._lock:
+                        stub.dropped += 1
+                    # Hang up without answering, like a lost connection
+                    self.close_connection = True
+                    return True
+                return False
+
+            def do_HEAD(self):
+                if self._drop_if_down():
+                    return
+                self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if self._drop_if_down():
+                    return
+
+                with stub._lock:
+                    stub.requests += 1
+                    roll = stub._random.random()
+
+                if roll < client_error_rate:
+                    status, body = 400, b'{"success": false, "message": "Rejected"}'
+                elif roll < client_error_rate + server_error_rate:
+                    status, body = 500, b"Internal Server Error"
+                else:
+                    status, body = 200, b'{"success": true, "message": "Imported"}'
+
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_port}/import_mailcontent.php"
+        self._thread = threading.Thread(target=self.server.serve_forever, name="StubEndpoint", daemon=True)
+
+    def start(self) -> None:
+        """Start serving"""
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop serving"""
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def rss_bytes() -> Optional[int]:
+    """Get the resident set size of this process, None if unknown"""
+    if psutil:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def open_handles() -> Optional[int]:
+    """Get the number of open file descriptors or handles, None if unknown"""
+    if psutil:
+        process = psutil.Process()
+        return process.num_handles() if sys.platform == "win32" else process.num_fds()
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except OSError:
+        return None
+
+
+def build_schedule(days: int, rng: random.Random) -> List[tuple]:
+    """
+    Build the simulated timeline of traffic, flaps and config changes
+
+    Args:
+        days: Number of simulated days
+        rng: Random generator
+
+    Returns:
+        Sorted list of (elapsed_seconds, action, argument)
+    """
+    events = []
+
+    for day in range(days):
+        day_start = day * DAY
+
+        for hour in range(24):
+            hour_start = day_start + hour * HOUR
+
+            # Idle overnight, a trickle during the day, busier evenings
+            if 2 <= hour < 9:
+                rate = 0
+            elif hour >= 18:
+                rate = 40
+            else:
+                rate = 10
+
+            for _ in range(rate):
+                events.append((hour_start + rng.uniform(0, HOUR), "mail", 1))
+
+            # Occasional burst, e.g. a vendor sweep or mail dump after a session
+            if rate and rng.random() < 0.25:
+                events.append((hour_start + rng.uniform(0, HOUR), "mail", rng.randint(50, 250)))
+
+            # Config change every six hours
+            if hour % 6 == 3:
+                events.append((hour_start, "reconfigure", None))
+
+            events.append((hour_start + HOUR - 1, "sample", None))
+
+        # Network flaps of 10 to 45 minutes
+        for _ in range(2):
+            start = day_start + rng.uniform(0, DAY - HOUR)
+            events.append((start, "flap_start", None))
+            events.append((start + rng.uniform(10 * 60, 45 * 60), "flap_end", None))
+
+    events.sort(key=lambda event: event[0])
+    return events
+
+
+class SoakTest:
+    """Drive a MailEngine through a simulated schedule and check resource bounds"""
+
+    def __init__(self, args: argparse.Namespace):
+        """
+        Initialize soak test
+
+        Args:
+            args: Parsed command line arguments
+        """
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.work_dir = tempfile.TemporaryDirectory(prefix="swg-soak-")
+        self.mail_dirs = []
+        for name in CHARACTERS:
+            path = os.path.join(self.work_dir.name, "profiles", name, f"mail_{name}")
+            os.makedirs(path)
+            self.mail_dirs.append(path)
+
+        self.stub = StubEndpoint(args.server_error_rate, args.client_error_rate, args.seed)
+        self.clock = SimulatedClock(args.speed)
+        self.engine: Optional[MailEngine] = None
+        self.active_dirs: List[int] = list(range(len(CHARACTERS)))
+        self.config_variant = 0
+        self.written = 0
+        self.results: Dict[str, int] = {}
+        self.labels_used = set()
+        self.samples: List[Dict] = []
+        self.max_pending = 0
+        self._results_lock = threading.Lock()
+
+    def _config(self) -> ConfigSnapshot:
+        """Build the configuration for the current variant"""
+        variant = self.config_variant % 4
+        mail_paths = []
+        for index in self.active_dirs:
+            label = CHARACTERS[index]
+            if variant == 1 and index == 0:
+                label += " (main)"  # label rename
+            self.labels_used.add(label)
+            mail_paths.append({"path": self.mail_dirs[index], "label": label})
+
+        return ConfigSnapshot({
+            "mail_paths": mail_paths,
+            "scanner_user_key": "soak-key-b" if variant == 2 else "soak-key-a",
+        })
+
+    def _on_event(self, kind: str, *args) -> None:
+        """Count final outcomes"""
+        if kind == 'result':
+            with self._results_lock:
+                status = args[0].status
+                self.results[status] = self.results.get(status, 0) + 1
+
+    def _reconfigure(self) -> None:
+        """Cycle through label, key and directory set changes"""
+        self.config_variant += 1
+        variant = self.config_variant % 4
+
+        # Drop the last character in variant 3, bring it back afterwards
+        self.active_dirs = list(range(len(CHARACTERS) - 1 if variant == 3 else len(CHARACTERS)))
+
+        success, message = self.engine.reconfigure(self._config())
+        if not success:
+            logger.warning(f"Reconfigure failed: {message}")
+
+    def _write_mail(self, count: int) -> None:
+        """Write mail files into watched directories"""
+        for _ in range(count):
+            index = self.rng.choice(self.active_dirs)
+            self.written += 1
+            path = os.path.join(self.mail_dirs[index], f"{self.written:08d}.mail")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(f"{self.written}\nVendor {self.rng.randint(1, 50)}\nSale\n")
+                f.write("Item sold. " * self.rng.randint(5, 200))
+
+    def _sample(self) -> None:
+        """Record resource usage"""
+        pending = self.engine.upload_queue.pending_count()
+        self.max_pending = max(self.max_pending, pending)
+        sample = {
+            "hour": round(self.clock.elapsed() / HOUR),
+            "rss": rss_bytes(),
+            "threads": threading.active_count(),
+            "handles": open_handles(),
+            "pending": pending,
+            "stats_keys": len(self.engine.stats_store.keys()),
+            "written": self.written,
+        }
+        self.samples.append(sample)
+
+        if sample["hour"] % 24 == 0:
+            rss = f"{sample['rss'] / 1048576:.1f} MB" if sample["rss"] else "n/a"
+            print(
+                f"day {sample['hour'] // 24:>3}: written={self.written} results={sum(self.results.values())} "
+                f"pending={pending} rss={rss} threads={sample['threads']} handles={sample['handles']}",
+                flush=True
+            )
+
+    def run(self) -> bool:
+        """
+        Run the soak test
+
+        Returns:
+            True if every bound held
+        """
+        self.stub.start()
+        # Only statistics run on simulated time; file settling and
+        # timeouts must keep real time
+        self.clock.install(stats_store)
+
+        self.engine = MailEngine(
+            self._config(),
+            on_event=self._on_event,
+            data_dir=os.path.join(self.work_dir.name, "data"),
+            api_url=self.stub.url
+        )
+        self.engine.open()
+        success, message = self.engine.start()
+        if not success:
+            print(f"Engine failed to start: {message}")
+            return False
+
+        schedule = build_schedule(self.args.days, self.rng)
+        print(
+            f"Simulating {self.args.days} days at {self.args.speed:g}x "
+            f"(~{self.args.days * DAY / self.args.speed / 60:.1f} min)",
+            flush=True
+        )
+
+        for at, action, argument in schedule:
+            self.clock.sleep_until(at)
+
+            if action == "mail":
+                self._write_mail(argument)
+            elif action == "flap_start":
+                self.stub.down = True
+            elif action == "flap_end":
+                self.stub.down = False
+            elif action == "reconfigure":
+                self._reconfigure()
+            elif action == "sample":
+                self._sample()
+
+            self.max_pending = max(self.max_pending, self.engine.upload_queue.pending_count())
+
+        self.stub.down = False
+        drained = self._wait_for_drain()
+        self._sample()
+        ok = self._check(drained)
+
+        self.engine.shutdown(5)
+        self.stub.stop()
+        self.work_dir.cleanup()
+        return ok
+
+    def _wait_for_drain(self) -> bool:
+        """Wait for every written file to reach a final outcome"""
+        deadline = time.monotonic() + self.args.drain_timeout
+        while time.monotonic() < deadline:
+            with self._results_lock:
+                finished = sum(self.results.values())
+            if finished >= self.written and self.engine.upload_queue.pending_count() == 0:
+                return True
+            time.sleep(0.5)
+        return False
+
+    def _check(self, drained: bool) -> bool:
+        """Check the samples against the configured bounds and print a report"""
+        warm = [s for s in self.samples if s["hour"] >= self.args.warmup_hours] or self.samples
+        baseline = warm[0]
+        failures = []
+
+        def check(condition: bool, message: str):
+            print(f"  [{'ok' if condition else 'FAIL'}] {message}")
+            if not condition:
+                failures.append(message)
+
+        print("\nResults:", ", ".join(f"{k}={v}" for k, v in sorted(self.results.items())))
+        print(f"Stub: {self.stub.requests} uploads answered, {self.stub.dropped} requests dropped during flaps")
+        print("Bounds:")
+
+        check(drained, f"all {self.written} files reached a final outcome ({sum(self.results.values())})")
+        check(not self.results.get("skipped"), f"no file read before it was written ({self.results.get('skipped', 0)})")
+
+        if baseline["rss"]:
+            growth = (max(s["rss"] for s in warm) - baseline["rss"]) / 1048576
+            check(growth <= self.args.max_rss_growth, f"RSS growth {growth:.1f} MB <= {self.args.max_rss_growth} MB")
+        else:
+            print("  [skip] RSS not available on this platform")
+
+        threads = max(s["threads"] for s in warm)
+        check(
+            threads <= baseline["threads"] + self.args.thread_slack,
+            f"threads {threads} <= {baseline['threads']} + {self.args.thread_slack}"
+        )
+
+        if baseline["handles"] is not None:
+            handles = max(s["handles"] for s in warm)
+            check(
+                handles <= baseline["handles"] + self.args.handle_slack,
+                f"open handles {handles} <= {baseline['handles']} + {self.args.handle_slack}"
+            )
+        else:
+            print("  [skip] open handles not available on this platform")
+
+        check(self.max_pending <= self.args.max_queue, f"max queue depth {self.max_pending} <= {self.args.max_queue}")
+        check(self.samples[-1]["pending"] == 0, f"queue empty at end ({self.samples[-1]['pending']})")
+
+        stats_keys = self.samples[-1]["stats_keys"]
+        check(
+            stats_keys <= len(self.labels_used),
+            f"statistics series {stats_keys} <= {len(self.labels_used)} labels used"
+        )
+
+        print("\nPASS" if not failures else f"\nFAIL ({len(failures)} bounds exceeded)")
+        return not failures
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Soak test the upload engine with simulated days of traffic")
+    parser.add_argument("--days", type=int, default=3, help="simulated days to run")
+    parser.add_argument("--speed", type=float, default=720, help="simulated seconds per real second")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for traffic and errors")
+    parser.add_argument("--server-error-rate", type=float, default=0.01, help="fraction of uploads answered 500")
+    parser.add_argument("--client-error-rate", type=float, default=0.002, help="fraction of uploads answered 400")
+    parser.add_argument("--warmup-hours", type=int, default=12, help="simulated hours before taking the baseline")
+    parser.add_argument("--max-rss-growth", type=float, default=40, help="allowed RSS growth after warm-up (MB)")
+    parser.add_argument("--thread-slack", type=int, default=4, help="allowed extra threads over the baseline")
+    parser.add_argument("--handle-slack", type=int, default=16, help="allowed extra open handles over the baseline")
+    parser.add_argument("--max-queue", type=int, default=2000, help="allowed upload queue depth")
+    parser.add_argument("--drain-timeout", type=float, default=120, help="real seconds to wait for the final drain")
+    parser.add_argument("--verbose", action="store_true", help="show engine logging")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.ERROR,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    sys.exit(0 if SoakTest(args).run() else 1)
+
+
+if __name__ == "__main__":
+    main()